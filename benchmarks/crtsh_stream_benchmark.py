@@ -0,0 +1,100 @@
+"""
+Compare the buffered and streaming crt.sh parsers on a synthetic payload
+
+Usage:
+    python -m benchmarks.crtsh_stream_benchmark --size-mb 100
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from re import match
+
+from src.services.cert_cache import CertificateCache
+from src.services.crtsh_service import Crtsh, CrtshStreamParser
+
+
+def build_payload(size_mb: int, unique: int) -> bytes:
+    """Build a crt.sh-like JSON array of roughly size_mb megabytes"""
+    target = size_mb * 1024 * 1024
+    parts = [b"["]
+    written = 1
+    index = 0
+    while written < target:
+        name = f"host{index % unique}.example.com"
+        entry = {
+            "issuer_ca_id": 183267,
+            "issuer_name": "C=US, O=Let's Encrypt, CN=R3",
+            "common_name": name,
+            "name_value": f"{name}\n*.{name}",
+            "id": 10_000_000 + index,
+            "entry_timestamp": "2024-01-01T00:00:00.000",
+            "not_before": "2024-01-01T00:00:00",
+            "not_after": "2024-04-01T00:00:00",
+            "serial_number": f"{index:040x}",
+        }
+        data = json.dumps(entry).encode()
+        if index:
+            parts.append(b",")
+            written += 1
+        parts.append(data)
+        written += len(data)
+        index += 1
+    parts.append(b"]")
+    return b"".join(parts)
+
+
+def buffered(payload: bytes) -> int:
+    subdomains = set()
+    for entry in json.loads(payload):
+        name_value = entry["name_value"]
+        if not match(r"^[0-9\.]+$", name_value):
+            subdomains.add(name_value)
+    return len(Crtsh().parse_response(subdomains=subdomains))
+
+
+def streaming(payload: bytes, chunk_size: int, cache=None) -> int:
+    view = memoryview(payload)
+    parser = CrtshStreamParser(cache=cache)
+    for start in range(0, len(view), chunk_size):
+        parser.feed(bytes(view[start : start + chunk_size]))
+    return len(parser.close())
+
+
+def measure(label: str, func, *args):
+    # Time an untraced run; tracemalloc slows allocation-heavy code down
+    started = time.perf_counter()
+    count = func(*args)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<10} subdomains={count:<8} time={elapsed:8.2f}s "
+        f"peak={peak / 1024 / 1024:10.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--unique", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    payload = build_payload(args.size_mb, args.unique)
+    print(f"payload: {len(payload) / 1024 / 1024:.1f} MB")
+
+    measure("buffered", buffered, payload)
+    measure("streaming", streaming, payload, args.chunk_size)
+
+    # Same certificates seen again for another domain sharing them
+    cache = CertificateCache(max_entries=10**7)
+    streaming(payload, args.chunk_size, cache)
+    measure("warm-cert", streaming, payload, args.chunk_size, cache)
+
+
+if __name__ == "__main__":
+    main()
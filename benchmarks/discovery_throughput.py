@@ -0,0 +1,83 @@
+"""
+Load-test discovery against the local stand-in server
+
+Usage:
+    python -m benchmarks.discovery_throughput --domains 200 --workers 10 \
+        --entries 5000 --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.core.config import settings
+from src.services.http_client import http_client
+from src.services.monitoring_service import MonitoringService
+from src.services.rate_limiter import rate_limiter
+from src.standin.server import StandinConfig, StandinServer
+
+
+async def run(domains, workers: int):
+    service = MonitoringService()
+    semaphore = asyncio.Semaphore(workers)
+    latencies = []
+    failures = 0
+
+    async def discover(domain):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            result = await service.discover(domain)
+            latencies.append(time.perf_counter() - started)
+            failures += len(result.failed)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(discover(domain) for domain in domains))
+    finally:
+        await http_client.close()
+    return time.perf_counter() - started, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--domains", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=settings.MAX_WORKERS)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=1000.0, help="requests/sec")
+    args = parser.parse_args()
+
+    config = StandinConfig(
+        entries=args.entries,
+        unique_names=args.entries // 2,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        retry_after=0,
+        seed=0,
+    )
+    with StandinServer(config) as server:
+        settings.CRTSH_BASE_URL = server.url
+        settings.THREATMINER_BASE_URL = server.url
+        settings.DISCOVERY_CACHE_ENABLED = False
+        settings.DEFAULT_RATE_LIMIT = args.rate
+        settings.SOURCE_RATE_LIMITS = {}
+        settings.SOURCE_BURSTS = {}
+
+        domains = [f"domain{index}.example" for index in range(args.domains)]
+        elapsed, latencies, failures = asyncio.run(run(domains, args.workers))
+
+    latencies.sort()
+    print(f"domains={len(domains)} workers={args.workers} time={elapsed:.2f}s")
+    print(f"throughput={len(domains) / elapsed:.1f} domains/s")
+    print(
+        f"latency p50={statistics.median(latencies):.3f}s "
+        f"p95={latencies[int(len(latencies) * 0.95) - 1]:.3f}s"
+    )
+    print(f"failed sources={failures} requests={server.requests}")
+    print(f"limiter={rate_limiter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare per-name and bulk DNS resolution against a local stub DNS server
+
+The stub runs in a separate process so it does not compete with the
+resolver for the interpreter.
+
+Usage:
+    python -m benchmarks.dns_bulk_benchmark --names 20000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+
+from src.core.config import settings
+from src.services.bulk_resolver import BulkResolver
+from src.services.dns_cache import DnsCache
+from src.services.dns_resolver import DnsResolver
+from src.standin.dns_server import StubDnsServer
+
+
+async def run(resolver: DnsResolver, names):
+    started = time.perf_counter()
+    resolved = 0
+    try:
+        async for _, record in resolver.resolve_many(names):
+            resolved += record is not None
+    finally:
+        if isinstance(resolver, BulkResolver):
+            resolver.close()
+    return time.perf_counter() - started, resolved
+
+
+def measure(label: str, resolver: DnsResolver, names):
+    before = resolver.queries
+    elapsed, resolved = asyncio.run(run(resolver, names))
+    queries = resolver.queries - before
+    print(
+        f"{label:<9} names={len(names):<7} resolved={resolved:<7} "
+        f"time={elapsed:7.2f}s {len(names) / elapsed:9.0f} names/s "
+        f"{queries / elapsed:9.0f} queries/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=settings.DNS_CONCURRENCY)
+    parser.add_argument("--window", type=int, default=settings.DNS_BULK_WINDOW)
+    parser.add_argument("--sockets", type=int, default=settings.DNS_BULK_SOCKETS)
+    args = parser.parse_args()
+
+    server = StubDnsServer(port=0)
+    host, port = server.server_address
+    process = multiprocessing.Process(target=server.serve_forever, daemon=True)
+    process.start()
+    server.socket.close()
+
+    settings.DNS_RESOLVERS = [host]
+    settings.DNS_PORT = port
+    settings.WILDCARD_DETECTION = False
+    names = [f"host{index}.example.com" for index in range(args.names)]
+
+    try:
+        per_name = DnsResolver(args.concurrency, cache=DnsCache(max_entries=0))
+        measure("per-name", per_name, names)
+
+        bulk = BulkResolver(args.window, DnsCache(max_entries=0), args.sockets)
+        measure("bulk", bulk, names)
+        print(f"bulk retransmits={bulk.retransmits} stray={bulk.stray}")
+    finally:
+        process.terminate()
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Diff discovered subdomains against a stored fingerprint instead of
+upserting every discovered name
+
+Usage:
+    python -m benchmarks.fingerprint_benchmark --names 100000 --new 50
+"""
+import argparse
+import time
+from datetime import datetime
+
+import bson
+
+from src.db.fingerprint import SubdomainFingerprint
+
+
+def upsert_bytes(domain, names, now):
+    """BSON size of the update statements that store names"""
+    return sum(
+        len(
+            bson.encode(
+                {
+                    "q": {"domain": domain, "subdomain": name},
+                    "u": {
+                        "$setOnInsert": {"first_seen": now},
+                        "$max": {"last_seen": now},
+                    },
+                    "upsert": True,
+                }
+            )
+        )
+        for name in names
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=100000)
+    parser.add_argument("--new", type=int, default=50)
+    args = parser.parse_args()
+
+    domain = "example.com"
+    stored = [
+        f"host-{index}.region{index % 17}.{domain}" for index in range(args.names)
+    ]
+    discovered = stored + [f"fresh-{index}.{domain}" for index in range(args.new)]
+    now = datetime.utcnow()
+
+    started = time.perf_counter()
+    fingerprint = SubdomainFingerprint.from_names(stored)
+    built = time.perf_counter() - started
+    data = fingerprint.to_bytes()
+
+    started = time.perf_counter()
+    fingerprint = SubdomainFingerprint.from_bytes(data)
+    candidates = fingerprint.missing(discovered)
+    grown = fingerprint.add(candidates)
+    diffed = time.perf_counter() - started
+
+    before = upsert_bytes(domain, discovered, now)
+    after = 2 * len(data) + upsert_bytes(domain, candidates, now)
+    print(
+        f"names={len(discovered)} candidates={len(candidates)} "
+        f"fingerprint={len(data) / 1024:.0f}KiB build={built:.3f}s diff={diffed:.3f}s"
+    )
+    print(
+        f"upsert all={before / 1024:.0f}KiB "
+        f"fingerprint read+write+candidates={after / 1024:.0f}KiB "
+        f"({before / after:.1f}x less) grown={len(grown)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
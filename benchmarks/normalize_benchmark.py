@@ -0,0 +1,73 @@
+"""
+Compare the per-entry crt.sh name loop with the batched normalizer
+
+Usage:
+    python -m benchmarks.normalize_benchmark --names 1000000
+"""
+import argparse
+import random
+import time
+from re import match
+
+from src.services.normalizer import normalize_names
+
+
+def build_names(count: int):
+    rng = random.Random(0)
+    values = []
+    for index in range(count):
+        kind = rng.random()
+        if kind < 0.05:
+            values.append(f"10.{index % 256}.{index % 100}.1")
+        elif kind < 0.15:
+            values.append(f"host{index}.other-org.net")
+        elif kind < 0.45:
+            values.append(f"*.Host{index % 50000}.example.com")
+        else:
+            values.append(
+                f"host{index % 50000}.example.com\nwww{index % 50000}.example.com"
+            )
+    return values
+
+
+def per_entry(values, domain):
+    subdomains = set()
+    for name_value in values:
+        if not match(r"^[0-9\.]+$", name_value):
+            subdomains.add(name_value)
+    results = set()
+    for value in subdomains:
+        for sub_domain in value.split("\n"):
+            results.add(sub_domain.replace("*.", "").replace("@", "."))
+    return results
+
+
+def batched(values, domain):
+    return normalize_names(values, domain)
+
+
+def measure(label, func, values, domain):
+    started = time.perf_counter()
+    results = func(values, domain)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} names={len(results):<8} time={elapsed:6.2f}s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    values = build_names(args.names)
+    print(f"input: {len(values)} values")
+
+    # The per-entry loop neither lowercases nor filters scope, so it also
+    # returns out-of-scope names; the batched stage does strictly more work
+    slow = measure("per-entry", per_entry, values, "example.com")
+    fast = measure("batched", batched, values, "example.com")
+    print(f"speedup: {slow / fast:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
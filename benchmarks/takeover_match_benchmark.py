@@ -0,0 +1,41 @@
+"""
+Match CNAME targets against the bundled takeover fingerprint table
+
+Usage:
+    python -m benchmarks.takeover_match_benchmark --targets 300000
+"""
+import argparse
+import random
+import time
+
+from src.services.takeover import FingerprintTable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--targets", type=int, default=300000)
+    parser.add_argument("--match-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    table = FingerprintTable.load()
+    suffixes = [suffix for fp in table.fingerprints for suffix in fp.cname]
+    rng = random.Random(1)
+    targets = [
+        f"app{index}.{rng.choice(suffixes)}."
+        if rng.random() < args.match_rate
+        else f"edge{index}.cdn{index % 97}.example.net."
+        for index in range(args.targets)
+    ]
+
+    started = time.perf_counter()
+    matched = sum(table.match(target) is not None for target in targets)
+    elapsed = time.perf_counter() - started
+    print(
+        f"targets={len(targets)} fingerprints={len(table)} suffixes={len(suffixes)} "
+        f"matched={matched} time={elapsed:.3f}s "
+        f"{len(targets) / elapsed:,.0f} targets/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from pathlib import Path
 from termcolor import colored
 from src.core.config import settings
 from src.db.repository import repository
+from src.services.bulk_resolver import bulk_resolver
+from src.services.http_client import http_client
 from src.services.monitoring_service import monitoring_service
 import logging
 
@@ -28,7 +30,7 @@ class SubDomainMonitorCLI:
         try:
             await self.repo.connect()
             result = await self.service.add_domain(domain, slack, telegram)
-            subdomain_count = len(result.get("subdomains", []))
+            subdomain_count = result.get("subdomain_count", 0)
             logger.info(
                 colored(f"Added {domain} with {subdomain_count} subdomains", "green")
             )
@@ -70,24 +72,28 @@ class SubDomainMonitorCLI:
         """List all monitored domains"""
         try:
             await self.repo.connect()
-            domains = await self.repo.find_all()
 
-            if not domains:
-                print(colored("No domains found", "yellow"))
-                return
-
-            print(
-                colored(f"\n{'Domain':<40} {'Subdomains':<15} {'Last Updated'}", "cyan")
-            )
-            print(colored("-" * 80, "cyan"))
-
-            for domain in domains:
+            total = 0
+            async for domain in self.repo.iter_domains():
+                if not total:
+                    print(
+                        colored(
+                            f"\n{'Domain':<40} {'Subdomains':<15} {'Last Updated'}",
+                            "cyan",
+                        )
+                    )
+                    print(colored("-" * 80, "cyan"))
                 name = domain.get("domain", "N/A")
-                count = len(domain.get("subdomains", []))
+                count = domain.get("subdomain_count", 0)
                 updated = domain.get("updated_at", "N/A")
                 print(colored(f"{name:<40} {count:<15} {updated}", "green"))
+                total += 1
 
-            print(colored(f"\nTotal: {len(domains)} domains", "cyan"))
+            if not total:
+                print(colored("No domains found", "yellow"))
+                return
+
+            print(colored(f"\nTotal: {total} domains", "cyan"))
 
         except Exception as e:
             logger.error(colored(f"Failed to list domains: {e}", "red"))
@@ -98,13 +104,11 @@ class SubDomainMonitorCLI:
         """List subdomains for a specific domain"""
         try:
             await self.repo.connect()
-            doc = await self.repo.find_one(domain)
-
-            if not doc:
+            if not await self.repo.exists(domain):
                 logger.error(colored(f"Domain {domain} not found", "red"))
                 return
 
-            subdomains = doc.get("subdomains", [])
+            subdomains = await self.repo.get_subdomains(domain)
 
             if not subdomains:
                 print(colored(f"No subdomains found for {domain}", "yellow"))
@@ -143,7 +147,6 @@ class SubDomainMonitorCLI:
         """Export all subdomains to a file"""
         try:
             await self.repo.connect()
-            domains = await self.repo.find_all()
 
             from datetime import datetime
 
@@ -153,11 +156,9 @@ class SubDomainMonitorCLI:
 
             total_subdomains = 0
             with open(filename, "w") as f:
-                for domain in domains:
-                    subdomains = domain.get("subdomains", [])
-                    for subdomain in subdomains:
-                        f.write(f"{subdomain}\n")
-                        total_subdomains += 1
+                async for subdomain in self.repo.iter_subdomains():
+                    f.write(f"{subdomain}\n")
+                    total_subdomains += 1
 
             logger.info(
                 colored(
@@ -170,13 +171,13 @@ class SubDomainMonitorCLI:
         finally:
             await self.repo.disconnect()
 
-    async def monitor(self):
+    async def monitor(self, full_scan: bool = False):
         """Run monitoring for all domains"""
         try:
             await self.repo.connect()
             logger.info(colored("Starting monitoring...", "cyan"))
 
-            result = await self.service.monitor_all_domains()
+            result = await self.service.monitor_all_domains(full_scan=full_scan)
 
             print(colored("\n" + "=" * 50, "cyan"))
             print(colored("Monitoring Results:", "cyan"))
@@ -257,6 +258,13 @@ class SubDomainMonitorCLI:
             help="Run monitoring for all domains",
         )
 
+        parser.add_argument(
+            "-f",
+            "--full-scan",
+            action="store_true",
+            help="Rescan full crt.sh history instead of new entries only",
+        )
+
         parser.add_argument(
             "-s", "--slack", action="store_true", help="Send notifications via Slack"
         )
@@ -270,6 +278,14 @@ class SubDomainMonitorCLI:
 
         return parser.parse_args()
 
+    async def run(self):
+        """Run the CLI and release shared HTTP connections on exit"""
+        try:
+            await self.main()
+        finally:
+            await http_client.close()
+            bulk_resolver.close()
+
     async def main(self):
         """Main CLI entry point"""
         args = self.init_args()
@@ -293,17 +309,17 @@ class SubDomainMonitorCLI:
             await self.export_subdomains()
 
         elif args.monitor:
-            await self.monitor()
+            await self.monitor(args.full_scan)
 
         else:
             # Default action: run monitoring
-            await self.monitor()
+            await self.monitor(args.full_scan)
 
 
 def main():
     """Entry point for CLI"""
     cli = SubDomainMonitorCLI()
-    asyncio.run(cli.main())
+    asyncio.run(cli.run())
 
 
 if __name__ == "__main__":
@@ -8,6 +8,8 @@ from src.api.v1.endpoints import domains, monitoring, scheduler
 from src.core.config import settings
 from src.db.repository import repository
 from src.scheduler.scheduler import monitoring_scheduler
+from src.services.bulk_resolver import bulk_resolver
+from src.services.http_client import http_client
 
 # Configure logging
 logging.basicConfig(
@@ -43,6 +45,8 @@ async def lifespan(app: FastAPI):
         monitoring_scheduler.shutdown(wait=True)
         logger.info("✓ Scheduler shutdown complete")
 
+    await http_client.close()
+    bulk_resolver.close()
     await repository.disconnect()
     logger.info("✓ Application shutdown complete")
 
@@ -1,9 +1,10 @@
 import logging
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from src.api.dependencies import get_monitoring_service, get_repository
+from src.core.exceptions import InvalidCursorException
 from src.db.repository import MongoRepository
 from src.models.domain import (
     DomainCreate,
@@ -19,28 +20,60 @@ router = APIRouter(prefix="/domains", tags=["domains"])
 
 @router.get("", response_model=DomainListResponse)
 async def list_domains(
-    skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     repo: MongoRepository = Depends(get_repository),
 ):
-    """List all monitored domains"""
+    """List monitored domains one page at a time, in domain order"""
     try:
-        domains = await repo.get_all_domains_list()
-        return DomainListResponse(domains=domains, total=len(domains))
+        docs, next_cursor = await repo.find_page(
+            limit=limit, cursor=cursor, projection={"_id": 0, "domain": 1}
+        )
+        return DomainListResponse(
+            domains=[doc["domain"] for doc in docs],
+            total=await repo.count(),
+            next_cursor=next_cursor,
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error listing domains: {e}")
         raise HTTPException(status_code=500, detail="Failed to list domains")
 
 
+@router.get("/{domain}", response_model=DomainResponse)
+async def get_domain(domain: str, repo: MongoRepository = Depends(get_repository)):
+    """Get a monitored domain with its subdomain count"""
+    try:
+        doc = await repo.find_one(domain)
+        if not doc:
+            raise HTTPException(status_code=404, detail="Domain not found")
+
+        return DomainResponse(
+            id=str(doc["_id"]),
+            domain=doc["domain"],
+            subdomain_count=doc.get("subdomain_count", 0),
+            last_new_found=doc.get("last_new_found"),
+            created_at=doc["created_at"],
+            updated_at=doc["updated_at"],
+            notify_slack=doc.get("notify_slack", False),
+            notify_telegram=doc.get("notify_telegram", False),
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting domain {domain}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get domain")
+
+
 @router.get("/{domain}/subdomains", response_model=SubdomainResponse)
 async def get_subdomains(domain: str, repo: MongoRepository = Depends(get_repository)):
     """Get all subdomains for a specific domain"""
     try:
-        doc = await repo.find_one(domain)
-        if not doc:
+        if not await repo.exists(domain):
             raise HTTPException(status_code=404, detail="Domain not found")
 
-        subdomains = doc.get("subdomains", [])
+        subdomains = await repo.get_subdomains(domain)
         return SubdomainResponse(
             domain=domain, subdomains=subdomains, total=len(subdomains)
         )
@@ -66,7 +99,7 @@ async def create_domain(
         return {
             "message": "Domain added successfully",
             "domain": domain_create.domain,
-            "subdomain_count": len(result.get("subdomains", [])),
+            "subdomain_count": result.get("subdomain_count", 0),
         }
     except Exception as e:
         if "already exists" in str(e).lower():
@@ -92,6 +125,7 @@ async def delete_domain(domain: str, repo: MongoRepository = Depends(get_reposit
 @router.post("/{domain}/check", response_model=dict)
 async def check_domain(
     domain: str,
+    full_scan: bool = Query(False, description="Ignore the crt.sh high-water mark"),
     service: MonitoringService = Depends(get_monitoring_service),
     repo: MongoRepository = Depends(get_repository),
 ):
@@ -101,7 +135,7 @@ async def check_domain(
         if not exists:
             raise HTTPException(status_code=404, detail="Domain not found")
 
-        new_count = await service.monitor_domain(domain)
+        new_count = await service.monitor_domain(domain, full_scan=full_scan)
         return {
             "message": "Monitoring check completed",
             "domain": domain,
@@ -1,21 +1,31 @@
 import logging
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from src.api.dependencies import get_monitoring_service, get_repository
 from src.db.repository import MongoRepository
-from src.models.domain import MonitoringStats
+from src.models.domain import DailyStats, MonitoringStats
+from src.services.bulk_resolver import bulk_resolver
+from src.services.cert_cache import certificate_cache
+from src.services.discovery_cache import discovery_cache
+from src.services.dns_resolver import dns_resolver
 from src.services.monitoring_service import MonitoringService
+from src.services.rate_limiter import rate_limiter
+from src.services.takeover import takeover_detector
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/monitoring", tags=["monitoring"])
 
 
 @router.post("/check-all", response_model=dict)
-async def monitor_all(service: MonitoringService = Depends(get_monitoring_service)):
+async def monitor_all(
+    full_scan: bool = Query(False, description="Ignore the crt.sh high-water marks"),
+    service: MonitoringService = Depends(get_monitoring_service),
+):
     """Manually trigger monitoring for all domains"""
     try:
-        result = await service.monitor_all_domains()
+        result = await service.monitor_all_domains(full_scan=full_scan)
         return result
     except Exception as e:
         logger.error(f"Error in monitor_all: {e}")
@@ -31,7 +41,103 @@ async def get_stats(repo: MongoRepository = Depends(get_repository)):
             total_domains=stats.get("total_domains", 0),
             total_subdomains=stats.get("total_subdomains", 0),
             last_check=stats.get("last_updated"),
+            new_subdomains_found=stats.get("new_today", 0),
         )
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
         return MonitoringStats(total_domains=0, total_subdomains=0)
+
+
+@router.get("/stats/daily", response_model=List[DailyStats])
+async def get_daily_stats(
+    days: int = Query(30, ge=1, le=366, description="Days to return, ending today"),
+    domain: Optional[str] = Query(None, description="Only count this domain"),
+    repo: MongoRepository = Depends(get_repository),
+):
+    """Get new subdomains per day, for all domains or one"""
+    try:
+        return await repo.get_daily_stats(
+            days=days, domain=domain.lower() if domain else None
+        )
+    except Exception as e:
+        logger.error(f"Error getting daily stats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get daily stats")
+
+
+@router.post("/stats/reconcile", response_model=dict)
+async def reconcile_stats(repo: MongoRepository = Depends(get_repository)):
+    """Recompute the statistics counters from the stored data"""
+    try:
+        return await repo.reconcile_stats()
+    except Exception as e:
+        logger.error(f"Error reconciling stats: {e}")
+        return {"error": str(e)}
+
+
+@router.get("/cache", response_model=dict)
+async def get_cache_stats():
+    """Get discovery, certificate and DNS cache hit/miss statistics"""
+    return {
+        "discovery": discovery_cache.stats(),
+        "certificates": certificate_cache.stats(),
+        "dns": dns_resolver.stats(),
+    }
+
+
+@router.delete("/cache", response_model=dict)
+async def clear_cache():
+    """Drop all cached discovery results, parsed certificates and DNS answers"""
+    await discovery_cache.invalidate()
+    certificate_cache.clear()
+    dns_resolver.cache.clear()
+    dns_resolver.wildcards.clear()
+    return {"message": "Discovery cache cleared"}
+
+
+@router.get("/rate-limits", response_model=dict)
+async def get_rate_limits():
+    """Get per-source rate limiter state and wait times"""
+    return rate_limiter.stats()
+
+
+@router.get("/resolvers", response_model=dict)
+async def get_resolvers():
+    """Get per-nameserver latency, error rate and ejection state"""
+    return dns_resolver.nameservers.stats()
+
+
+@router.get("/resolvers/bulk", response_model=dict)
+async def get_bulk_resolver():
+    """Get bulk resolution socket, retransmit and stray answer counters"""
+    return bulk_resolver.stats()
+
+
+@router.get("/takeovers", response_model=dict)
+async def get_takeover_stats():
+    """Get takeover fingerprint table size and detection counters"""
+    return takeover_detector.stats()
+
+
+@router.post("/dns/recheck", response_model=dict)
+async def recheck_dns(service: MonitoringService = Depends(get_monitoring_service)):
+    """Re-resolve stored subdomains whose answers have expired"""
+    try:
+        return await service.recheck_dns()
+    except Exception as e:
+        logger.error(f"Error in recheck_dns: {e}")
+        return {"error": str(e)}
+
+
+@router.get("/dns/{subdomain}", response_model=dict)
+async def get_dns_history(
+    subdomain: str, repo: MongoRepository = Depends(get_repository)
+):
+    """Get the current answers of a subdomain and when they changed"""
+    try:
+        record = await repo.find_dns_record(subdomain.lower())
+    except Exception as e:
+        logger.error(f"Error getting DNS history for {subdomain}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get DNS history")
+    if not record:
+        raise HTTPException(status_code=404, detail="Subdomain not found")
+    return record
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -18,9 +18,82 @@ class Settings(BaseSettings):
     DB_USER: Optional[str] = None
     DB_PWD: Optional[str] = None
     COLLECTION_NAME: str = "domains"
+    SUBDOMAINS_COLLECTION_NAME: str = "subdomains"
+    # Subdomains upserted per bulk write
+    SUBDOMAIN_WRITE_BATCH: int = 1000
+    # Documents fetched per round trip by streaming reads
+    DB_READ_BATCH: int = 1000
+    # Per-domain hashes of the stored subdomains; monitoring only writes
+    # discovered names missing from them
+    SUBDOMAIN_FINGERPRINTS: bool = True
+    FINGERPRINTS_COLLECTION_NAME: str = "subdomain_fingerprints"
+    # Stored names rediscovered by monitoring have last_seen moved at most
+    # this often instead of on every run
+    LAST_SEEN_INTERVAL_HOURS: int = 24
+    # Materialized counters: totals and new subdomains per day and domain,
+    # recomputed from the collections every STATS_RECONCILE_INTERVAL_MINUTES
+    # (0 disables the job)
+    STATS_COLLECTION_NAME: str = "stats"
+    DAILY_STATS_COLLECTION_NAME: str = "daily_stats"
+    STATS_RECONCILE_INTERVAL_MINUTES: int = 1440
+    # Schema version of the database, so migrations run once
+    META_COLLECTION_NAME: str = "meta"
 
     # DNS Resolvers
     DNS_RESOLVERS: List[str] = ["1.1.1.1", "1.0.0.1", "8.8.8.8", "8.8.4.4"]
+    DNS_PORT: int = 53
+    # Maximum DNS lookups in flight at once
+    DNS_CONCURRENCY: int = 500
+    # Record types looked up per name (A, AAAA, CNAME, MX, TXT), concurrently
+    DNS_RECORD_TYPES: List[str] = ["A", "AAAA", "CNAME"]
+    # Deadline for all record types of one name
+    DNS_NAME_TIMEOUT: float = 5.0
+    # Nameservers tried per lookup on timeouts and server failures
+    DNS_MAX_ATTEMPTS: int = 2
+    # Nameserver health: latency EWMA weight, ejection after consecutive failures
+    DNS_LATENCY_ALPHA: float = 0.2
+    DNS_EJECT_FAILURES: int = 3
+    DNS_EJECT_SECONDS: float = 60.0
+    # Bulk mode over shared UDP sockets for runs of at least DNS_BULK_THRESHOLD
+    # names (0 disables it), with DNS_BULK_WINDOW queries outstanding
+    DNS_BULK_THRESHOLD: int = 5000
+    DNS_BULK_SOCKETS: int = 4
+    DNS_BULK_WINDOW: int = 5000
+    # Answer cache; positive answers honor the record TTL up to DNS_CACHE_MAX_TTL
+    DNS_CACHE_ENABLED: bool = True
+    DNS_CACHE_MAX_ENTRIES: int = 100000
+    DNS_CACHE_MAX_TTL: int = 86400
+    # Seconds to cache NXDOMAIN and NoAnswer results
+    DNS_NEGATIVE_TTL: int = 300
+    # Most new subdomains resolved per domain and run; the rest are reported
+    DNS_RESOLVE_BUDGET: int = 50000
+    # Probe parent zones with random labels to spot wildcard records
+    WILDCARD_DETECTION: bool = True
+    WILDCARD_PROBES: int = 2
+    WILDCARD_TTL: int = 3600
+    # Resolved records per notification message
+    NOTIFY_BATCH_SIZE: int = 50
+    # Most messages per domain and run, keeping webhooks under their rate
+    # limits; names that do not fit are reported as a count
+    NOTIFY_MAX_MESSAGES: int = 5
+
+    # DNS history: answers per subdomain, written only when they change
+    DNS_HISTORY_ENABLED: bool = True
+    DNS_HISTORY_COLLECTION: str = "dns_records"
+    # Previous answers kept per subdomain
+    DNS_HISTORY_MAX_CHANGES: int = 20
+    # Names compared and written per database round trip
+    DNS_HISTORY_BATCH_SIZE: int = 1000
+    # Re-resolution of stored names with expired TTLs (0 disables the job)
+    DNS_RECHECK_INTERVAL_MINUTES: int = 60
+    DNS_RECHECK_LIMIT: int = 50000
+
+    # Dangling CNAME takeover detection; fingerprints are a JSON list of
+    # {service, cname: [suffixes], http} entries, the bundled table by default
+    TAKEOVER_DETECTION: bool = True
+    TAKEOVER_FINGERPRINTS_PATH: Optional[str] = None
+    TAKEOVER_CONCURRENCY: int = 20
+    TAKEOVER_HTTP_TIMEOUT: float = 10.0
 
     # Notifications
     SLACK_WEBHOOK: Optional[str] = None
@@ -36,6 +109,51 @@ class Settings(BaseSettings):
     MONITOR_INTERVAL_MINUTES: int = 60
     MAX_WORKERS: int = 10
     DNS_TIMEOUT: int = 5
+    # Domains read per keyset batch during a monitoring cycle
+    MONITOR_BATCH_SIZE: int = 100
+    # Write-behind: results stored per bulk flush, and the longest they wait
+    WRITE_BEHIND_MAX_DOMAINS: int = 100
+    WRITE_BEHIND_MAX_DELAY: float = 5.0
+
+    # HTTP client
+    HTTP_TIMEOUT: float = 60.0
+    HTTP_HTTP2: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_MAX_RETRIES: int = 3
+    HTTP_BACKOFF_BASE: float = 1.0
+    HTTP_BACKOFF_MAX: float = 60.0
+
+    # Rate limiting (requests/sec and burst per discovery source)
+    DEFAULT_RATE_LIMIT: float = 2.0
+    DEFAULT_BURST: int = 5
+    SOURCE_RATE_LIMITS: Dict[str, float] = {"crtsh": 1.0, "threatminer": 0.16}
+    SOURCE_BURSTS: Dict[str, int] = {"crtsh": 5, "threatminer": 10}
+    # Longest a discovery request queues for a token; a source whose wait
+    # would be longer, or outlast its timeout, is skipped as rate_limited
+    RATE_LIMIT_MAX_WAIT: float = 10.0
+
+    # Discovery
+    CRTSH_BASE_URL: str = "https://crt.sh"
+    THREATMINER_BASE_URL: str = "https://api.threatminer.org"
+    DISCOVERY_SOURCES: List[str] = ["crtsh", "threatminer"]
+    DISCOVERY_TIMEOUT: float = 120.0
+    DISCOVERY_SOURCE_TIMEOUTS: Dict[str, float] = {"threatminer": 90.0}
+    DISCOVERY_CACHE_ENABLED: bool = True
+    DISCOVERY_CACHE_TTL: int = 1800
+    DISCOVERY_CACHE_MAX_ENTRIES: int = 10000
+    DISCOVERY_CACHE_PATH: str = ".cache/discovery.sqlite3"
+    NORMALIZE_BATCH_SIZE: int = 10000
+    CERT_CACHE_ENABLED: bool = True
+    CERT_CACHE_MAX_ENTRIES: int = 500000
+    # Names cached across all entries, about 100 bytes each (~100MB)
+    CERT_CACHE_MAX_NAMES: int = 1000000
+    CERT_CACHE_TTL: int = 86400
+    CRTSH_STREAM: bool = True
+    CRTSH_CHUNK_SIZE: int = 65536
+    CRTSH_INCREMENTAL: bool = True
+    CRTSH_FULL_RESCAN_HOURS: int = 24
 
     # Scheduler
     ENABLE_SCHEDULER: bool = False
@@ -26,3 +26,15 @@ class DatabaseException(SubdomainMonitorException):
     """Raised when database operation fails"""
 
     pass
+
+
+class InvalidCursorException(SubdomainMonitorException):
+    """Raised when a pagination cursor cannot be decoded"""
+
+    pass
+
+
+class RateLimitedException(SubdomainMonitorException):
+    """Raised when a source's rate limit would outlast the caller's deadline"""
+
+    pass
@@ -0,0 +1,73 @@
+import sys
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from heapq import merge
+from typing import Iterable, List, Optional
+
+# Fingerprints are stored in one document, well under its 16MB limit
+MAX_FINGERPRINT_NAMES = 1_500_000
+
+
+def name_hash(name: str) -> int:
+    """64-bit hash of a subdomain name"""
+    return int.from_bytes(blake2b(name.encode(), digest_size=8).digest(), "little")
+
+
+class SubdomainFingerprint:
+    """
+    Sorted 64-bit hashes of the subdomains stored for a domain
+
+    Eight bytes per name instead of the name itself, enough to tell which
+    discovered names are certainly stored already. A name whose hash is
+    missing is a candidate and must be confirmed against the subdomains
+    collection; a name whose hash is present is treated as stored, wrongly
+    only on a 64-bit collision. The fingerprint must therefore only ever
+    hold hashes of stored names; names missing from it merely cost a
+    redundant write.
+    """
+
+    __slots__ = ("_hashes",)
+
+    def __init__(self, hashes: Optional[array] = None):
+        self._hashes = hashes if hashes is not None else array("Q")
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "SubdomainFingerprint":
+        return cls(array("Q", sorted({name_hash(name) for name in names})))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SubdomainFingerprint":
+        hashes = array("Q")
+        hashes.frombytes(data)
+        if sys.byteorder != "little":
+            hashes.byteswap()
+        return cls(hashes)
+
+    def to_bytes(self) -> bytes:
+        if sys.byteorder == "little":
+            return self._hashes.tobytes()
+        hashes = array("Q", self._hashes)
+        hashes.byteswap()
+        return hashes.tobytes()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def _has(self, value: int) -> bool:
+        index = bisect_left(self._hashes, value)
+        return index < len(self._hashes) and self._hashes[index] == value
+
+    def __contains__(self, name: str) -> bool:
+        return self._has(name_hash(name))
+
+    def missing(self, names: Iterable[str]) -> List[str]:
+        """Names that are not stored yet, or may not be"""
+        return [name for name in names if not self._has(name_hash(name))]
+
+    def add(self, names: Iterable[str]) -> "SubdomainFingerprint":
+        """A new fingerprint that also holds names"""
+        new = {value for value in map(name_hash, names) if not self._has(value)}
+        if not new:
+            return self
+        return SubdomainFingerprint(array("Q", merge(self._hashes, sorted(new))))
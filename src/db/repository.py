@@ -1,14 +1,65 @@
+import base64
+import binascii
+import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import ASCENDING, DeleteOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError
 
 from src.core.config import settings
-from src.core.exceptions import DatabaseException, DomainNotFoundException
+from src.core.exceptions import (
+    DatabaseException,
+    DomainNotFoundException,
+    InvalidCursorException,
+)
+from src.db.fingerprint import MAX_FINGERPRINT_NAMES, SubdomainFingerprint
 
 logger = logging.getLogger(__name__)
 
+# Domain fields returned by listings, leaving out anything that can grow
+LIST_PROJECTION = {
+    "domain": 1,
+    "subdomain_count": 1,
+    "last_new_found": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "notify_slack": 1,
+    "notify_telegram": 1,
+}
+
+# _id of the stats document holding the totals; per-day totals are "day:<day>"
+GLOBAL_STATS = "global"
+
+# Layout of the stored data; connect migrates older databases up to it once
+SCHEMA_VERSION = 1
+
+
+def _day(when: datetime) -> str:
+    """Day key of the per-day counters"""
+    return when.strftime("%Y-%m-%d")
+
+
+def encode_cursor(domain: str) -> str:
+    """Opaque continuation token for the page after domain"""
+    token = json.dumps({"after": domain}).encode()
+    return base64.urlsafe_b64encode(token).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> str:
+    """Domain a continuation token continues after"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        after = json.loads(raw)["after"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorException(f"Invalid cursor: {e}")
+    if not isinstance(after, str):
+        raise InvalidCursorException("Invalid cursor")
+    return after
+
 
 class MongoRepository:
     """Async MongoDB repository for domain operations"""
@@ -16,6 +67,12 @@ class MongoRepository:
     def __init__(self):
         self.client: Optional[AsyncIOMotorClient] = None
         self.collection: Optional[AsyncIOMotorCollection] = None
+        self.subdomain_collection: Optional[AsyncIOMotorCollection] = None
+        self.dns_collection: Optional[AsyncIOMotorCollection] = None
+        self.stats_collection: Optional[AsyncIOMotorCollection] = None
+        self.daily_collection: Optional[AsyncIOMotorCollection] = None
+        self.fingerprint_collection: Optional[AsyncIOMotorCollection] = None
+        self.meta_collection: Optional[AsyncIOMotorCollection] = None
 
     async def connect(self):
         """Connect to MongoDB"""
@@ -28,7 +85,44 @@ class MongoRepository:
             self.collection = self.client[settings.DB_NAME][settings.COLLECTION_NAME]
             # Create index on domain field
             await self.collection.create_index("domain", unique=True)
+            # One document per (domain, subdomain)
+            self.subdomain_collection = self.client[settings.DB_NAME][
+                settings.SUBDOMAINS_COLLECTION_NAME
+            ]
+            await self.subdomain_collection.create_index(
+                [("domain", ASCENDING), ("subdomain", ASCENDING)], unique=True
+            )
+            self.dns_collection = self.client[settings.DB_NAME][
+                settings.DNS_HISTORY_COLLECTION
+            ]
+            await self.dns_collection.create_index("subdomain", unique=True)
+            await self.dns_collection.create_index("domain")
+            await self.dns_collection.create_index("expires_at")
+            self.fingerprint_collection = self.client[settings.DB_NAME][
+                settings.FINGERPRINTS_COLLECTION_NAME
+            ]
+            await self.fingerprint_collection.create_index("domain", unique=True)
+            # Materialized counters, see get_stats and reconcile_stats
+            self.stats_collection = self.client[settings.DB_NAME][
+                settings.STATS_COLLECTION_NAME
+            ]
+            await self.stats_collection.create_index("day", sparse=True)
+            self.daily_collection = self.client[settings.DB_NAME][
+                settings.DAILY_STATS_COLLECTION_NAME
+            ]
+            await self.daily_collection.create_index(
+                [("domain", ASCENDING), ("day", ASCENDING)], unique=True
+            )
+            await self.daily_collection.create_index("day")
+            self.meta_collection = self.client[settings.DB_NAME][
+                settings.META_COLLECTION_NAME
+            ]
             logger.info("Connected to MongoDB successfully")
+            migrated = await self.migrate()
+            if migrated or not await self.stats_collection.find_one(
+                {"_id": GLOBAL_STATS}
+            ):
+                await self.reconcile_stats()
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise DatabaseException(f"Database connection failed: {e}")
@@ -42,16 +136,90 @@ class MongoRepository:
     async def find_all(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
         """Get all domains with pagination"""
         try:
-            cursor = self.collection.find().skip(skip).limit(limit)
+            cursor = self.collection.find({}, LIST_PROJECTION).skip(skip).limit(limit)
             return await cursor.to_list(length=limit)
         except Exception as e:
             logger.error(f"Error finding all domains: {e}")
             raise DatabaseException(f"Failed to retrieve domains: {e}")
 
+    async def _page(
+        self,
+        after: Optional[str],
+        limit: int,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Up to limit domains following after, in domain order"""
+        query = {} if after is None else {"domain": {"$gt": after}}
+        cursor = (
+            self.collection.find(query, projection or LIST_PROJECTION)
+            .sort("domain", ASCENDING)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+    async def find_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of domains in domain order
+
+        Pages are keyed on the unique domain index: a page starts after the
+        domain encoded in cursor, so any page is one index range read and
+        inserts or deletes never shift later pages. Returns the page and the
+        cursor of the next one, None after the last page.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        try:
+            docs = await self._page(after, limit + 1, projection)
+        except Exception as e:
+            logger.error(f"Error finding page of domains: {e}")
+            raise DatabaseException(f"Failed to retrieve domains: {e}")
+        if len(docs) <= limit:
+            return docs, None
+        return docs[:limit], encode_cursor(docs[limit - 1]["domain"])
+
+    async def iter_domain_batches(
+        self,
+        batch_size: Optional[int] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream all domains in domain order, batch_size (DB_READ_BATCH) at a time
+
+        Each batch is its own keyset query, so no server cursor is held open
+        while the caller works through a batch.
+        """
+        batch_size = max(batch_size or settings.DB_READ_BATCH, 1)
+        after = None
+        while True:
+            try:
+                docs = await self._page(after, batch_size, projection)
+            except Exception as e:
+                logger.error(f"Error streaming domains: {e}")
+                raise DatabaseException(f"Failed to retrieve domains: {e}")
+            if docs:
+                yield docs
+            if len(docs) < batch_size:
+                return
+            after = docs[-1]["domain"]
+
+    async def iter_domains(
+        self,
+        batch_size: Optional[int] = None,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream all domains in domain order"""
+        async for docs in self.iter_domain_batches(batch_size, projection):
+            for doc in docs:
+                yield doc
+
     async def find_one(self, domain: str) -> Optional[Dict[str, Any]]:
         """Find domain by name"""
         try:
-            return await self.collection.find_one({"domain": domain})
+            return await self.collection.find_one({"domain": domain}, {"subdomains": 0})
         except Exception as e:
             logger.error(f"Error finding domain {domain}: {e}")
             raise DatabaseException(f"Failed to find domain: {e}")
@@ -66,79 +234,767 @@ class MongoRepository:
             return False
 
     async def count(self) -> int:
-        """Count total domains"""
+        """Count total domains from collection metadata, without a scan"""
         try:
-            return await self.collection.count_documents({})
+            return await self.collection.estimated_document_count()
         except Exception as e:
             logger.error(f"Error counting domains: {e}")
             return 0
 
     async def add_domain(self, domain_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Add new domain"""
+        """Add new domain; its subdomains go to the subdomains collection"""
         try:
-            domain_data["created_at"] = datetime.utcnow()
-            domain_data["updated_at"] = datetime.utcnow()
+            subdomains = domain_data.pop("subdomains", [])
+            now = datetime.utcnow()
+            domain_data["created_at"] = now
+            domain_data["updated_at"] = now
+            domain_data["subdomain_count"] = 0
+            domain_data["last_new_found"] = None
             result = await self.collection.insert_one(domain_data)
             domain_data["_id"] = result.inserted_id
+            domain = domain_data["domain"]
+            new = await self._upsert_subdomains(
+                [(domain, name) for name in subdomains], now, now
+            )
+            await self._count_new(domain, len(new), now)
+            await self._bump_stats(now, domains=1, new={domain: len(new)})
+            if settings.SUBDOMAIN_FINGERPRINTS and subdomains:
+                await self.save_fingerprints(
+                    {domain: SubdomainFingerprint.from_names(subdomains)}
+                )
+            if new:
+                domain_data["subdomain_count"] = len(new)
+                domain_data["last_new_found"] = now
+            domain_data["subdomains"] = subdomains
             return domain_data
         except Exception as e:
             logger.error(f"Error adding domain: {e}")
             raise DatabaseException(f"Failed to add domain: {e}")
 
-    async def update_subdomains(self, domain: str, new_subdomains: List[str]) -> bool:
-        """Add new subdomains to existing domain"""
+    async def _upsert_subdomains(
+        self,
+        subdomains: List[Tuple[str, str]],
+        first_seen: datetime,
+        last_seen: datetime,
+    ) -> List[Tuple[str, str]]:
+        """
+        Upsert (domain, subdomain) pairs in unordered bulk writes
+
+        Returns the pairs that were inserted rather than already stored.
+        """
+        inserted: List[Tuple[str, str]] = []
+        batch_size = max(settings.SUBDOMAIN_WRITE_BATCH, 1)
+        for start in range(0, len(subdomains), batch_size):
+            chunk = subdomains[start : start + batch_size]
+            operations = [
+                UpdateOne(
+                    {"domain": domain, "subdomain": name},
+                    {
+                        "$setOnInsert": {"first_seen": first_seen},
+                        "$max": {"last_seen": last_seen},
+                    },
+                    upsert=True,
+                )
+                for domain, name in chunk
+            ]
+            try:
+                result = await self.subdomain_collection.bulk_write(
+                    operations, ordered=False
+                )
+                upserted = result.upserted_ids
+            except BulkWriteError as e:
+                # A concurrent writer inserted some of the names first
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+                upserted = {
+                    item["index"]: item["_id"] for item in e.details["upserted"]
+                }
+            inserted.extend(chunk[index] for index in sorted(upserted))
+        return inserted
+
+    async def _count_new(self, domain: str, count: int, now: datetime):
+        """
+        Add inserted subdomains to the domain's denormalized counters
+
+        The subdomains and the counters live in different collections, so
+        this is a second write after the upsert rather than part of it: a
+        crash in between leaves subdomain_count short until reconcile_stats
+        recomputes it.
+        """
+        if not count:
+            return
+        await self.collection.update_one(
+            {"domain": domain},
+            {
+                "$inc": {"subdomain_count": count},
+                "$set": {"updated_at": now, "last_new_found": now},
+            },
+        )
+
+    async def _bump_stats(
+        self, now: datetime, domains: int = 0, new: Optional[Dict[str, int]] = None
+    ):
+        """
+        Add domains and new subdomains to the materialized counters
+
+        The totals and today's count share one bulk write, the per-domain
+        counts of today another. Counters are best effort: a failed update
+        is logged and left for reconcile_stats to correct.
+        """
+        new = {domain: count for domain, count in (new or {}).items() if count}
+        total = sum(new.values())
+        if not domains and not total:
+            return
+        day = _day(now)
         try:
-            result = await self.collection.update_one(
-                {"domain": domain},
-                {
-                    "$addToSet": {"subdomains": {"$each": new_subdomains}},
-                    "$set": {"updated_at": datetime.utcnow()},
-                },
+            operations = [
+                UpdateOne(
+                    {"_id": GLOBAL_STATS},
+                    {
+                        "$inc": {"total_domains": domains, "total_subdomains": total},
+                        "$max": {"last_updated": now},
+                    },
+                    upsert=True,
+                )
+            ]
+            if total:
+                operations.append(
+                    UpdateOne(
+                        {"_id": f"day:{day}"},
+                        {"$inc": {"new_subdomains": total}, "$set": {"day": day}},
+                        upsert=True,
+                    )
+                )
+            await self.stats_collection.bulk_write(operations, ordered=False)
+            if new:
+                await self.daily_collection.bulk_write(
+                    [
+                        UpdateOne(
+                            {"domain": domain, "day": day},
+                            {"$inc": {"new_subdomains": count}},
+                            upsert=True,
+                        )
+                        for domain, count in new.items()
+                    ],
+                    ordered=False,
+                )
+        except Exception as e:
+            logger.warning(f"Failed to update stats, left for reconcile: {e}")
+
+    async def _drop_domain_stats(self, domain: str, deleted: bool, subdomains: int):
+        """Take a deleted domain and everything it counted out of the counters"""
+        try:
+            days = [
+                doc
+                async for doc in self.daily_collection.find(
+                    {"domain": domain}, {"day": 1, "new_subdomains": 1}
+                )
+            ]
+            operations = [
+                UpdateOne(
+                    {"_id": f"day:{doc['day']}"},
+                    {"$inc": {"new_subdomains": -doc.get("new_subdomains", 0)}},
+                )
+                for doc in days
+            ]
+            if deleted or subdomains:
+                operations.append(
+                    UpdateOne(
+                        {"_id": GLOBAL_STATS},
+                        {
+                            "$inc": {
+                                "total_domains": -int(deleted),
+                                "total_subdomains": -subdomains,
+                            }
+                        },
+                    )
+                )
+            if operations:
+                await self.stats_collection.bulk_write(operations, ordered=False)
+            if days:
+                await self.daily_collection.delete_many({"domain": domain})
+        except Exception as e:
+            logger.warning(
+                f"Failed to update stats for {domain}, left for reconcile: {e}"
             )
-            return result.modified_count > 0
+
+    async def _touch_subdomains(
+        self, seen: Dict[str, List[str]], last_seen: datetime
+    ) -> bool:
+        """
+        Move last_seen of stored subdomains, per domain, in bulk writes
+
+        Best effort: last_seen is informational, so a failure is logged and
+        reported as False for the caller to retry on a later run.
+        """
+        batch_size = max(settings.SUBDOMAIN_WRITE_BATCH, 1)
+        operations = []
+        for domain, names in seen.items():
+            for start in range(0, len(names), batch_size):
+                operations.append(
+                    UpdateMany(
+                        {
+                            "domain": domain,
+                            "subdomain": {"$in": names[start : start + batch_size]},
+                        },
+                        {"$max": {"last_seen": last_seen}},
+                    )
+                )
+        if not operations:
+            return True
+        try:
+            await self.subdomain_collection.bulk_write(operations, ordered=False)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to update last_seen of {len(seen)} domains: {e}")
+            return False
+
+    async def add_subdomains(
+        self,
+        domain: str,
+        subdomains: List[str],
+        fingerprint: Optional[SubdomainFingerprint] = None,
+        seen: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Record subdomains of a domain as seen now, returning the new ones
+
+        Only the given names are touched, so the cost follows the number of
+        names discovered rather than the number already stored. The domain's
+        subdomain_count grows by the names actually inserted, so concurrent
+        writers of the same names never count them twice; it is updated
+        right after the upsert, not atomically with it (see _count_new). fingerprint, which
+        must hold only stored names and these, is saved once they are stored.
+        seen are stored names discovered again, whose last_seen is moved.
+        """
+        try:
+            now = datetime.utcnow()
+            new = await self._upsert_subdomains(
+                [(domain, name) for name in subdomains], now, now
+            )
+            await self._count_new(domain, len(new), now)
+            await self._bump_stats(now, new={domain: len(new)})
+            if fingerprint is not None:
+                await self.save_fingerprints({domain: fingerprint})
+            if seen and await self._touch_subdomains({domain: seen}, now):
+                await self.collection.update_one(
+                    {"domain": domain}, {"$set": {"last_seen_touched": now}}
+                )
+            return [name for _, name in new]
         except Exception as e:
             logger.error(f"Error updating subdomains for {domain}: {e}")
             raise DatabaseException(f"Failed to update subdomains: {e}")
 
+    async def save_domain_batch(
+        self, diffs: List[Dict[str, Any]]
+    ) -> Dict[str, List[str]]:
+        """
+        Store the monitoring results of many domains in a few bulk writes
+
+        Each diff holds domain, subdomains (the names discovered) and
+        optionally crtsh_last_id, crtsh_full_scan, fingerprint and seen. The
+        subdomains of the whole batch are upserted together, then every
+        domain's counters and crt.sh mark go out in one unordered bulk write,
+        so marks and fingerprints only advance once the subdomains are
+        stored. As in add_subdomains, a crash between the two writes leaves
+        subdomain_count short until reconcile_stats. Stored names listed in seen only have last_seen moved.
+        Returns the new subdomains by domain.
+        """
+        try:
+            now = datetime.utcnow()
+            inserted = await self._upsert_subdomains(
+                [
+                    (diff["domain"], name)
+                    for diff in diffs
+                    for name in diff["subdomains"]
+                ],
+                now,
+                now,
+            )
+            new: Dict[str, List[str]] = defaultdict(list)
+            for domain, name in inserted:
+                new[domain].append(name)
+            seen = {diff["domain"]: diff["seen"] for diff in diffs if diff.get("seen")}
+            touched = await self._touch_subdomains(seen, now)
+
+            operations = []
+            for diff in diffs:
+                fields: Dict[str, Any] = {}
+                update: Dict[str, Any] = {}
+                if diff.get("crtsh_last_id") is not None:
+                    fields["crtsh_last_id"] = diff["crtsh_last_id"]
+                    if diff.get("crtsh_full_scan"):
+                        fields["crtsh_last_full_scan"] = now
+                if touched and diff["domain"] in seen:
+                    fields["last_seen_touched"] = now
+                count = len(new.get(diff["domain"], ()))
+                if count:
+                    update["$inc"] = {"subdomain_count": count}
+                    fields.update(updated_at=now, last_new_found=now)
+                if fields:
+                    update["$set"] = fields
+                    operations.append(UpdateOne({"domain": diff["domain"]}, update))
+            if operations:
+                await self.collection.bulk_write(operations, ordered=False)
+            await self._bump_stats(
+                now, new={domain: len(names) for domain, names in new.items()}
+            )
+            await self.save_fingerprints(
+                {
+                    diff["domain"]: diff["fingerprint"]
+                    for diff in diffs
+                    if diff.get("fingerprint") is not None
+                }
+            )
+            return {diff["domain"]: new.get(diff["domain"], []) for diff in diffs}
+        except Exception as e:
+            logger.error(f"Error saving batch of {len(diffs)} domains: {e}")
+            raise DatabaseException(f"Failed to save domain batch: {e}")
+
+    async def find_fingerprints(
+        self, domains: List[str]
+    ) -> Dict[str, SubdomainFingerprint]:
+        """Stored subdomain fingerprints of many domains, empty when missing"""
+        try:
+            cursor = self.fingerprint_collection.find(
+                {"domain": {"$in": domains}}, {"_id": 0, "domain": 1, "hashes": 1}
+            )
+            found = {
+                doc["domain"]: SubdomainFingerprint.from_bytes(doc["hashes"])
+                async for doc in cursor
+            }
+            return {
+                domain: found.get(domain, SubdomainFingerprint()) for domain in domains
+            }
+        except Exception as e:
+            logger.error(f"Error finding fingerprints of {len(domains)} domains: {e}")
+            raise DatabaseException(f"Failed to find fingerprints: {e}")
+
+    async def find_fingerprint(self, domain: str) -> SubdomainFingerprint:
+        """Stored subdomain fingerprint of a domain, empty when missing"""
+        return (await self.find_fingerprints([domain]))[domain]
+
+    async def save_fingerprints(self, fingerprints: Dict[str, SubdomainFingerprint]):
+        """
+        Replace the subdomain fingerprints of domains in one bulk write
+
+        Fingerprints too large for a document are dropped, and those domains
+        fall back to writing every discovered name. Like a failed write, a
+        lost concurrent update only drops hashes, which costs redundant
+        writes but never a missed new subdomain, so failures are only logged.
+        """
+        now = datetime.utcnow()
+        operations = []
+        for domain, fingerprint in fingerprints.items():
+            if len(fingerprint) > MAX_FINGERPRINT_NAMES:
+                logger.warning(f"Fingerprint of {domain} too large, not stored")
+                operations.append(DeleteOne({"domain": domain}))
+                continue
+            operations.append(
+                UpdateOne(
+                    {"domain": domain},
+                    {
+                        "$set": {
+                            "hashes": fingerprint.to_bytes(),
+                            "count": len(fingerprint),
+                            "updated_at": now,
+                        }
+                    },
+                    upsert=True,
+                )
+            )
+        if not operations:
+            return
+        try:
+            await self.fingerprint_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.warning(f"Failed to save {len(operations)} fingerprints: {e}")
+
+    async def get_subdomains(self, domain: Optional[str] = None) -> List[str]:
+        """Get the subdomains of a domain, or of all domains, sorted"""
+        return [name async for name in self.iter_subdomains(domain)]
+
+    async def iter_subdomains(
+        self, domain: Optional[str] = None, batch_size: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the subdomains of a domain, or of all domains, sorted
+
+        Names arrive batch_size (DB_READ_BATCH) per round trip along the
+        (domain, subdomain) index, never all at once.
+        """
+        try:
+            cursor = (
+                self.subdomain_collection.find(
+                    {"domain": domain} if domain is not None else {},
+                    {"_id": 0, "subdomain": 1},
+                )
+                .sort([("domain", ASCENDING), ("subdomain", ASCENDING)])
+                .batch_size(max(batch_size or settings.DB_READ_BATCH, 1))
+            )
+            async for doc in cursor:
+                yield doc["subdomain"]
+        except Exception as e:
+            logger.error(f"Error getting subdomains for {domain}: {e}")
+            raise DatabaseException(f"Failed to get subdomains: {e}")
+
+    async def migrate(self) -> int:
+        """
+        Bring a database stored by an earlier version up to SCHEMA_VERSION
+
+        The version reached is stored, so later connections skip the
+        migration scans. Returns the domains migrated.
+        """
+        schema = await self.meta_collection.find_one({"_id": "schema"}) or {}
+        if schema.get("version", 0) >= SCHEMA_VERSION:
+            return 0
+        migrated = await self.migrate_embedded_subdomains()
+        await self.meta_collection.update_one(
+            {"_id": "schema"},
+            {"$set": {"version": SCHEMA_VERSION, "migrated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        logger.info(f"Database schema migrated to version {SCHEMA_VERSION}")
+        return migrated
+
+    async def migrate_embedded_subdomains(self) -> int:
+        """
+        Move subdomains embedded in domain documents to their own collection
+
+        Earlier versions kept every subdomain in a subdomains array on the
+        domain document. Each array is copied with its domain's created_at
+        and updated_at as first/last seen, then removed, so an interrupted
+        migration resumes with the domains left. Returns the domains migrated.
+        """
+        migrated = 0
+        try:
+            cursor = self.collection.find(
+                {"subdomains": {"$exists": True}},
+                {"domain": 1, "subdomains": 1, "created_at": 1, "updated_at": 1},
+            )
+            async for doc in cursor:
+                now = datetime.utcnow()
+                subdomains = doc.get("subdomains") or []
+                await self._upsert_subdomains(
+                    [(doc["domain"], name) for name in subdomains],
+                    doc.get("created_at") or now,
+                    doc.get("updated_at") or now,
+                )
+                await self.collection.update_one(
+                    {"_id": doc["_id"]}, {"$unset": {"subdomains": ""}}
+                )
+                await self._recount(doc["domain"])
+                migrated += 1
+                logger.info(
+                    f"Migrated {len(subdomains)} embedded subdomains of {doc['domain']}"
+                )
+
+            # Domains stored before the counters existed
+            cursor = self.collection.find(
+                {"subdomain_count": {"$exists": False}}, {"domain": 1}
+            )
+            async for doc in cursor:
+                await self._recount(doc["domain"])
+        except Exception as e:
+            logger.error(f"Error migrating embedded subdomains: {e}")
+            raise DatabaseException(f"Failed to migrate subdomains: {e}")
+        return migrated
+
+    async def _recount(self, domain: str):
+        """Set a domain's subdomain_count from the subdomains collection"""
+        count = await self.subdomain_collection.count_documents({"domain": domain})
+        await self.collection.update_one(
+            {"domain": domain}, {"$set": {"subdomain_count": count}}
+        )
+
+    async def update_crtsh_mark(
+        self, domain: str, last_id: int, full_scan: bool = False
+    ) -> bool:
+        """Persist the crt.sh high-water mark for a domain"""
+        try:
+            fields = {"crtsh_last_id": last_id}
+            if full_scan:
+                fields["crtsh_last_full_scan"] = datetime.utcnow()
+            result = await self.collection.update_one(
+                {"domain": domain}, {"$set": fields}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.error(f"Error updating crt.sh mark for {domain}: {e}")
+            raise DatabaseException(f"Failed to update crt.sh mark: {e}")
+
     async def delete_domain(self, domain: str) -> bool:
         """Delete domain"""
         try:
             result = await self.collection.delete_one({"domain": domain})
-            return result.deleted_count > 0
+            removed = await self.subdomain_collection.delete_many({"domain": domain})
+            await self.dns_collection.delete_many({"domain": domain})
+            await self.fingerprint_collection.delete_one({"domain": domain})
+            deleted = result.deleted_count > 0
+            await self._drop_domain_stats(domain, deleted, removed.deleted_count)
+            return deleted
         except Exception as e:
             logger.error(f"Error deleting domain {domain}: {e}")
             raise DatabaseException(f"Failed to delete domain: {e}")
 
+    async def find_dns_record(self, subdomain: str) -> Optional[Dict[str, Any]]:
+        """Get the stored answers and change history of a subdomain"""
+        try:
+            return await self.dns_collection.find_one(
+                {"subdomain": subdomain}, {"_id": 0}
+            )
+        except Exception as e:
+            logger.error(f"Error finding DNS record for {subdomain}: {e}")
+            raise DatabaseException(f"Failed to find DNS record: {e}")
+
+    async def find_dns_records(
+        self, subdomains: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get the current answers of many subdomains in one query"""
+        try:
+            cursor = self.dns_collection.find(
+                {"subdomain": {"$in": subdomains}},
+                {"_id": 0, "subdomain": 1, "domain": 1, "records": 1, "wildcard": 1},
+            )
+            return {doc["subdomain"]: doc async for doc in cursor}
+        except Exception as e:
+            logger.error(f"Error finding DNS records: {e}")
+            raise DatabaseException(f"Failed to find DNS records: {e}")
+
+    async def save_dns_records(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Store new or changed answers in one unordered bulk write
+
+        Each record holds subdomain, domain, records, wildcard and expires_at,
+        plus previous (the stored records and wildcard flag) when it replaces
+        an existing entry; the previous answer is appended to a capped history.
+        A record holding only subdomain and expires_at moves the expiry of an
+        unchanged entry and nothing else.
+        """
+        if not records:
+            return 0
+        now = datetime.utcnow()
+        operations = []
+        for record in records:
+            if "records" not in record:
+                operations.append(
+                    UpdateOne(
+                        {"subdomain": record["subdomain"]},
+                        {"$set": {"expires_at": record["expires_at"]}},
+                    )
+                )
+                continue
+            update: Dict[str, Any] = {
+                "$set": {
+                    "records": record["records"],
+                    "wildcard": record["wildcard"],
+                    "expires_at": record["expires_at"],
+                    "last_changed": now,
+                },
+                "$setOnInsert": {"domain": record["domain"], "first_seen": now},
+            }
+            previous = record.get("previous")
+            if previous is not None:
+                update["$push"] = {
+                    "history": {
+                        "$each": [{**previous, "until": now}],
+                        "$slice": -settings.DNS_HISTORY_MAX_CHANGES,
+                    }
+                }
+            operations.append(
+                UpdateOne({"subdomain": record["subdomain"]}, update, upsert=True)
+            )
+        try:
+            result = await self.dns_collection.bulk_write(operations, ordered=False)
+            return result.upserted_count + result.modified_count
+        except Exception as e:
+            logger.error(f"Error saving DNS records: {e}")
+            raise DatabaseException(f"Failed to save DNS records: {e}")
+
+    async def due_dns_records(self, now: datetime) -> AsyncIterator[Dict[str, Any]]:
+        """Stream subdomains whose answers expired by now, oldest first"""
+        try:
+            cursor = self.dns_collection.find(
+                {"expires_at": {"$lte": now}},
+                {"_id": 0, "subdomain": 1, "domain": 1},
+            ).sort("expires_at", ASCENDING)
+            async for doc in cursor:
+                yield doc
+        except Exception as e:
+            logger.error(f"Error finding due DNS records: {e}")
+            raise DatabaseException(f"Failed to find due DNS records: {e}")
+
     async def get_all_domains_list(self) -> List[str]:
         """Get list of all domain names"""
+        return [
+            doc["domain"]
+            async for doc in self.iter_domains(projection={"domain": 1, "_id": 0})
+        ]
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get monitoring statistics from the materialized counters"""
         try:
-            cursor = self.collection.find({}, {"domain": 1, "_id": 0})
-            docs = await cursor.to_list(length=None)
-            return [doc["domain"] for doc in docs]
+            today = f"day:{_day(datetime.utcnow())}"
+            docs = {
+                doc["_id"]: doc
+                async for doc in self.stats_collection.find(
+                    {"_id": {"$in": [GLOBAL_STATS, today]}}
+                )
+            }
+            totals = docs.get(GLOBAL_STATS, {})
+            return {
+                "total_domains": totals.get("total_domains", 0),
+                "total_subdomains": totals.get("total_subdomains", 0),
+                "last_updated": totals.get("last_updated"),
+                "new_today": docs.get(today, {}).get("new_subdomains", 0),
+            }
         except Exception as e:
-            logger.error(f"Error getting domain list: {e}")
-            raise DatabaseException(f"Failed to get domain list: {e}")
+            logger.error(f"Error getting stats: {e}")
+            return {
+                "total_domains": 0,
+                "total_subdomains": 0,
+                "last_updated": None,
+                "new_today": 0,
+            }
 
-    async def get_stats(self) -> Dict[str, Any]:
-        """Get monitoring statistics"""
+    async def get_daily_stats(
+        self, days: int = 30, domain: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """New subdomains per day over the last days, of one domain or all"""
+        try:
+            since = _day(datetime.utcnow() - timedelta(days=max(days, 1) - 1))
+            if domain is None:
+                query, collection = {"day": {"$gte": since}}, self.stats_collection
+            else:
+                query = {"domain": domain, "day": {"$gte": since}}
+                collection = self.daily_collection
+            cursor = collection.find(
+                query, {"_id": 0, "day": 1, "new_subdomains": 1}
+            ).sort("day", ASCENDING)
+            return [
+                {"day": doc["day"], "new_subdomains": doc.get("new_subdomains", 0)}
+                async for doc in cursor
+            ]
+        except Exception as e:
+            logger.error(f"Error getting daily stats: {e}")
+            raise DatabaseException(f"Failed to get daily stats: {e}")
+
+    async def reconcile_stats(self) -> Dict[str, Any]:
+        """
+        Recompute the materialized counters from the collections
+
+        One aggregation groups the subdomains by domain and day first seen;
+        its result replaces the per-day counters, the totals and any drifted
+        subdomain_count. Counters of past days no longer backed by data are
+        removed. Increments landing while it runs may be overwritten and are
+        picked up by the next run.
+        """
         try:
+            now = datetime.utcnow()
+            today = _day(now)
+            per_domain: Dict[str, int] = defaultdict(int)
+            per_day: Dict[str, int] = defaultdict(int)
+            daily = []
             pipeline = [
                 {
                     "$group": {
-                        "_id": None,
-                        "total_domains": {"$sum": 1},
-                        "total_subdomains": {"$sum": {"$size": "$subdomains"}},
-                        "last_updated": {"$max": "$updated_at"},
+                        "_id": {
+                            "domain": "$domain",
+                            "day": {
+                                "$dateToString": {
+                                    "format": "%Y-%m-%d",
+                                    "date": "$first_seen",
+                                }
+                            },
+                        },
+                        "count": {"$sum": 1},
                     }
                 }
             ]
-            result = await self.collection.aggregate(pipeline).to_list(length=1)
-            if result:
-                return result[0]
-            return {"total_domains": 0, "total_subdomains": 0, "last_updated": None}
+            async for doc in self.subdomain_collection.aggregate(
+                pipeline, allowDiskUse=True
+            ):
+                domain, day = doc["_id"]["domain"], doc["_id"]["day"]
+                per_domain[domain] += doc["count"]
+                per_day[day] += doc["count"]
+                daily.append(
+                    UpdateOne(
+                        {"domain": domain, "day": day},
+                        {
+                            "$set": {
+                                "new_subdomains": doc["count"],
+                                "reconciled_at": now,
+                            }
+                        },
+                        upsert=True,
+                    )
+                )
+
+            total_domains, corrected, last_updated = 0, [], None
+            cursor = self.collection.find(
+                {}, {"domain": 1, "subdomain_count": 1, "updated_at": 1}
+            )
+            async for doc in cursor:
+                total_domains += 1
+                count = per_domain.get(doc["domain"], 0)
+                if doc.get("subdomain_count") != count:
+                    corrected.append(
+                        UpdateOne(
+                            {"_id": doc["_id"]}, {"$set": {"subdomain_count": count}}
+                        )
+                    )
+                updated_at = doc.get("updated_at")
+                if updated_at and (last_updated is None or updated_at > last_updated):
+                    last_updated = updated_at
+
+            batch = max(settings.SUBDOMAIN_WRITE_BATCH, 1)
+            for start in range(0, len(daily), batch):
+                await self.daily_collection.bulk_write(
+                    daily[start : start + batch], ordered=False
+                )
+            for start in range(0, len(corrected), batch):
+                await self.collection.bulk_write(
+                    corrected[start : start + batch], ordered=False
+                )
+            days = [
+                UpdateOne(
+                    {"_id": f"day:{day}"},
+                    {
+                        "$set": {
+                            "day": day,
+                            "new_subdomains": count,
+                            "reconciled_at": now,
+                        }
+                    },
+                    upsert=True,
+                )
+                for day, count in per_day.items()
+            ]
+            for start in range(0, len(days), batch):
+                await self.stats_collection.bulk_write(
+                    days[start : start + batch], ordered=False
+                )
+            stale = {"reconciled_at": {"$ne": now}, "day": {"$lt": today}}
+            await self.daily_collection.delete_many(stale)
+            await self.stats_collection.delete_many(stale)
+
+            totals = {
+                "total_domains": total_domains,
+                "total_subdomains": sum(per_domain.values()),
+                "last_updated": last_updated,
+            }
+            await self.stats_collection.replace_one(
+                {"_id": GLOBAL_STATS}, {**totals, "reconciled_at": now}, upsert=True
+            )
+            logger.info(
+                f"Reconciled stats: {totals['total_domains']} domains, "
+                f"{totals['total_subdomains']} subdomains, "
+                f"{len(corrected)} subdomain counts corrected"
+            )
+            return {**totals, "domains_corrected": len(corrected)}
         except Exception as e:
-            logger.error(f"Error getting stats: {e}")
-            return {"total_domains": 0, "total_subdomains": 0, "last_updated": None}
+            logger.error(f"Error reconciling stats: {e}")
+            raise DatabaseException(f"Failed to reconcile stats: {e}")
 
 
 # Global repository instance
@@ -31,11 +31,27 @@ class DomainCreate(DomainBase):
 class DomainInDB(DomainBase):
     """Domain model as stored in database"""
 
-    subdomains: List[str] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     notify_slack: bool = False
     notify_telegram: bool = False
+    crtsh_last_id: int = 0
+    crtsh_last_full_scan: Optional[datetime] = None
+    # Maintained with every subdomain write
+    subdomain_count: int = 0
+    last_new_found: Optional[datetime] = None
+    # When last_seen was last moved for names the fingerprint skips
+    last_seen_touched: Optional[datetime] = None
+
+
+class SubdomainInDB(BaseModel):
+    """Subdomain as stored in the subdomains collection"""
+
+    domain: str
+    subdomain: str
+    first_seen: datetime = Field(default_factory=datetime.utcnow)
+    # Within LAST_SEEN_INTERVAL_HOURS when monitoring uses fingerprints
+    last_seen: datetime = Field(default_factory=datetime.utcnow)
 
 
 class DomainResponse(BaseModel):
@@ -44,6 +60,7 @@ class DomainResponse(BaseModel):
     id: str
     domain: str
     subdomain_count: int
+    last_new_found: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
     notify_slack: bool
@@ -63,6 +80,8 @@ class DomainListResponse(BaseModel):
 
     domains: List[str]
     total: int
+    # Pass as cursor to get the next page; None on the last page
+    next_cursor: Optional[str] = None
 
 
 class DNSRecord(BaseModel):
@@ -70,7 +89,21 @@ class DNSRecord(BaseModel):
 
     subdomain: str
     A: Optional[List[str]] = None
+    AAAA: Optional[List[str]] = None
     CNAME: Optional[List[str]] = None
+    MX: Optional[List[str]] = None
+    TXT: Optional[List[str]] = None
+    # Answers match the wildcard record of the parent zone
+    wildcard: bool = False
+    # Seconds until the first of the answers expires
+    ttl: Optional[int] = None
+    # A lookup timed out or failed, so the answers may be incomplete
+    failed: bool = False
+
+    def has_answers(self) -> bool:
+        return any(
+            getattr(self, rdtype) for rdtype in ("A", "AAAA", "CNAME", "MX", "TXT")
+        )
 
 
 class MonitoringStats(BaseModel):
@@ -80,3 +113,10 @@ class MonitoringStats(BaseModel):
     total_subdomains: int
     last_check: Optional[datetime] = None
     new_subdomains_found: int = 0
+
+
+class DailyStats(BaseModel):
+    """New subdomains first seen on one day"""
+
+    day: str
+    new_subdomains: int
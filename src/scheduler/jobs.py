@@ -35,3 +35,46 @@ async def scheduled_monitoring_job():
     except Exception as e:
         logger.error(f"Scheduled monitoring job failed: {e}", exc_info=True)
         return {"error": str(e)}
+
+
+async def scheduled_dns_recheck_job():
+    """
+    Background job that re-resolves stored subdomains with expired answers
+    Only changed answers are written back, and changed CNAMEs are checked
+    for takeovers
+    """
+    logger.info(f"Starting DNS re-resolution job at {datetime.utcnow()}")
+
+    try:
+        if not repository.client:
+            await repository.connect()
+
+        result = await monitoring_service.recheck_dns()
+
+        logger.info(
+            f"DNS re-resolution completed: {result['checked']} checked, "
+            f"{result['changed']} changed"
+        )
+        return result
+
+    except Exception as e:
+        logger.error(f"DNS re-resolution job failed: {e}", exc_info=True)
+        return {"error": str(e)}
+
+
+async def scheduled_stats_reconcile_job():
+    """
+    Background job that recomputes the statistics counters from the data
+    Corrects any drift of the incremental updates
+    """
+    logger.info(f"Starting stats reconcile job at {datetime.utcnow()}")
+
+    try:
+        if not repository.client:
+            await repository.connect()
+
+        return await repository.reconcile_stats()
+
+    except Exception as e:
+        logger.error(f"Stats reconcile job failed: {e}", exc_info=True)
+        return {"error": str(e)}
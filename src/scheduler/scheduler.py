@@ -5,7 +5,11 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 from src.core.config import settings
-from src.scheduler.jobs import scheduled_monitoring_job
+from src.scheduler.jobs import (
+    scheduled_dns_recheck_job,
+    scheduled_monitoring_job,
+    scheduled_stats_reconcile_job,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +47,34 @@ class MonitoringScheduler:
             misfire_grace_time=300,  # 5 minutes grace period
         )
 
+        # Re-resolve stored subdomains whose answers have expired
+        if settings.DNS_HISTORY_ENABLED and settings.DNS_RECHECK_INTERVAL_MINUTES > 0:
+            self.scheduler.add_job(
+                scheduled_dns_recheck_job,
+                trigger=IntervalTrigger(minutes=settings.DNS_RECHECK_INTERVAL_MINUTES),
+                id="dns_recheck_job",
+                name="DNS Re-resolution",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+                misfire_grace_time=300,
+            )
+
+        # Correct drift of the materialized stats counters
+        if settings.STATS_RECONCILE_INTERVAL_MINUTES > 0:
+            self.scheduler.add_job(
+                scheduled_stats_reconcile_job,
+                trigger=IntervalTrigger(
+                    minutes=settings.STATS_RECONCILE_INTERVAL_MINUTES
+                ),
+                id="stats_reconcile_job",
+                name="Stats Reconcile",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+                misfire_grace_time=300,
+            )
+
         # Start the scheduler
         self.scheduler.start()
         self.is_running = True
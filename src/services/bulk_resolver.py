@@ -0,0 +1,397 @@
+import asyncio
+import logging
+import random
+import re
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+import dns.exception
+import dns.flags
+import dns.ipv6
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdata
+import dns.rdataclass
+import dns.rdatatype
+import dns.resolver
+
+from src.core.config import settings
+from src.services.dns_cache import DnsCache
+from src.services.dns_resolver import DnsResolver, dns_resolver
+from src.services.nameservers import NameserverManager
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!HHHHHH")
+_QUESTION_TAIL = struct.Struct("!HH")
+_RR = struct.Struct("!HHIH")
+_PLAIN_LABEL = re.compile(rb"[A-Za-z0-9_*-]+")
+
+# Longest CNAME chain followed inside one response
+MAX_CHAIN = 16
+# Most compression pointers followed while decoding one name
+MAX_POINTERS = 64
+
+# Requested receive buffer per socket; the kernel may cap it (rmem_max)
+RECEIVE_BUFFER = 4 * 1024 * 1024
+
+
+def build_query(qid: int, name: str, rdtype: int) -> Tuple[bytes, bytes]:
+    """Wire format of a recursive query and of its question section"""
+    labels = [label for label in name.encode("ascii").split(b".") if label]
+    if any(len(label) > 63 for label in labels):
+        raise dns.name.LabelTooLong()
+    qname = b"".join(bytes((len(label),)) + label for label in labels)
+    question = qname + b"\x00" + _QUESTION_TAIL.pack(rdtype, dns.rdataclass.IN)
+    return _HEADER.pack(qid, dns.flags.RD, 1, 0, 0, 0) + question, question
+
+
+def read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Decode a possibly compressed name and return it with the offset after it"""
+    labels = []
+    end = None
+    pointers = 0
+    while True:
+        length = data[offset]
+        if length >= 0xC0:
+            if end is None:
+                end = offset + 2
+            pointers += 1
+            if pointers > MAX_POINTERS:
+                raise ValueError("Compression loop")
+            offset = (length & 0x3F) << 8 | data[offset + 1]
+            continue
+        offset += 1
+        if not length:
+            break
+        label = data[offset : offset + length]
+        if not _PLAIN_LABEL.fullmatch(label):
+            # Names needing escapes are left to dnspython
+            raise ValueError("Unusual label")
+        labels.append(label)
+        offset += length
+    return b".".join(labels).decode("ascii").lower(), end or offset
+
+
+def answer_from_wire(data: bytes, rdtype: int) -> "BulkAnswer":
+    """
+    Follow the CNAME chain of a raw response to the requested records
+
+    A, AAAA and CNAME records are decoded by hand, which is several times
+    cheaper than building a dns.message.Message; other types go through
+    dns.rdata. Raises NXDOMAIN or NoAnswer like dnspython, and ValueError
+    for responses the fast path does not handle.
+    """
+    _, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(data)
+    if not qdcount:
+        raise ValueError("No question")
+    qname, offset = read_name(data, 12)
+    offset += 4
+    for _ in range(qdcount - 1):
+        offset = read_name(data, offset)[1] + 4
+
+    rrsets: Dict[Tuple[str, int], Tuple[int, List[str]]] = {}
+    for _ in range(ancount):
+        owner, offset = read_name(data, offset)
+        rtype, rclass, ttl, length = _RR.unpack_from(data, offset)
+        start = offset + 10
+        offset = start + length
+        if offset > len(data):
+            raise ValueError("Truncated record")
+        if rclass != dns.rdataclass.IN or rtype not in (rdtype, dns.rdatatype.CNAME):
+            continue
+        if rtype == dns.rdatatype.A:
+            value = socket.inet_ntoa(data[start:offset])
+        elif rtype == dns.rdatatype.AAAA:
+            value = dns.ipv6.inet_ntoa(data[start:offset])
+        elif rtype == dns.rdatatype.CNAME:
+            value = read_name(data, start)[0] + "."
+        else:
+            try:
+                rdata = dns.rdata.from_wire(
+                    dns.rdataclass.IN, rtype, data, start, length
+                )
+            except dns.exception.DNSException as e:
+                raise ValueError(str(e))
+            value = rdata.to_text()
+        rrset = rrsets.get((owner, rtype))
+        if rrset is None:
+            rrsets[(owner, rtype)] = (ttl, [value])
+        else:
+            rrsets[(owner, rtype)] = (min(rrset[0], ttl), rrset[1] + [value])
+
+    name = qname
+    chain_ttl = None
+    for _ in range(MAX_CHAIN):
+        rrset = rrsets.get((name, rdtype))
+        if rrset is not None:
+            ttl = rrset[0] if chain_ttl is None else min(chain_ttl, rrset[0])
+            return BulkAnswer(rrset[1], ttl, name)
+        if rdtype == dns.rdatatype.CNAME:
+            break
+        cname = rrsets.get((name, dns.rdatatype.CNAME))
+        if cname is None:
+            break
+        chain_ttl = cname[0] if chain_ttl is None else min(chain_ttl, cname[0])
+        name = cname[1][0].rstrip(".")
+
+    # A name that is an alias exists, even when its target does not
+    if flags & 0x0F == dns.rcode.NXDOMAIN and name == qname:
+        raise dns.resolver.NXDOMAIN()
+    raise dns.resolver.NoAnswer()
+
+
+class BulkAnswer(list):
+    """Records of a bulk lookup, shaped like the dns.resolver.Answer it replaces"""
+
+    def __init__(self, records: List[str], ttl: int, canonical: str):
+        super().__init__(records)
+        self.expiration = time.time() + ttl
+        self.canonical = canonical
+
+    @property
+    def canonical_name(self) -> dns.name.Name:
+        return dns.name.from_text(self.canonical)
+
+
+class _Pending:
+    __slots__ = ("future", "question", "nameserver", "timer")
+
+    def __init__(self, future: asyncio.Future, question: bytes, nameserver: str):
+        self.future = future
+        self.question = question
+        self.nameserver = nameserver
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class _BulkProtocol(asyncio.DatagramProtocol):
+    def __init__(self, resolver: "BulkResolver", index: int):
+        self.resolver = resolver
+        self.index = index
+
+    def datagram_received(self, data: bytes, addr):
+        self.resolver._received(self.index, data, addr)
+
+    def error_received(self, exc: Exception):
+        logger.debug(f"Bulk DNS socket {self.index} error: {exc}")
+
+
+class BulkResolver(DnsResolver):
+    """
+    High-volume resolution over a few shared UDP sockets
+
+    Instead of a socket and a resolver round per lookup, queries are
+    pipelined over DNS_BULK_SOCKETS non-blocking sockets with up to
+    DNS_BULK_WINDOW outstanding. Responses are matched through an in-flight
+    table keyed by socket and query id, and checked against the nameserver
+    and question they were sent for. A lookup that times out is resent to
+    another nameserver, truncated answers are retried over TCP by the
+    regular resolver path.
+
+    Only the network exchange differs from DnsResolver. Given a shared
+    resolver, its nameserver health and wildcard detector are used as well
+    as the answer cache, so both paths see the same ejections and probe
+    each zone once.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        cache: Optional[DnsCache] = None,
+        sockets: Optional[int] = None,
+        shared: Optional[DnsResolver] = None,
+    ):
+        super().__init__(concurrency or settings.DNS_BULK_WINDOW, cache)
+        self._shared = shared
+        if shared is not None:
+            self.wildcards = shared.wildcards
+        self.sockets = sockets or settings.DNS_BULK_SOCKETS
+        self._transports: List[asyncio.DatagramTransport] = []
+        self._transports_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._open_lock: Optional[asyncio.Lock] = None
+        self._inflight: Dict[Tuple[int, int], _Pending] = {}
+        self._next_socket = 0
+        self.sent = 0
+        self.retransmits = 0
+        self.stray = 0
+
+    @property
+    def nameservers(self) -> NameserverManager:
+        if self._shared is not None:
+            return self._shared.nameservers
+        return super().nameservers
+
+    async def _get_transports(self) -> List[asyncio.DatagramTransport]:
+        """Get the sockets, opening them for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._transports_loop is not loop:
+            self._transports = []
+            self._inflight.clear()
+            self._open_lock = asyncio.Lock()
+            self._transports_loop = loop
+        if not self._transports:
+            async with self._open_lock:
+                if not self._transports:
+                    for index in range(self.sockets):
+                        transport, _ = await loop.create_datagram_endpoint(
+                            lambda index=index: _BulkProtocol(self, index),
+                            local_addr=("0.0.0.0", 0),
+                        )
+                        # Room for a full window of answers between reads
+                        transport.get_extra_info("socket").setsockopt(
+                            socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER
+                        )
+                        self._transports.append(transport)
+        return self._transports
+
+    def _new_id(self, index: int) -> int:
+        while True:
+            qid = random.getrandbits(16)
+            if (index, qid) not in self._inflight:
+                return qid
+
+    def _received(self, index: int, data: bytes, addr):
+        if len(data) < 12:
+            return
+        qid = data[0] << 8 | data[1]
+        pending = self._inflight.get((index, qid))
+        if (
+            pending is None
+            or pending.future.done()
+            or addr[0] != pending.nameserver
+            or data[12 : 12 + len(pending.question)].lower() != pending.question
+        ):
+            self.stray += 1
+            return
+        pending.future.set_result(data)
+
+    @staticmethod
+    def _expire(future: asyncio.Future):
+        if not future.done():
+            future.set_exception(dns.exception.Timeout())
+
+    async def _exchange(
+        self, name: str, rdtype: int, nameserver: str, timeout: float
+    ) -> bytes:
+        transports = await self._get_transports()
+        loop = asyncio.get_running_loop()
+        self._next_socket = (self._next_socket + 1) % len(transports)
+        index = self._next_socket
+        qid = self._new_id(index)
+        query, question = build_query(qid, name, rdtype)
+
+        pending = _Pending(loop.create_future(), question, nameserver)
+        pending.timer = loop.call_later(timeout, self._expire, pending.future)
+        self._inflight[(index, qid)] = pending
+        try:
+            transports[index].sendto(query, (nameserver, settings.DNS_PORT))
+            self.sent += 1
+            return await pending.future
+        finally:
+            pending.timer.cancel()
+            self._inflight.pop((index, qid), None)
+
+    async def _resolve(self, name: str, rdtype: str):
+        """Exchange one query over the shared sockets, failing over on errors"""
+        rdtype_value = dns.rdatatype.from_text(rdtype)
+        # With a single nameserver, retransmits go to that same server
+        attempts = max(settings.DNS_MAX_ATTEMPTS, 1)
+        timeout = settings.DNS_TIMEOUT / attempts
+        tried: List[str] = []
+        while True:
+            nameserver = self.nameservers.choose(exclude=tried)
+            if ":" in nameserver:
+                # The bulk sockets are IPv4 only
+                return await super()._resolve(name, rdtype)
+            if tried:
+                self.retransmits += 1
+            tried.append(nameserver)
+            started = time.monotonic()
+            try:
+                response = await self._exchange(name, rdtype_value, nameserver, timeout)
+            except dns.exception.Timeout:
+                self.nameservers.failure(
+                    nameserver, time.monotonic() - started, timeout=True
+                )
+                if len(tried) >= attempts:
+                    raise
+                continue
+
+            flags = response[2] << 8 | response[3]
+            if flags & 0x0F in (dns.rcode.SERVFAIL, dns.rcode.REFUSED):
+                self.nameservers.failure(nameserver, time.monotonic() - started)
+                if len(tried) >= attempts:
+                    raise dns.resolver.NoNameservers()
+                continue
+
+            self.nameservers.success(nameserver, time.monotonic() - started)
+            if flags & dns.flags.TC:
+                return await super()._resolve(name, rdtype)
+            try:
+                return answer_from_wire(response, rdtype_value)
+            except (ValueError, IndexError, OSError, struct.error):
+                return self._answer(dns.message.from_wire(response), rdtype_value)
+
+    @staticmethod
+    def _answer(response: dns.message.Message, rdtype: int) -> BulkAnswer:
+        """Follow the CNAME chain of a parsed response to the requested records"""
+        qname = response.question[0].name
+        ttl = None
+        for _ in range(MAX_CHAIN):
+            rrset = response.get_rrset(
+                response.answer, qname, dns.rdataclass.IN, rdtype
+            )
+            if rrset is not None:
+                ttl = rrset.ttl if ttl is None else min(ttl, rrset.ttl)
+                return BulkAnswer(
+                    [str(rdata) for rdata in rrset],
+                    ttl,
+                    qname.to_text(omit_final_dot=True).lower(),
+                )
+            if rdtype == dns.rdatatype.CNAME:
+                break
+            cname = response.get_rrset(
+                response.answer, qname, dns.rdataclass.IN, dns.rdatatype.CNAME
+            )
+            if cname is None:
+                break
+            ttl = cname.ttl if ttl is None else min(ttl, cname.ttl)
+            qname = cname[0].target
+
+        # A name that is an alias exists, even when its target does not
+        if (
+            response.rcode() == dns.rcode.NXDOMAIN
+            and qname == response.question[0].name
+        ):
+            raise dns.resolver.NXDOMAIN()
+        raise dns.resolver.NoAnswer()
+
+    @staticmethod
+    def _canonical(answers) -> str:
+        if isinstance(answers, BulkAnswer):
+            return answers.canonical
+        return DnsResolver._canonical(answers)
+
+    def close(self):
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(
+            {
+                "sockets": self.sockets,
+                "sent": self.sent,
+                "retransmits": self.retransmits,
+                "stray": self.stray,
+            }
+        )
+        return stats
+
+
+# Global bulk resolver instance
+bulk_resolver = BulkResolver(shared=dns_resolver)
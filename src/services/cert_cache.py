@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.config import settings
+
+
+class CertificateCache:
+    """
+    Parsed names of crt.sh entries keyed by entry id
+
+    Certificates are immutable, so the normalized name list of an entry is
+    computed once and reused by every monitored domain whose query returns
+    the same multi-SAN certificate. Entries are evicted by age and in LRU
+    order once there are more than max_entries of them or their names add
+    up to more than max_names, which bounds memory however many SANs the
+    certificates carry.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        max_names: Optional[int] = None,
+    ):
+        self.max_entries = (
+            max_entries if max_entries is not None else settings.CERT_CACHE_MAX_ENTRIES
+        )
+        self.max_names = (
+            max_names if max_names is not None else settings.CERT_CACHE_MAX_NAMES
+        )
+        self.ttl = ttl if ttl is not None else settings.CERT_CACHE_TTL
+        self._entries: "OrderedDict[int, Tuple[float, Tuple[str, ...]]]" = OrderedDict()
+        self._names = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, entry_id: int) -> Optional[Tuple[str, ...]]:
+        """Return the cached names of an entry or None"""
+        cached = self._entries.get(entry_id)
+        if cached is None:
+            self.misses += 1
+            return None
+        if time.monotonic() - cached[0] > self.ttl:
+            del self._entries[entry_id]
+            self._names -= len(cached[1])
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        return cached[1]
+
+    def set(self, entry_id: int, names: Tuple[str, ...]):
+        if not self.enabled or len(names) > self.max_names:
+            return
+        previous = self._entries.pop(entry_id, None)
+        if previous is not None:
+            self._names -= len(previous[1])
+        self._entries[entry_id] = (time.monotonic(), names)
+        self._names += len(names)
+        while len(self._entries) > self.max_entries or self._names > self.max_names:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._names -= len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._names = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "names": self._names,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global certificate cache instance
+certificate_cache = CertificateCache()
@@ -1,6 +1,183 @@
-from re import match
+import codecs
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set
 
-from requests import get
+from src.core.config import settings
+from src.services.cert_cache import CertificateCache, certificate_cache
+from src.services.http_client import http_client
+from src.services.normalizer import filter_scope, normalize_entries, normalize_names
+
+
+@dataclass
+class CrtshCursor:
+    """
+    High-water mark for incremental crt.sh fetching
+
+    Entries with an id at or below after_id were processed by an earlier run
+    and are skipped; max_id tracks the highest entry id seen in this run.
+    """
+
+    after_id: int = 0
+    max_id: int = 0
+
+    def __post_init__(self):
+        self.max_id = max(self.max_id, self.after_id)
+
+    @property
+    def full_scan(self) -> bool:
+        return self.after_id == 0
+
+    def accept(self, entry: dict) -> bool:
+        """Record the entry id and tell whether the entry is new"""
+        entry_id = entry.get("id")
+        if not isinstance(entry_id, int):
+            return True
+        if entry_id > self.max_id:
+            self.max_id = entry_id
+        return entry_id > self.after_id
+
+
+class CrtshStreamParser:
+    """
+    Incremental parser for the crt.sh JSON output
+
+    The body is fed in chunks as it arrives; each certificate entry is decoded
+    as soon as it is complete and its names are queued, then normalized and
+    deduplicated in batches. Memory is bounded by the number of unique
+    subdomains instead of the payload size.
+
+    With a certificate cache, entries already parsed for another domain reuse
+    their cached names instead of being normalized again.
+    """
+
+    def __init__(
+        self,
+        cursor: Optional[CrtshCursor] = None,
+        domain: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        cache: Optional[CertificateCache] = None,
+    ):
+        self.subdomains: Set[str] = set()
+        self.entries = 0
+        self.cursor = cursor
+        self.domain = domain
+        self.batch_size = batch_size or settings.NORMALIZE_BATCH_SIZE
+        self.cache = cache
+        self._pending: Set[str] = set()
+        self._pending_entries: Dict[int, str] = {}
+        self._parsed: Set[str] = set()
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+
+    def feed(self, chunk: bytes):
+        """Feed a chunk of the response body"""
+        if self._finished:
+            return
+        self._buffer += self._text.decode(chunk)
+        self._parse()
+
+    def add_entries(self, entries: Iterable[dict]):
+        """Add already decoded entries"""
+        for entry in entries:
+            self._add_entry(entry)
+
+    def close(self) -> Set[str]:
+        """Flush the parser and return the collected subdomains"""
+        self._buffer += self._text.decode(b"", final=True)
+        self._parse()
+        if not self._finished and (self._started or self._buffer.strip()):
+            raise ValueError("Truncated crt.sh response")
+        self._flush()
+        return self.subdomains
+
+    def _parse(self):
+        buffer = self._buffer
+        size = len(buffer)
+        pos = 0
+
+        if not self._started:
+            pos = _skip_whitespace(buffer, pos)
+            if pos == size:
+                self._buffer = ""
+                return
+            if buffer[pos] != "[":
+                raise ValueError("Unexpected crt.sh response")
+            self._started = True
+            pos += 1
+
+        while True:
+            pos = _skip_separators(buffer, pos)
+            if pos == size:
+                break
+            if buffer[pos] == "]":
+                self._finished = True
+                pos = size
+                break
+            try:
+                entry, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Entry is not complete yet, wait for the next chunk
+                break
+            self._add_entry(entry)
+            pos = end
+
+        self._buffer = buffer[pos:]
+
+    def _add_entry(self, entry: dict):
+        self.entries += 1
+        if self.cursor is not None and not self.cursor.accept(entry):
+            return
+        name_value = entry.get("name_value")
+        if not name_value:
+            return
+
+        entry_id = entry.get("id")
+        if self.cache is not None and isinstance(entry_id, int):
+            names = self.cache.get(entry_id)
+            if names is not None:
+                self._parsed.update(names)
+            else:
+                self._pending_entries[entry_id] = name_value
+        else:
+            self._pending.add(name_value)
+
+        queued = len(self._pending) + len(self._pending_entries) + len(self._parsed)
+        if queued >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._pending_entries:
+            for entry_id, names in normalize_entries(self._pending_entries).items():
+                self.cache.set(entry_id, names)
+                self._parsed.update(names)
+            self._pending_entries = {}
+        if self._parsed:
+            if self.domain:
+                self.subdomains |= filter_scope(self._parsed, self.domain)
+            else:
+                self.subdomains |= self._parsed
+            self._parsed = set()
+        if self._pending:
+            self.subdomains |= normalize_names(self._pending, self.domain)
+            self._pending = set()
+
+
+def _skip_whitespace(buffer: str, pos: int) -> int:
+    size = len(buffer)
+    while pos < size and buffer[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+
+def _skip_separators(buffer: str, pos: int) -> int:
+    size = len(buffer)
+    while pos < size and buffer[pos] in " \t\r\n,":
+        pos += 1
+    return pos
 
 
 class Crtsh:
@@ -9,27 +186,58 @@ class Crtsh:
 
     """
 
-    def get_subdomains(self, domain) -> list:
-        """get subdomain from crt.sh"""
-        url = f"https://crt.sh/?q=%25.{domain}&output=json"
-        response = get(url, timeout=60, verify=True)
-
-        if response.status_code == 200:
-            subdomains = set()
-            data = response.json()
-            for entry in data:
-                name_value = entry["name_value"]
-                if not match(r"^[0-9\.]+$", name_value):
-                    subdomains.add(name_value)
-            return self.parse_response(subdomains=subdomains)
-        return []
-
-    def parse_response(self, subdomains) -> list:
-        """Parse crt.sh response and return list of subdomains (sort, clean, uniq)"""
+    async def get_subdomains(
+        self, domain, stream=None, cursor: Optional[CrtshCursor] = None
+    ) -> list:
+        """
+        get subdomain from crt.sh
+
+        When a cursor is given only entries past its high-water mark are
+        processed and the cursor is advanced to the highest entry id seen.
+        """
+        if stream is None:
+            stream = settings.CRTSH_STREAM
+
+        url = f"{settings.CRTSH_BASE_URL}/?q=%25.{domain}&output=json"
+        response = await http_client.send(
+            "crtsh", "GET", url, stream=stream, timeout=60
+        )
+
+        if stream:
+            try:
+                # Fail loudly so an outage is not mistaken for zero subdomains
+                response.raise_for_status()
+                parser = self._parser(cursor, domain)
+                async for chunk in response.aiter_bytes(settings.CRTSH_CHUNK_SIZE):
+                    parser.feed(chunk)
+                return list(parser.close())
+            finally:
+                await response.aclose()
 
-        results = set()
-        for i in subdomains:
-            list_subdomains = i.split("\n")
-            for sub_domain in list_subdomains:
-                results.add(sub_domain.replace("*.", "").replace("@", "."))
-        return list(results)
+        response.raise_for_status()
+
+        parser = self._parser(cursor, domain)
+        parser.add_entries(response.json())
+        return list(parser.close())
+
+    def _parser(
+        self, cursor: Optional[CrtshCursor], domain: Optional[str]
+    ) -> CrtshStreamParser:
+        cache = certificate_cache if settings.CERT_CACHE_ENABLED else None
+        return CrtshStreamParser(cursor=cursor, domain=domain, cache=cache)
+
+    def parse_stream(
+        self,
+        chunks: Iterable[bytes],
+        cursor: Optional[CrtshCursor] = None,
+        domain: Optional[str] = None,
+    ) -> Set[str]:
+        """Parse crt.sh response body incrementally from an iterable of chunks"""
+        parser = CrtshStreamParser(cursor=cursor, domain=domain)
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.close()
+
+    def parse_response(self, subdomains, domain: Optional[str] = None) -> list:
+        """Parse crt.sh response and return list of subdomains (sort, clean, uniq)"""
+        return list(normalize_names(subdomains, domain))
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+class DiscoveryCache:
+    """
+    TTL cache for discovery source results keyed by (source, domain)
+
+    Entries live in a size-bounded in-memory LRU backed by a local SQLite
+    file, so cached results survive restarts.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.path = path if path is not None else settings.DISCOVERY_CACHE_PATH
+        self.ttl = ttl if ttl is not None else settings.DISCOVERY_CACHE_TTL
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else settings.DISCOVERY_CACHE_MAX_ENTRIES
+        )
+        self._memory: "OrderedDict[CacheKey, Tuple[float, List[str]]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.DISCOVERY_CACHE_ENABLED and self.ttl > 0
+
+    async def get(self, source: str, domain: str) -> Optional[List[str]]:
+        """Return cached subdomains or None on miss"""
+        if not self.enabled:
+            return None
+
+        key = (source, domain)
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None and entry[0] > now:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del self._memory[key]
+
+        if self.path:
+            entry = await asyncio.to_thread(self._disk_get, key, now)
+            if entry is not None:
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[1]
+
+        self.misses += 1
+        return None
+
+    async def set(self, source: str, domain: str, subdomains):
+        """Cache subdomains for (source, domain)"""
+        if not self.enabled:
+            return
+
+        key = (source, domain)
+        entry = (time.time() + self.ttl, list(subdomains))
+        self._remember(key, entry)
+        if self.path:
+            await asyncio.to_thread(self._disk_set, key, entry)
+
+    async def invalidate(self, domain: Optional[str] = None):
+        """Drop cached entries for a domain, or everything"""
+        if domain is None:
+            self._memory.clear()
+        else:
+            for key in [key for key in self._memory if key[1] == domain]:
+                del self._memory[key]
+        if self.path:
+            await asyncio.to_thread(self._disk_invalidate, domain)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: CacheKey, entry: Tuple[float, List[str]]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS discovery_cache ("
+                "source TEXT, domain TEXT, expires_at REAL, accessed_at REAL, "
+                "subdomains TEXT, PRIMARY KEY (source, domain))"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS discovery_cache_accessed "
+                "ON discovery_cache (accessed_at)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS discovery_cache_expires "
+                "ON discovery_cache (expires_at)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _disk_get(self, key: CacheKey, now: float):
+        try:
+            with self._lock:
+                db = self._connect()
+                row = db.execute(
+                    "SELECT expires_at, subdomains FROM discovery_cache "
+                    "WHERE source = ? AND domain = ?",
+                    key,
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[0] <= now:
+                    db.execute(
+                        "DELETE FROM discovery_cache WHERE source = ? AND domain = ?",
+                        key,
+                    )
+                    db.commit()
+                    return None
+                db.execute(
+                    "UPDATE discovery_cache SET accessed_at = ? "
+                    "WHERE source = ? AND domain = ?",
+                    (now, *key),
+                )
+                db.commit()
+                return row[0], json.loads(row[1])
+        except sqlite3.Error as e:
+            logger.warning(f"Discovery cache read failed: {e}")
+            return None
+
+    def _disk_set(self, key: CacheKey, entry: Tuple[float, List[str]]):
+        try:
+            with self._lock:
+                db = self._connect()
+                now = time.time()
+                db.execute(
+                    "INSERT OR REPLACE INTO discovery_cache VALUES (?, ?, ?, ?, ?)",
+                    (*key, entry[0], now, json.dumps(entry[1])),
+                )
+                db.execute("DELETE FROM discovery_cache WHERE expires_at <= ?", (now,))
+                db.execute(
+                    "DELETE FROM discovery_cache WHERE rowid IN ("
+                    "SELECT rowid FROM discovery_cache ORDER BY accessed_at DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Discovery cache write failed: {e}")
+
+    def _disk_invalidate(self, domain: Optional[str]):
+        try:
+            with self._lock:
+                db = self._connect()
+                if domain is None:
+                    db.execute("DELETE FROM discovery_cache")
+                else:
+                    db.execute(
+                        "DELETE FROM discovery_cache WHERE domain = ?", (domain,)
+                    )
+                db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Discovery cache invalidation failed: {e}")
+
+
+# Global discovery cache instance
+discovery_cache = DiscoveryCache()
@@ -0,0 +1,116 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from src.core.config import settings
+
+# Cached marker for a name that does not exist, whatever the record type
+NXDOMAIN = "NXDOMAIN"
+
+
+class DnsCache:
+    """
+    DNS answers keyed by name and record type
+
+    Positive answers live for their record TTL, capped at max_ttl. NXDOMAIN
+    and NoAnswer results are cached for negative_ttl; an NXDOMAIN covers
+    every record type of the name. Entries are evicted by LRU size.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        negative_ttl: Optional[int] = None,
+        max_ttl: Optional[int] = None,
+    ):
+        self.max_entries = (
+            max_entries if max_entries is not None else settings.DNS_CACHE_MAX_ENTRIES
+        )
+        self.negative_ttl = (
+            negative_ttl if negative_ttl is not None else settings.DNS_NEGATIVE_TTL
+        )
+        self.max_ttl = max_ttl if max_ttl is not None else settings.DNS_CACHE_MAX_TTL
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.DNS_CACHE_ENABLED and self.max_entries > 0
+
+    def _lookup(self, key: Hashable, now: float) -> Optional[Tuple[float, Any]]:
+        cached = self._entries.get(key)
+        if cached is None:
+            return None
+        if now >= cached[0]:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return cached
+
+    def lookup(self, name: str, rdtype: str) -> Tuple[bool, Optional[Any], float]:
+        """Return (found, value, seconds left) for a lookup"""
+        now = time.monotonic()
+        cached = self._lookup((name, rdtype), now)
+        if cached is None:
+            cached = self._lookup((name, NXDOMAIN), now)
+        if cached is None:
+            self.misses += 1
+            return False, None, 0.0
+        expires, value = cached
+        if value == NXDOMAIN or not value:
+            self.negative_hits += 1
+        self.hits += 1
+        return True, value, expires - now
+
+    def get(self, name: str, rdtype: str) -> Tuple[bool, Optional[Any]]:
+        """
+        Return (found, value) for a lookup
+
+        value is the list of record strings for a positive answer, an empty
+        list for NoAnswer or the NXDOMAIN marker.
+        """
+        found, value, _ = self.lookup(name, rdtype)
+        return found, value
+
+    def _set(self, key: Hashable, value: Any, ttl: float):
+        if not self.enabled or ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set(self, name: str, rdtype: str, records: List[str], ttl: float):
+        """Cache a positive answer for its TTL"""
+        self._set((name, rdtype), records, min(ttl, self.max_ttl))
+
+    def set_no_answer(self, name: str, rdtype: str):
+        self._set((name, rdtype), [], self.negative_ttl)
+
+    def set_nxdomain(self, name: str):
+        self._set((name, NXDOMAIN), NXDOMAIN, self.negative_ttl)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global DNS answer cache instance
+dns_cache = DnsCache()
@@ -0,0 +1,215 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.core.config import settings
+from src.db.repository import repository
+from src.models.domain import DNSRecord
+from src.services.bulk_resolver import bulk_resolver
+from src.services.dns_resolver import RECORD_TYPES, dns_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def answers(record: Optional[DNSRecord]) -> Dict[str, List[str]]:
+    """Record values by type, sorted, in the form they are stored and compared"""
+    if record is None:
+        return {}
+    return {
+        rdtype: sorted(getattr(record, rdtype))
+        for rdtype in RECORD_TYPES
+        if getattr(record, rdtype)
+    }
+
+
+@dataclass
+class DnsChange:
+    """Answers of a subdomain that differ from the stored ones"""
+
+    subdomain: str
+    domain: str
+    # None for a subdomain seen for the first time
+    previous: Optional[Dict[str, List[str]]]
+    current: Dict[str, List[str]]
+    wildcard: bool = False
+
+
+class DnsHistory:
+    """
+    Resolved answers per subdomain, persisted only when they change
+
+    Results are compared against the stored answers fetched with one $in
+    query per batch; only new and changed names are written, together with
+    the previous answer. Each entry carries the expiry of its shortest TTL
+    and recheck re-resolves expired names oldest first. Names that come back
+    unchanged only have their expiry moved, in the same bulk write, so they
+    make way for other expired names on the next run. Failed lookups say
+    nothing about the answers: stored names keep their entry and stay due,
+    and new names are stored without records until a lookup succeeds.
+    """
+
+    def __init__(self):
+        self.checked = 0
+        self.changed = 0
+        self.refreshed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.DNS_HISTORY_ENABLED
+
+    def _expires_at(self, record: Optional[DNSRecord], now: datetime) -> datetime:
+        if record is not None and record.ttl is not None:
+            ttl = min(record.ttl, settings.DNS_CACHE_MAX_TTL)
+        else:
+            ttl = settings.DNS_NEGATIVE_TTL
+        return now + timedelta(seconds=ttl)
+
+    async def record(
+        self,
+        domain: Optional[str],
+        results: List[Tuple[str, Optional[DNSRecord]]],
+    ) -> List[DnsChange]:
+        """
+        Store the answers that differ from the stored ones
+
+        Names not stored yet are inserted under domain; without a domain
+        they are skipped. Returns the new and changed names; names whose
+        lookup failed are never among them.
+        """
+        if not results:
+            return []
+        now = datetime.utcnow()
+        stored = await repository.find_dns_records([name for name, _ in results])
+
+        changes: List[DnsChange] = []
+        updates = []
+        for name, record in results:
+            existing = stored.get(name)
+            if existing is None and domain is None:
+                continue
+            owner = existing["domain"] if existing else domain
+            if record is not None and record.failed:
+                if existing is None:
+                    # Placeholder without records, due after the negative TTL
+                    updates.append(
+                        {
+                            "subdomain": name,
+                            "domain": owner,
+                            "records": None,
+                            "wildcard": False,
+                            "expires_at": self._expires_at(None, now),
+                        }
+                    )
+                continue
+            if existing is not None and existing.get("records") is None:
+                # First answers of a placeholder, not a change
+                existing = None
+
+            current = answers(record)
+            wildcard = bool(record is not None and record.wildcard)
+            expires_at = self._expires_at(record, now)
+            if existing is not None and (
+                existing.get("records") == current
+                and existing.get("wildcard", False) == wildcard
+            ):
+                updates.append({"subdomain": name, "expires_at": expires_at})
+                self.refreshed += 1
+                continue
+
+            update = {
+                "subdomain": name,
+                "domain": owner,
+                "records": current,
+                "wildcard": wildcard,
+                "expires_at": expires_at,
+            }
+            previous = None
+            if existing is not None:
+                previous = existing.get("records") or {}
+                update["previous"] = {
+                    "records": previous,
+                    "wildcard": existing.get("wildcard", False),
+                }
+            updates.append(update)
+            changes.append(DnsChange(name, owner, previous, current, wildcard))
+
+        await repository.save_dns_records(updates)
+        for change in changes:
+            if change.previous is not None:
+                logger.info(
+                    f"DNS answers of {change.subdomain} changed: "
+                    f"{change.previous} -> {change.current}"
+                )
+        return changes
+
+    async def _due(self, limit: int) -> List[str]:
+        now = datetime.utcnow()
+        names: List[str] = []
+        stream = repository.due_dns_records(now)
+        try:
+            async for doc in stream:
+                if len(names) >= limit:
+                    break
+                names.append(doc["subdomain"])
+        finally:
+            await stream.aclose()
+        return names
+
+    async def recheck(
+        self,
+        limit: Optional[int] = None,
+        on_changes: Optional[Callable[[List[DnsChange]], Awaitable]] = None,
+    ) -> dict:
+        """
+        Re-resolve stored subdomains whose answers have expired
+
+        Names are taken in order of expiry, at most limit (DNS_RECHECK_LIMIT)
+        per run, and only changed answers are written back. on_changes is
+        awaited with the changes of each written batch.
+        """
+        limit = settings.DNS_RECHECK_LIMIT if limit is None else limit
+        names = await self._due(max(limit, 0))
+        summary = {"checked": 0, "changed": 0}
+        if not names:
+            return summary
+
+        threshold = settings.DNS_BULK_THRESHOLD
+        resolver = (
+            bulk_resolver if threshold and len(names) >= threshold else dns_resolver
+        )
+        batch: List[Tuple[str, Optional[DNSRecord]]] = []
+
+        async def flush():
+            changes = await self.record(None, batch)
+            if changes and on_changes is not None:
+                await on_changes(changes)
+            summary["changed"] += len(changes)
+            summary["checked"] += len(batch)
+            batch.clear()
+
+        async for name, record in resolver.resolve_many(names):
+            batch.append((name, record))
+            if len(batch) >= settings.DNS_HISTORY_BATCH_SIZE:
+                await flush()
+        if batch:
+            await flush()
+
+        self.checked += summary["checked"]
+        self.changed += summary["changed"]
+        logger.info(
+            f"Re-resolved {summary['checked']} subdomains, "
+            f"{summary['changed']} with changed answers"
+        )
+        return summary
+
+    def stats(self) -> dict:
+        return {
+            "checked": self.checked,
+            "changed": self.changed,
+            "refreshed": self.refreshed,
+        }
+
+
+# Global DNS history instance
+dns_history = DnsHistory()
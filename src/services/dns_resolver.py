@@ -0,0 +1,339 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+from src.core.config import settings
+from src.models.domain import DNSRecord
+from src.services.dns_cache import NXDOMAIN, DnsCache, dns_cache
+from src.services.nameservers import NameserverManager
+from src.services.wildcard import WildcardDetector
+
+logger = logging.getLogger(__name__)
+
+# Record types a DNSRecord can hold
+RECORD_TYPES = ("A", "AAAA", "CNAME", "MX", "TXT")
+
+
+class DnsResolver:
+    """
+    Non-blocking DNS resolution
+
+    Lookups run on the event loop through dnspython's asyncio resolver, so
+    thousands of them can be in flight without stalling API requests. A
+    semaphore bounds the number of concurrent lookups.
+
+    The resolvers are built once and reused. The pool holds one resolver
+    per nameserver and each lookup goes to the nameserver picked by the
+    NameserverManager from measured latency and health; a timeout or server
+    failure is retried once on another nameserver. Answers are served from a TTL
+    cache; answers reached through a CNAME are also cached under the
+    canonical name, so CDN targets shared by many subdomains are queried
+    once.
+
+    Names under a wildcard zone whose addresses match the wildcard
+    fingerprint are marked as such and skip their remaining lookups.
+    """
+
+    def __init__(
+        self, concurrency: Optional[int] = None, cache: Optional[DnsCache] = None
+    ):
+        self.concurrency = concurrency or settings.DNS_CONCURRENCY
+        self.cache = cache if cache is not None else dns_cache
+        self._pool: Dict[str, dns.asyncresolver.Resolver] = {}
+        self._nameservers: Optional[NameserverManager] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queries = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.wildcards = WildcardDetector(self)
+
+    @property
+    def pool(self) -> Dict[str, dns.asyncresolver.Resolver]:
+        if not self._pool:
+            for nameserver in settings.DNS_RESOLVERS:
+                resolver = dns.asyncresolver.Resolver(configure=False)
+                resolver.nameservers = [nameserver]
+                resolver.port = settings.DNS_PORT
+                # Failover attempts share the DNS_TIMEOUT budget
+                attempt = settings.DNS_TIMEOUT / max(settings.DNS_MAX_ATTEMPTS, 1)
+                resolver.timeout = attempt
+                resolver.lifetime = attempt
+                self._pool[nameserver] = resolver
+        return self._pool
+
+    @property
+    def nameservers(self) -> NameserverManager:
+        if self._nameservers is None:
+            self._nameservers = NameserverManager(self.pool)
+        return self._nameservers
+
+    async def _resolve(self, name: str, rdtype: str) -> dns.resolver.Answer:
+        """Send a lookup to the best nameserver, failing over on errors"""
+        tried: List[str] = []
+        while True:
+            nameserver = self.nameservers.choose(exclude=tried)
+            tried.append(nameserver)
+            started = time.monotonic()
+            try:
+                answers = await self.pool[nameserver].resolve(name, rdtype)
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+                self.nameservers.success(nameserver, time.monotonic() - started)
+                raise
+            except (dns.exception.Timeout, dns.resolver.NoNameservers) as e:
+                self.nameservers.failure(
+                    nameserver,
+                    time.monotonic() - started,
+                    timeout=isinstance(e, dns.exception.Timeout),
+                )
+                if len(tried) >= min(settings.DNS_MAX_ATTEMPTS, len(self.pool)):
+                    raise
+                continue
+            self.nameservers.success(nameserver, time.monotonic() - started)
+            return answers
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def query(self, name: str, rdtype: str) -> List[str]:
+        """
+        Look up one record type; missing records give an empty list
+
+        Timeouts and server failures raise, so they are not mistaken for
+        missing records.
+        """
+        records, _ = await self._query(name, rdtype)
+        return records
+
+    async def _query(self, name: str, rdtype: str) -> Tuple[List[str], Optional[float]]:
+        """Look up one record type, with the seconds left on a positive answer"""
+        name = name.lower().rstrip(".")
+        found, cached, remaining = self.cache.lookup(name, rdtype)
+        if found:
+            if cached == NXDOMAIN or not cached:
+                return [], None
+            return list(cached), remaining
+
+        async with self._get_semaphore():
+            self.queries += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                answers = await self._resolve(name, rdtype)
+            except dns.resolver.NXDOMAIN as e:
+                self._cache_nxdomain(name, e)
+                return [], None
+            except dns.resolver.NoAnswer:
+                self.cache.set_no_answer(name, rdtype)
+                return [], None
+            finally:
+                self.in_flight -= 1
+
+        records = [str(rdata) for rdata in answers]
+        ttl = answers.expiration - time.time()
+        self.cache.set(name, rdtype, records, ttl)
+        canonical = self._canonical(answers)
+        if canonical != name:
+            self.cache.set(canonical, rdtype, records, ttl)
+        return records, ttl
+
+    def _cache_nxdomain(self, name: str, error: dns.resolver.NXDOMAIN):
+        """
+        Cache an NXDOMAIN answer
+
+        When the name is a CNAME to a missing target, only the target is
+        missing: the name keeps its CNAME and other record types, so the
+        NXDOMAIN is cached for the target instead. Such dangling names are
+        rare and are looked up again each time.
+        """
+        target = self._nxdomain_target(error)
+        self.cache.set_nxdomain(target if target is not None else name)
+
+    @staticmethod
+    def _nxdomain_target(error: dns.resolver.NXDOMAIN) -> Optional[str]:
+        """Name found missing at the end of a CNAME chain, if known"""
+        if "qnames" not in error.kwargs:
+            return None
+        return error.canonical_name.to_text().rstrip(".").lower()
+
+    async def nxdomain(self, name: str) -> bool:
+        """
+        Whether a name, or the end of its CNAME chain, does not exist
+
+        Unlike an empty query result this tells a missing name from one
+        without A records or a failed lookup.
+        """
+        name = name.lower().rstrip(".")
+        found, cached = self.cache.get(name, "A")
+        if found:
+            return cached == NXDOMAIN
+        async with self._get_semaphore():
+            self.queries += 1
+            try:
+                answers = await self._resolve(name, "A")
+            except dns.resolver.NXDOMAIN as e:
+                self._cache_nxdomain(name, e)
+                return True
+            except dns.exception.DNSException:
+                return False
+        self.cache.set(
+            name,
+            "A",
+            [str(rdata) for rdata in answers],
+            answers.expiration - time.time(),
+        )
+        return False
+
+    @staticmethod
+    def _canonical(answers) -> str:
+        """Name the answer records belong to, after following CNAMEs"""
+        return answers.canonical_name.to_text().rstrip(".").lower()
+
+    async def resolve(self, subdomain: str) -> Optional[DNSRecord]:
+        """
+        Resolve the DNS_RECORD_TYPES of a name, or None if it has none
+
+        The record types are queried concurrently under one per-name
+        deadline of DNS_NAME_TIMEOUT; types still pending at the deadline
+        are left empty, so a dead name costs one timeout rather than one per
+        type. Under a wildcard zone the A lookup runs first and a wildcard
+        match skips the other types. When a lookup times out or fails the
+        record is returned with failed set, even without answers, so callers
+        can tell a failure from a name without records.
+        """
+        dns_record = DNSRecord(subdomain=subdomain)
+        rdtypes = [
+            rdtype
+            for rdtype in map(str.upper, settings.DNS_RECORD_TYPES)
+            if rdtype in RECORD_TYPES
+        ]
+
+        try:
+            fingerprint = await self.wildcards.fingerprint(subdomain)
+            if fingerprint:
+                records, ttl = await self._query(subdomain, "A")
+                dns_record.A = records or None
+                self._keep_ttl(dns_record, ttl)
+                if self.wildcards.matches(fingerprint, dns_record.A):
+                    dns_record.wildcard = True
+                    return dns_record
+                rdtypes = [rdtype for rdtype in rdtypes if rdtype != "A"]
+        except Exception as e:
+            logger.debug(f"DNS resolution failed for {subdomain}: {e}")
+            dns_record.failed = True
+            return dns_record
+
+        await self._query_types(dns_record, rdtypes)
+
+        # Return only if we found something, or could not tell
+        if dns_record.failed or dns_record.has_answers():
+            return dns_record
+        return None
+
+    async def _query_types(self, dns_record: DNSRecord, rdtypes: List[str]):
+        tasks = {
+            rdtype: asyncio.ensure_future(self._query(dns_record.subdomain, rdtype))
+            for rdtype in rdtypes
+        }
+        if not tasks:
+            return
+        try:
+            done, _ = await asyncio.wait(
+                tasks.values(), timeout=settings.DNS_NAME_TIMEOUT
+            )
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        for rdtype, task in tasks.items():
+            if task not in done:
+                dns_record.failed = True
+                logger.debug(
+                    f"DNS {rdtype} lookup timed out for {dns_record.subdomain}"
+                )
+            elif task.exception() is not None:
+                dns_record.failed = True
+                logger.debug(
+                    f"DNS {rdtype} lookup failed for {dns_record.subdomain}: "
+                    f"{task.exception()}"
+                )
+            else:
+                records, ttl = task.result()
+                setattr(dns_record, rdtype, records or None)
+                self._keep_ttl(dns_record, ttl)
+
+    @staticmethod
+    def _keep_ttl(dns_record: DNSRecord, ttl: Optional[float]):
+        """Keep the shortest TTL of the positive answers on the record"""
+        if ttl is not None and (dns_record.ttl is None or ttl < dns_record.ttl):
+            dns_record.ttl = max(int(ttl), 0)
+
+    async def resolve_many(
+        self, names: Iterable[str], workers: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, Optional[DNSRecord]]]:
+        """
+        Resolve many names, yielding (name, record) pairs as they complete
+
+        A fixed set of workers pulls names from the iterable into a queue
+        holding at most one result per worker, so memory and task count stay
+        bounded however many names are passed and however slowly the caller
+        consumes the results. By default
+        there are just enough workers to fill the concurrency limit with one
+        lookup per record type, so lookups do not queue up against their
+        per-name deadline. Stopping the iteration early cancels the
+        remaining lookups.
+        """
+        pending = iter(names)
+        if workers is None:
+            workers = self.concurrency // max(len(settings.DNS_RECORD_TYPES), 1)
+        workers = max(workers, 1)
+        results: "asyncio.Queue[Optional[Tuple[str, Optional[DNSRecord]]]]" = (
+            asyncio.Queue(maxsize=workers)
+        )
+
+        async def worker():
+            try:
+                for name in pending:
+                    await results.put((name, await self.resolve(name)))
+            except Exception as e:
+                logger.error(f"DNS worker failed: {e}")
+            # Each worker ends with one marker, counted below
+            await results.put(None)
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(workers)]
+        finished = 0
+
+        try:
+            while finished < len(tasks):
+                item = await results.get()
+                if item is None:
+                    finished += 1
+                    continue
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "resolvers": len(self.pool),
+            "queries": self.queries,
+            "max_in_flight": self.max_in_flight,
+            "cache": self.cache.stats(),
+            "wildcards": self.wildcards.stats(),
+        }
+
+
+# Global resolver instance
+dns_resolver = DnsResolver()
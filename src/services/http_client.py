@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import socket
+from importlib.util import find_spec
+from typing import Optional
+
+import httpx
+
+from src.core.config import settings
+from src.services.rate_limiter import rate_limiter, request_deadline
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    """Application-wide pooled async HTTP client shared by discovery sources"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def http2(self) -> bool:
+        """HTTP/2 is used when enabled and the h2 package is installed"""
+        return settings.HTTP_HTTP2 and find_spec("h2") is not None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Get the shared client, creating it for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                self._release(self._client, self._loop)
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+                ),
+                timeout=settings.HTTP_TIMEOUT,
+                verify=True,
+                follow_redirects=True,
+            )
+            self._loop = loop
+            logger.debug(f"Created HTTP client (http2={self.http2})")
+        return self._client
+
+    def _release(self, client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        """Close a client left behind by another event loop"""
+        if not loop.is_closed():
+            # Closed on its own loop, which may be running in another thread
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        # Its loop is gone, so shut the pooled connections down directly;
+        # the sockets are closed once their transports are collected
+        pool = getattr(client._transport, "_pool", None)
+        for connection in getattr(pool, "connections", []):
+            stream = getattr(
+                getattr(connection, "_connection", None), "_network_stream", None
+            )
+            sock = stream.get_extra_info("socket") if stream is not None else None
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        logger.debug("Released HTTP client of a closed event loop")
+
+    async def send(
+        self, source: str, method: str, url: str, stream: bool = False, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request paced by the source's rate limiter
+
+        Throttled (429) and transient 5xx responses and transport errors are
+        retried with jittered exponential backoff, honoring Retry-After. The
+        last response is returned when retries are exhausted. Streamed
+        responses must be closed by the caller. Raises RateLimitedException
+        when the source's rate limit would outlast request_deadline.
+        """
+        attempt = 0
+        while True:
+            await rate_limiter.acquire(source, request_deadline.get())
+            request = self.client.build_request(method, url, **kwargs)
+            try:
+                response = await self.client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if attempt >= settings.HTTP_MAX_RETRIES:
+                    raise
+                delay = rate_limiter.backoff(attempt)
+                logger.warning(
+                    f"{source} request failed ({e!r}), retry in {delay:.1f}s"
+                )
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    rate_limiter.success(source)
+                    return response
+                if attempt >= settings.HTTP_MAX_RETRIES:
+                    return response
+                delay = rate_limiter.backoff(
+                    attempt, response.headers.get("Retry-After")
+                )
+                await response.aclose()
+                logger.warning(
+                    f"{source} returned {response.status_code}, retry in {delay:.1f}s"
+                )
+            # The pause applies to every request for the source, not just this one
+            rate_limiter.throttle(source, delay)
+            attempt += 1
+
+    async def close(self):
+        """Close the shared client and its pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+# Global HTTP client instance
+http_client = HttpClient()
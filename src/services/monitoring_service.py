@@ -1,16 +1,25 @@
 import asyncio
 import logging
-from datetime import datetime
-from typing import List, Optional, Set
-
-import dns.resolver
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
 
 from src.core.config import settings
+from src.db.fingerprint import SubdomainFingerprint
 from src.db.repository import repository
 from src.models.domain import DNSRecord
-from src.services.crtsh_service import Crtsh
+from src.services.bulk_resolver import bulk_resolver
+from src.services.crtsh_service import Crtsh, CrtshCursor
+from src.services.discovery_cache import discovery_cache
+from src.services.dns_history import DnsChange, dns_history
+from src.services.dns_resolver import RECORD_TYPES, dns_resolver
 from src.services.notifications_service import Notifications
+from src.services.singleflight import SingleFlight
+from src.services.sources import DiscoveryResult, SourceRegistry
+from src.services.takeover import Takeover, takeover_detector
 from src.services.threatminer_service import Threatminer
+from src.services.write_behind import DomainDiff, WriteBehind
 
 logger = logging.getLogger(__name__)
 
@@ -23,68 +32,91 @@ class MonitoringService:
         self.threatminer = Threatminer()
         self.notifications = Notifications()
 
-    async def discover_subdomains(self, domain: str) -> Set[str]:
-        """Discover subdomains from multiple sources"""
-        logger.info(f"Discovering subdomains for {domain}")
-
-        # Run discovery in parallel
-        loop = asyncio.get_event_loop()
-        crtsh_task = loop.run_in_executor(None, self.crtsh.get_subdomains, domain)
-        # threatminer_task = loop.run_in_executor(None, self.threatminer.get_subdomains, domain)
+        # Sources are looked up at call time so instances can be swapped
+        self.sources = SourceRegistry(cache=discovery_cache)
+        self.sources.register(
+            "crtsh",
+            lambda domain, **options: self.crtsh.get_subdomains(domain, **options),
+        )
+        self.sources.register(
+            "threatminer",
+            lambda domain, **options: self.threatminer.get_subdomains(domain),
+        )
+
+        # Overlapping triggers for a domain share one in-flight operation
+        self.flights = SingleFlight()
+
+    async def discover(
+        self, domain: str, cursor: Optional[CrtshCursor] = None
+    ) -> DiscoveryResult:
+        """
+        Discover subdomains from all enabled sources concurrently
+
+        Concurrent calls for the same domain and crt.sh mark share a single
+        upstream fetch; the caller's cursor receives the shared high-water mark.
+        """
+        after_id = cursor.after_id if cursor is not None else None
+        result, max_id = await self.flights.do(
+            ("discover", domain, after_id),
+            lambda: self._discover(domain, after_id),
+        )
+        if cursor is not None:
+            cursor.max_id = max(cursor.max_id, max_id)
+        return result
 
-        try:
-            crtsh_results = await crtsh_task
-            # threatminer_results = await threatminer_task
+    async def _discover(self, domain: str, after_id: Optional[int]):
+        logger.info(f"Discovering subdomains for {domain}")
 
-            # Combine and deduplicate
-            all_subdomains = set(crtsh_results + [])
-            logger.info(f"Found {len(all_subdomains)} subdomains for {domain}")
-            return all_subdomains
+        cursor = CrtshCursor(after_id=after_id) if after_id is not None else None
+        options = {"crtsh": {"cursor": cursor}} if cursor is not None else {}
+        # Full scans must see the complete history, not cached results, and
+        # incremental crt.sh deltas are never cached as the domain's names
+        use_cache = cursor is None or not cursor.full_scan
+        partial = ["crtsh"] if cursor is not None and not cursor.full_scan else []
+        result = await self.sources.discover(
+            domain, options, use_cache=use_cache, partial=partial
+        )
+        summary = ", ".join(
+            f"{name}={source.count} (cached)"
+            if source.cached
+            else f"{name}={source.count} ({source.latency:.2f}s)"
+            if source.ok
+            else f"{name}=failed ({source.error})"
+            for name, source in result.sources.items()
+        )
+        logger.info(
+            f"Found {len(result.subdomains)} subdomains for {domain} [{summary}]"
+        )
+        return result, cursor.max_id if cursor is not None else 0
 
-        except Exception as e:
-            logger.error(f"Error discovering subdomains for {domain}: {e}")
-            return set()
+    async def discover_subdomains(self, domain: str) -> Set[str]:
+        """Discover subdomains from multiple sources"""
+        result = await self.discover(domain)
+        return result.subdomains
+
+    def _crtsh_cursor(self, existing: dict, full_scan: bool = False) -> CrtshCursor:
+        """Build the crt.sh cursor for a run, falling back to a full rescan"""
+        last_id = existing.get("crtsh_last_id") or 0
+        last_full_scan = existing.get("crtsh_last_full_scan")
+        rescan_due = last_full_scan is None or (
+            datetime.utcnow() - last_full_scan
+            >= timedelta(hours=settings.CRTSH_FULL_RESCAN_HOURS)
+        )
+        if full_scan or not settings.CRTSH_INCREMENTAL or rescan_due:
+            return CrtshCursor()
+        return CrtshCursor(after_id=last_id)
+
+    def _last_seen_due(self, existing: dict) -> bool:
+        """Whether names the fingerprint skips should have last_seen moved"""
+        touched = existing.get("last_seen_touched")
+        return touched is None or (
+            datetime.utcnow() - touched
+            >= timedelta(hours=settings.LAST_SEEN_INTERVAL_HOURS)
+        )
 
     async def resolve_dns(self, subdomain: str) -> Optional[DNSRecord]:
-        """Resolve DNS records for subdomain"""
-        dns_resolver = dns.resolver.Resolver()
-        dns_resolver.nameservers = settings.DNS_RESOLVERS
-        dns_resolver.timeout = settings.DNS_TIMEOUT
-        dns_resolver.lifetime = settings.DNS_TIMEOUT
-
-        dns_record = DNSRecord(subdomain=subdomain)
-
-        try:
-            # Resolve A records
-            try:
-                answers = dns_resolver.resolve(subdomain, "A")
-                dns_record.A = [str(rdata) for rdata in answers]
-            except (
-                dns.resolver.NXDOMAIN,
-                dns.resolver.NoAnswer,
-                dns.resolver.NoNameservers,
-            ):
-                pass
-
-            # Resolve CNAME records
-            try:
-                answers = dns_resolver.resolve(subdomain, "CNAME")
-                dns_record.CNAME = [str(rdata) for rdata in answers]
-            except (
-                dns.resolver.NXDOMAIN,
-                dns.resolver.NoAnswer,
-                dns.resolver.NoNameservers,
-            ):
-                pass
-
-            # Return only if we found something
-            if dns_record.A or dns_record.CNAME:
-                return dns_record
-
-        except Exception as e:
-            logger.debug(f"DNS resolution failed for {subdomain}: {e}")
-
-        return None
+        """Resolve DNS records for subdomain without blocking the event loop"""
+        return await dns_resolver.resolve(subdomain)
 
     async def notify_new_subdomains(
         self,
@@ -92,44 +124,200 @@ class MonitoringService:
         new_subdomains: List[str],
         notify_slack: bool,
         notify_telegram: bool,
+    ) -> dict:
+        """
+        Resolve new subdomains, record their answers and send notifications
+
+        Every new subdomain up to DNS_RESOLVE_BUDGET is resolved with bounded
+        concurrency, in bulk mode from DNS_BULK_THRESHOLD names. Answers are
+        stored in the DNS history in batches of DNS_HISTORY_BATCH_SIZE, so
+        names are resolved even without a notification channel while the
+        history is enabled. Resolved records are sent in batches of
+        NOTIFY_BATCH_SIZE as soon as a batch is complete, at most
+        NOTIFY_MAX_MESSAGES per run; names that do not fit in them, like names
+        beyond the budget, are reported as a count rather than dropped
+        silently. Names matching a wildcard DNS record are only counted.
+        CNAMEs pointing at unclaimed third-party resources are sent as
+        separate takeover alerts.
+        """
+        summary = {
+            "resolved": 0,
+            "unresolved": 0,
+            "wildcard": 0,
+            "overflow": 0,
+            "unlisted": 0,
+        }
+        slack = notify_slack and bool(settings.SLACK_WEBHOOK)
+        telegram = notify_telegram and bool(settings.TELEGRAM_BOT_TOKEN)
+        notify = slack or telegram
+        if not new_subdomains or not (notify or dns_history.enabled):
+            return summary
+
+        budget = max(settings.DNS_RESOLVE_BUDGET, 0)
+        summary["overflow"] = max(len(new_subdomains) - budget, 0)
+        if summary["overflow"]:
+            logger.warning(
+                f"{domain}: {summary['overflow']} new subdomains exceed the "
+                f"resolution budget of {budget}"
+            )
+
+        names = new_subdomains[:budget]
+        threshold = settings.DNS_BULK_THRESHOLD
+        resolver = (
+            bulk_resolver if threshold and len(names) >= threshold else dns_resolver
+        )
+
+        batch: List[DNSRecord] = []
+        # The last message is kept for the final batch and the counts
+        messages = max(settings.NOTIFY_MAX_MESSAGES, 1) - 1
+        results: List[Tuple[str, Optional[DNSRecord]]] = []
+        cnames: List[Tuple[str, List[str]]] = []
+        async for name, record in resolver.resolve_many(names):
+            if dns_history.enabled:
+                results.append((name, record))
+                if len(results) >= settings.DNS_HISTORY_BATCH_SIZE:
+                    await self._record_history(domain, results)
+                    results = []
+            if record is None or not record.has_answers():
+                summary["unresolved"] += 1
+                continue
+            summary["resolved"] += 1
+            if record.wildcard:
+                summary["wildcard"] += 1
+                continue
+            if record.CNAME:
+                cnames.append((name, record.CNAME))
+            if not notify:
+                continue
+            if len(batch) >= settings.NOTIFY_BATCH_SIZE:
+                summary["unlisted"] += 1
+                continue
+            batch.append(record)
+            if len(batch) >= settings.NOTIFY_BATCH_SIZE and messages:
+                await self._send_notification(
+                    self._format_notification(domain, batch), slack, telegram
+                )
+                messages -= 1
+                batch = []
+
+        if results:
+            await self._record_history(domain, results)
+
+        if cnames and takeover_detector.enabled:
+            takeovers = await takeover_detector.check(domain, cnames)
+            if takeovers and notify:
+                await self._send_notification(
+                    self._format_takeover_alert(domain, takeovers),
+                    slack,
+                    telegram,
+                    alert=True,
+                )
+
+        if notify and (batch or summary["overflow"] or summary["wildcard"]):
+            await self._send_notification(
+                self._format_notification(
+                    domain,
+                    batch,
+                    summary["overflow"],
+                    summary["wildcard"],
+                    summary["unlisted"],
+                ),
+                slack,
+                telegram,
+            )
+
+        logger.info(
+            f"{domain}: resolved {summary['resolved']} of {len(new_subdomains)} "
+            f"new subdomains ({summary['unresolved']} unresolved, "
+            f"{summary['wildcard']} wildcard, {summary['overflow']} over budget)"
+        )
+        return summary
+
+    async def _record_history(
+        self, domain: str, results: List[Tuple[str, Optional[DNSRecord]]]
     ):
-        """Send notifications for new subdomains"""
-        if not new_subdomains:
+        """Store answers without letting a database error stop notifications"""
+        try:
+            await dns_history.record(domain, results)
+        except Exception as e:
+            logger.error(f"Failed to record DNS history for {domain}: {e}")
+
+    async def recheck_dns(self) -> dict:
+        """Re-resolve stored subdomains with expired answers, alerting on takeovers"""
+        return await dns_history.recheck(on_changes=self._check_changes)
+
+    async def _check_changes(self, changes: List[DnsChange]):
+        """Look for dangling CNAMEs among changed answers and alert per domain"""
+        if not takeover_detector.enabled:
             return
+        by_domain: Dict[str, List[Tuple[str, List[str]]]] = defaultdict(list)
+        for change in changes:
+            if change.current.get("CNAME"):
+                by_domain[change.domain].append(
+                    (change.subdomain, change.current["CNAME"])
+                )
 
-        # Resolve DNS for new subdomains
-        tasks = [self.resolve_dns(sub) for sub in new_subdomains[:10]]  # Limit to 10
-        dns_records = await asyncio.gather(*tasks)
+        for domain, cnames in by_domain.items():
+            takeovers = await takeover_detector.check(domain, cnames)
+            if not takeovers:
+                continue
+            existing = await repository.find_one(domain) or {}
+            await self._send_notification(
+                self._format_takeover_alert(domain, takeovers),
+                existing.get("notify_slack", False) and bool(settings.SLACK_WEBHOOK),
+                existing.get("notify_telegram", False)
+                and bool(settings.TELEGRAM_BOT_TOKEN),
+                alert=True,
+            )
 
-        # Filter out None results
-        valid_records = [record for record in dns_records if record]
+    async def _send_notification(
+        self, message: str, slack: bool, telegram: bool, alert: bool = False
+    ):
+        loop = asyncio.get_event_loop()
+        options = {"alert": True} if alert else {}
 
-        if valid_records:
-            loop = asyncio.get_event_loop()
+        if slack:
+            await loop.run_in_executor(
+                None, partial(self.notifications.slack, message, **options)
+            )
 
-            if notify_slack and settings.SLACK_WEBHOOK:
-                await loop.run_in_executor(
-                    None,
-                    self.notifications.slack,
-                    self._format_notification(domain, valid_records),
-                )
+        if telegram:
+            await loop.run_in_executor(
+                None, partial(self.notifications.telegram, message, **options)
+            )
 
-            if notify_telegram and settings.TELEGRAM_BOT_TOKEN:
-                await loop.run_in_executor(
-                    None,
-                    self.notifications.telegram,
-                    self._format_notification(domain, valid_records),
-                )
+    def _format_takeover_alert(self, domain: str, takeovers: List[Takeover]) -> str:
+        """Format high-priority takeover alert"""
+        message = f"Possible subdomain takeover for {domain}\n\n"
+        for takeover in takeovers:
+            message += (
+                f"• {takeover.subdomain} -> {takeover.cname}\n"
+                f"  {takeover.service}: {takeover.reason}\n"
+            )
+        return message
 
-    def _format_notification(self, domain: str, dns_records: List[DNSRecord]) -> str:
+    def _format_notification(
+        self,
+        domain: str,
+        dns_records: List[DNSRecord],
+        overflow: int = 0,
+        wildcard: int = 0,
+        unlisted: int = 0,
+    ) -> str:
         """Format notification message"""
         message = f"🔍 New subdomains found for {domain}\n\n"
         for record in dns_records:
             message += f"• {record.subdomain}\n"
-            if record.A:
-                message += f"  A: {', '.join(record.A)}\n"
-            if record.CNAME:
-                message += f"  CNAME: {', '.join(record.CNAME)}\n"
+            for rdtype in RECORD_TYPES:
+                values = getattr(record, rdtype)
+                if values:
+                    message += f"  {rdtype}: {', '.join(values)}\n"
+        if unlisted:
+            message += f"\n…and {unlisted} more resolved (over the message limit)\n"
+        if wildcard:
+            message += f"\n…and {wildcard} more matching a wildcard DNS record\n"
+        if overflow:
+            message += f"\n…and {overflow} more not resolved (over the run budget)\n"
         return message
 
     async def add_domain(
@@ -142,7 +330,9 @@ class MonitoringService:
             raise Exception("Domain already exists")
 
         # Discover subdomains
-        subdomains = await self.discover_subdomains(domain)
+        cursor = CrtshCursor()
+        discovery = await self.discover(domain, cursor=cursor)
+        subdomains = discovery.subdomains
 
         # Add to database
         domain_data = {
@@ -151,14 +341,38 @@ class MonitoringService:
             "notify_slack": notify_slack,
             "notify_telegram": notify_telegram,
         }
+        if self._crtsh_succeeded(discovery):
+            domain_data["crtsh_last_id"] = cursor.max_id
+            domain_data["crtsh_last_full_scan"] = datetime.utcnow()
 
         result = await repository.add_domain(domain_data)
         logger.info(f"Added domain {domain} with {len(subdomains)} subdomains")
 
         return result
 
-    async def monitor_domain(self, domain: str) -> int:
-        """Monitor single domain for new subdomains"""
+    def _crtsh_succeeded(self, discovery: DiscoveryResult) -> bool:
+        """A high-water mark may only advance after a complete crt.sh read"""
+        source = discovery.sources.get("crtsh")
+        return source is not None and source.ok
+
+    async def monitor_domain(self, domain: str, full_scan: bool = False) -> int:
+        """
+        Monitor single domain for new subdomains
+
+        crt.sh is queried incrementally from the stored high-water mark unless
+        full_scan is set or the periodic full rescan is due. A call made while
+        the same domain is already being monitored joins that run instead of
+        diffing and notifying a second time, unless it asks for a full scan
+        and the run is incremental.
+        """
+        if not full_scan and self.flights.in_flight(("monitor", domain, True)):
+            full_scan = True
+        return await self.flights.do(
+            ("monitor", domain, full_scan),
+            lambda: self._monitor_domain(domain, full_scan),
+        )
+
+    async def _monitor_domain(self, domain: str, full_scan: bool) -> int:
         logger.info(f"Monitoring {domain}")
 
         # Get existing domain
@@ -167,54 +381,193 @@ class MonitoringService:
             logger.warning(f"Domain {domain} not found")
             return 0
 
-        # Discover current subdomains
-        current_subdomains = await self.discover_subdomains(domain)
+        fingerprint = None
+        if settings.SUBDOMAIN_FINGERPRINTS:
+            fingerprint = await repository.find_fingerprint(domain)
+        diff = await self._diff_domain(domain, existing, full_scan, fingerprint)
 
-        # Find new subdomains
-        old_subdomains = set(existing.get("subdomains", []))
-        new_subdomains = list(current_subdomains - old_subdomains)
+        # Store candidate subdomains; those not stored before are new
+        new_subdomains = await repository.add_subdomains(
+            domain, diff.subdomains, fingerprint=diff.fingerprint, seen=diff.seen
+        )
 
         if new_subdomains:
-            # Update database
-            await repository.update_subdomains(domain, new_subdomains)
             logger.info(f"Found {len(new_subdomains)} new subdomains for {domain}")
 
             # Send notifications
             await self.notify_new_subdomains(
-                domain,
-                new_subdomains,
-                existing.get("notify_slack", False),
-                existing.get("notify_telegram", False),
+                domain, new_subdomains, diff.notify_slack, diff.notify_telegram
+            )
+
+        if diff.crtsh_last_id is not None:
+            await repository.update_crtsh_mark(
+                domain, diff.crtsh_last_id, full_scan=diff.crtsh_full_scan
             )
 
         return len(new_subdomains)
 
-    async def monitor_all_domains(self) -> dict:
-        """Monitor all domains in database"""
+    async def _diff_domain(
+        self,
+        domain: str,
+        existing: dict,
+        full_scan: bool,
+        fingerprint: Optional[SubdomainFingerprint] = None,
+    ) -> DomainDiff:
+        """
+        Discover the subdomains of a domain and the crt.sh mark to store
+
+        With the domain's fingerprint, only discovered names missing from it
+        are kept as candidates to confirm against storage, and the diff
+        carries the fingerprint extended with them. The other names are
+        carried as seen once every LAST_SEEN_INTERVAL_HOURS so their
+        last_seen still moves.
+        """
+        cursor = self._crtsh_cursor(existing, full_scan)
+        discovery = await self.discover(domain, cursor=cursor)
+        subdomains = list(discovery.subdomains)
+        extended = None
+        seen: List[str] = []
+        if fingerprint is not None:
+            candidates = fingerprint.missing(subdomains)
+            if candidates:
+                extended = fingerprint.add(candidates)
+            if self._last_seen_due(existing):
+                missing = set(candidates)
+                seen = [name for name in subdomains if name not in missing]
+            subdomains = candidates
+        diff = DomainDiff(
+            domain,
+            subdomains,
+            notify_slack=existing.get("notify_slack", False),
+            notify_telegram=existing.get("notify_telegram", False),
+            fingerprint=extended,
+            seen=seen,
+        )
+        # The mark is stored with, and so never ahead of, the subdomains
+        if self._crtsh_succeeded(discovery) and (
+            cursor.full_scan or cursor.max_id > cursor.after_id
+        ):
+            diff.crtsh_last_id = cursor.max_id
+            diff.crtsh_full_scan = cursor.full_scan
+        return diff
+
+    async def monitor_all_domains(self, full_scan: bool = False) -> dict:
+        """
+        Monitor all domains in database
+
+        Domains are streamed in batches of MONITOR_BATCH_SIZE, one keyset
+        query per batch, and monitored by MAX_WORKERS workers. Results go
+        through a write-behind buffer that stores them in bulk, so database
+        round trips follow the number of batches rather than the number of
+        domains; notifications for stored domains then run up to MAX_WORKERS
+        at once. Each domain is checked under the same single-flight key as
+        monitor_domain: a domain already being checked is skipped, and a
+        check triggered meanwhile joins the cycle's check of the domain.
+        """
         logger.info("Starting monitoring for all domains")
 
-        domains = await repository.get_all_domains_list()
-        logger.info(f"Monitoring {len(domains)} domains")
-
-        # Monitor domains concurrently with limit
-        semaphore = asyncio.Semaphore(settings.MAX_WORKERS)
-
-        async def monitor_with_semaphore(domain):
-            async with semaphore:
-                return await self.monitor_domain(domain)
+        summary = {"domains": 0, "new": 0, "errors": 0}
+        workers = max(settings.MAX_WORKERS, 1)
+        batch_size = max(settings.MONITOR_BATCH_SIZE, 1)
+        # (domain, document, fingerprint) items, then one None per worker
+        queue: "asyncio.Queue[Optional[tuple]]" = asyncio.Queue(maxsize=batch_size)
+
+        async def notify(diff: DomainDiff):
+            if not diff.new_subdomains:
+                return
+            summary["new"] += len(diff.new_subdomains)
+            logger.info(
+                f"Found {len(diff.new_subdomains)} new subdomains for {diff.domain}"
+            )
+            try:
+                await self.notify_new_subdomains(
+                    diff.domain,
+                    diff.new_subdomains,
+                    diff.notify_slack,
+                    diff.notify_telegram,
+                )
+            except Exception as e:
+                logger.error(f"Failed to notify for {diff.domain}: {e}")
 
-        tasks = [monitor_with_semaphore(domain) for domain in domains]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        writer = WriteBehind(on_stored=notify, concurrency=workers)
 
-        # Count successes
-        total_new = sum(r for r in results if isinstance(r, int))
-        errors = sum(1 for r in results if isinstance(r, Exception))
+        async def prefetch():
+            try:
+                async for docs in repository.iter_domain_batches(
+                    batch_size, projection={"subdomains": 0}
+                ):
+                    summary["domains"] += len(docs)
+                    fingerprints = {}
+                    if settings.SUBDOMAIN_FINGERPRINTS:
+                        fingerprints = await repository.find_fingerprints(
+                            [doc["domain"] for doc in docs]
+                        )
+                    for doc in docs:
+                        domain = doc["domain"]
+                        await queue.put((domain, doc, fingerprints.get(domain)))
+            except Exception as e:
+                logger.error(f"Reading domains failed: {e}")
+                summary["errors"] += 1
+            finally:
+                for _ in range(workers):
+                    await queue.put(None)
+
+        checks: Set[asyncio.Future] = set()
+
+        async def check(domain, existing, fingerprint, queued) -> int:
+            # Returns once stored and notified, like _monitor_domain
+            try:
+                diff = await self._diff_domain(domain, existing, full_scan, fingerprint)
+            except Exception as e:
+                logger.error(f"Monitoring {domain} failed: {e}")
+                summary["errors"] += 1
+                queued.set_result(None)
+                raise
+            diff.done = asyncio.get_running_loop().create_future()
+            try:
+                await writer.put(diff)
+            finally:
+                queued.set_result(None)
+            return await diff.done
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                domain, existing, fingerprint = item
+                key = ("monitor", domain, full_scan)
+                if self.flights.in_flight(key) or self.flights.in_flight(
+                    ("monitor", domain, True)
+                ):
+                    logger.info(f"{domain} is already being monitored, skipped")
+                    continue
+                queued = asyncio.get_running_loop().create_future()
+                task = asyncio.ensure_future(
+                    self.flights.do(
+                        key, partial(check, domain, existing, fingerprint, queued)
+                    )
+                )
+                checks.add(task)
+                # Move on once the diff is buffered, not once it is stored
+                await asyncio.wait({queued, task}, return_when=asyncio.FIRST_COMPLETED)
 
-        logger.info(f"Monitoring complete: {total_new} new subdomains, {errors} errors")
+        try:
+            await asyncio.gather(prefetch(), *(worker() for _ in range(workers)))
+        finally:
+            await writer.close()
+            await asyncio.gather(*checks, return_exceptions=True)
+        errors = summary["errors"] + writer.failed
+
+        logger.info(
+            f"Monitoring complete: {summary['domains']} domains, "
+            f"{summary['new']} new subdomains, {errors} errors "
+            f"({writer.flushes} database flushes)"
+        )
 
         return {
-            "domains_monitored": len(domains),
-            "new_subdomains_found": total_new,
+            "domains_monitored": summary["domains"],
+            "new_subdomains_found": summary["new"],
             "errors": errors,
             "timestamp": datetime.utcnow(),
         }
@@ -0,0 +1,127 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.core.config import settings
+
+
+@dataclass
+class NameserverStats:
+    """Health of one upstream nameserver"""
+
+    address: str
+    latency: Optional[float] = None
+    queries: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    @property
+    def score(self) -> float:
+        # Unmeasured servers score best so they get sampled
+        return self.latency if self.latency is not None else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": (
+                round(self.latency * 1000, 1) if self.latency is not None else None
+            ),
+            "queries": self.queries,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "error_rate": round(self.errors / self.queries, 4) if self.queries else 0.0,
+            "healthy": self.healthy,
+            "ejections": self.ejections,
+            "ejected_for": round(max(self.ejected_until - time.monotonic(), 0.0), 1),
+        }
+
+
+class NameserverManager:
+    """
+    Latency-aware nameserver selection
+
+    Tracks an EWMA of the response time, errors and timeouts of every
+    nameserver. Queries go to the faster of two random healthy servers, so
+    load favours fast servers while slower ones keep being measured. A
+    server failing DNS_EJECT_FAILURES times in a row is ejected for
+    DNS_EJECT_SECONDS; after that a single further failure ejects it again.
+    """
+
+    def __init__(
+        self,
+        addresses: Iterable[str],
+        alpha: Optional[float] = None,
+        eject_failures: Optional[int] = None,
+        eject_seconds: Optional[float] = None,
+    ):
+        self.servers: Dict[str, NameserverStats] = {
+            address: NameserverStats(address) for address in addresses
+        }
+        self.alpha = alpha if alpha is not None else settings.DNS_LATENCY_ALPHA
+        self.eject_failures = (
+            eject_failures
+            if eject_failures is not None
+            else settings.DNS_EJECT_FAILURES
+        )
+        self.eject_seconds = (
+            eject_seconds if eject_seconds is not None else settings.DNS_EJECT_SECONDS
+        )
+
+    def choose(self, exclude: Iterable[str] = ()) -> str:
+        """Pick the nameserver for the next query"""
+        excluded = set(exclude)
+        candidates = [
+            server
+            for address, server in self.servers.items()
+            if address not in excluded
+        ] or list(self.servers.values())
+        healthy = [server for server in candidates if server.healthy]
+        if not healthy:
+            # Everything is ejected; try the one coming back first
+            return min(candidates, key=lambda server: server.ejected_until).address
+        if len(healthy) == 1:
+            return healthy[0].address
+        first, second = random.sample(healthy, 2)
+        return (first if first.score <= second.score else second).address
+
+    def _observe(self, server: NameserverStats, elapsed: float):
+        server.queries += 1
+        if server.latency is None:
+            server.latency = elapsed
+        else:
+            server.latency += self.alpha * (elapsed - server.latency)
+
+    def success(self, address: str, elapsed: float):
+        server = self.servers[address]
+        self._observe(server, elapsed)
+        server.consecutive_failures = 0
+
+    def failure(self, address: str, elapsed: float, timeout: bool = False):
+        server = self.servers[address]
+        self._observe(server, elapsed)
+        server.errors += 1
+        if timeout:
+            server.timeouts += 1
+        server.consecutive_failures += 1
+        if server.consecutive_failures >= self.eject_failures and server.healthy:
+            server.ejected_until = time.monotonic() + self.eject_seconds
+            server.ejections += 1
+
+    def ranked(self) -> List[str]:
+        """Healthy nameservers from fastest to slowest, then ejected ones"""
+        return [
+            server.address
+            for server in sorted(
+                self.servers.values(), key=lambda s: (not s.healthy, s.score)
+            )
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {address: self.servers[address].as_dict() for address in self.ranked()}
@@ -0,0 +1,106 @@
+import re
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, Optional, Pattern, Set, Tuple
+
+# Hostname label; underscores are allowed for service names such as _dmarc
+_LABEL = r"[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?"
+
+# Any hostname whose last label is not all digits, so IPv4 addresses never match
+_ANY_HOSTNAME = (
+    rf"(?:{_LABEL}\.)+(?!\d+(?:\.?[ \t\r]*)$)[a-z0-9](?:[a-z0-9-]{{0,61}}[a-z0-9])?"
+)
+
+# Lines holding non-ASCII characters are IDNs to convert to punycode
+_NON_ASCII_LINE = re.compile(r"^[^\n]*[^\x00-\x7f][^\n]*$", re.MULTILINE)
+
+
+def to_ascii(name: str) -> Optional[str]:
+    """Convert an internationalized name to its punycode form"""
+    try:
+        return name.strip().encode("idna").decode("ascii")
+    except UnicodeError:
+        return None
+
+
+def normalize_domain(domain: str) -> str:
+    """Normalize a monitored domain the same way as discovered names"""
+    domain = domain.strip().lower().rstrip(".")
+    if not domain.isascii():
+        domain = to_ascii(domain) or domain
+    return domain
+
+
+@lru_cache(maxsize=1024)
+def _names_pattern(domain: Optional[str]) -> Pattern:
+    """One line per name; captures valid names, optionally limited to a domain"""
+    if domain:
+        name = rf"(?:{_LABEL}\.)*{re.escape(domain)}"
+    else:
+        name = _ANY_HOSTNAME
+    return re.compile(rf"^[ \t\r]*({name})\.?[ \t\r]*$", re.MULTILINE)
+
+
+def normalize_names(values: Iterable[str], domain: Optional[str] = None) -> Set[str]:
+    """
+    Normalize a batch of raw names from discovery sources
+
+    Values may hold several newline separated names (crt.sh name_value).
+    Names are lowercased, wildcard prefixes are stripped, IDNs are converted
+    to punycode, IPs and invalid names are dropped and, when a domain is
+    given, only the domain itself and its subdomains are kept. The batch is
+    deduplicated and joined into one text, prefiltered on the domain suffix
+    and matched with a single precompiled pattern, so the per-name work
+    happens in C rather than in a Python loop.
+    """
+    text = "\n".join(set(values)).lower()
+    if "*." in text:
+        text = text.replace("*.", "")
+    if "@" in text:
+        text = text.replace("@", ".")
+    if not text.isascii():
+        converted = filter(None, map(to_ascii, _NON_ASCII_LINE.findall(text)))
+        text = "\n".join((text, *converted))
+
+    if domain:
+        domain = normalize_domain(domain)
+        suffix = "." + domain
+        names = set(text.split("\n"))
+        in_scope = [name for name in names if name.endswith(suffix)]
+        if domain in names:
+            in_scope.append(domain)
+        # Keep names with a trailing dot or whitespace for the pattern to clean
+        in_scope.extend(name for name in names if name[-1:] in (".", " ", "\r", "\t"))
+        text = "\n".join(in_scope)
+
+    return set(_names_pattern(domain or None).findall(text))
+
+
+def normalize_entries(entries: Dict[Hashable, str]) -> Dict[Hashable, Tuple[str, ...]]:
+    """
+    Normalize a batch of entries while keeping names grouped per entry
+
+    Valid names are computed once for the whole batch; each entry then only
+    intersects its split names with that set. Entries with IDNs or trailing
+    dots fall back to normalize_names.
+    """
+    valid = normalize_names(entries.values())
+    parsed = {}
+    for key, value in entries.items():
+        raw = value.lower()
+        if "*." in raw:
+            raw = raw.replace("*.", "")
+        if "@" in raw:
+            raw = raw.replace("@", ".")
+        if raw.isascii() and not raw.endswith(".") and ".\n" not in raw:
+            names = valid.intersection(raw.split())
+        else:
+            names = normalize_names([value])
+        parsed[key] = tuple(names)
+    return parsed
+
+
+def filter_scope(names: Iterable[str], domain: str) -> Set[str]:
+    """Keep normalized names equal to the domain or under it"""
+    domain = normalize_domain(domain)
+    suffix = "." + domain
+    return {name for name in names if name.endswith(suffix) or name == domain}
@@ -1,12 +1,16 @@
+import logging
+
 from requests import post
 
 from src.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class Notifications:
     headers = {"Content-Type": "application/json"}
 
-    def telegrame(self, message):
+    def telegram(self, message, alert=False):
         """Send message to Telegram"""
 
         telegramUrl = (
@@ -14,7 +18,7 @@ class Notifications:
         )
 
         params = {
-            "text": f"🆕 {message}",
+            "text": f"🚨 {message}" if alert else f"🆕 {message}",
             "chat_id": settings.TELEGRAM_CHAT_ID,
             "parse_mode": "Markdown",
         }
@@ -22,20 +26,22 @@ class Notifications:
         req = post(url=telegramUrl, params=params, headers=self.headers)
 
         if req.status_code == 429:
-            self.logger.error(f"Api Rate limit: {req.status_code} {req.json()}")
+            logger.error(f"Api Rate limit: {req.status_code} {req.text}")
 
         if req.status_code != 200:
-            self.logger.error(f"{req.status_code} {req.json()}")
+            logger.error(f"{req.status_code} {req.text}")
 
-    def slack(self, message):
+    def slack(self, message, alert=False):
         """send message to slack"""
 
-        data = {"text": f":new: {message}"}
+        # Alerts notify the whole channel
+        prefix = ":rotating_light: <!channel>" if alert else ":new:"
+        data = {"text": f"{prefix} {message}"}
 
         req = post(url=settings.SLACK_WEBHOOK, json=data, headers=self.headers)
 
         if req.status_code == 429:
-            self.logger.error(f"Api Rate limit: {req.status_code} {req.json()}")
+            logger.error(f"Api Rate limit: {req.status_code} {req.text}")
 
         if req.status_code != 200:
-            self.logger.error(f"{req.status_code} {req.json()}")
+            logger.error(f"{req.status_code} {req.text}")
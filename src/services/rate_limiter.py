@@ -0,0 +1,199 @@
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from src.core.config import settings
+from src.core.exceptions import RateLimitedException
+
+# time.monotonic() deadline of the work the current requests belong to
+request_deadline: ContextVar[Optional[float]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+class TokenBucket:
+    """
+    Token bucket with adaptive rate
+
+    The rate is halved every time the upstream throttles us and recovers
+    additively on success (AIMD), and the bucket can be paused until a
+    Retry-After deadline. A caller with a deadline the expected wait would
+    overrun is turned away at once instead of queueing.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = rate / 16
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def expected_wait(self, now: float) -> float:
+        """Seconds a new waiter would wait behind the ones already queued"""
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        missing = self.waiting + 1 - tokens
+        return max(self.blocked_until - now, 0.0) + max(missing, 0.0) / self.rate
+
+    async def acquire(self, deadline: Optional[float] = None) -> float:
+        """
+        Wait for a token and return the time spent waiting
+
+        Raises RateLimitedException without waiting when the token is not
+        expected before deadline, a time.monotonic() value.
+        """
+        started = time.monotonic()
+        if deadline is not None:
+            wait = self.expected_wait(started)
+            if started + wait > deadline:
+                self.rejected += 1
+                raise RateLimitedException(
+                    f"Token expected in {wait:.1f}s, "
+                    f"{max(deadline - started, 0):.1f}s left"
+                )
+        self.waiting += 1
+        try:
+            # Waiters queue on the lock so tokens are handed out in FIFO order
+            async with self._get_lock():
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self.blocked_until - now
+                    if delay <= 0:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            break
+                        delay = (1 - self.tokens) / self.rate
+                    await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.waited += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def throttle(self, delay: float):
+        """Pause the bucket for delay seconds and slow it down"""
+        self.throttled += 1
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self.rate = max(self.min_rate, self.rate / 2)
+
+    def success(self):
+        """Recover towards the configured rate"""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 4),
+            "max_rate": self.max_rate,
+            "burst": self.burst,
+            "requests": self.acquired,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "wait_total": round(self.waited, 3),
+            "wait_max": round(self.max_wait, 3),
+            "wait_avg": round(self.waited / self.acquired, 3) if self.acquired else 0,
+        }
+
+
+class RateLimiter:
+    """Per-source token buckets configured from settings"""
+
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.retries: Dict[str, int] = {}
+
+    def bucket(self, source: str) -> TokenBucket:
+        bucket = self._buckets.get(source)
+        if bucket is None:
+            bucket = TokenBucket(
+                settings.SOURCE_RATE_LIMITS.get(source, settings.DEFAULT_RATE_LIMIT),
+                settings.SOURCE_BURSTS.get(source, settings.DEFAULT_BURST),
+            )
+            self._buckets[source] = bucket
+        return bucket
+
+    async def acquire(self, source: str, deadline: Optional[float] = None) -> float:
+        """
+        Wait for a token of source
+
+        With a deadline the wait is also capped at RATE_LIMIT_MAX_WAIT, so a
+        slow source is skipped rather than holding up the work it is part of.
+        """
+        if deadline is not None and settings.RATE_LIMIT_MAX_WAIT > 0:
+            deadline = min(deadline, time.monotonic() + settings.RATE_LIMIT_MAX_WAIT)
+        return await self.bucket(source).acquire(deadline)
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay before the next attempt, honoring Retry-After when present"""
+        delay = parse_retry_after(retry_after)
+        if delay is not None:
+            # Spread clients released by the same deadline
+            return min(delay, settings.HTTP_BACKOFF_MAX) + random.uniform(0, 1)
+        ceiling = min(
+            settings.HTTP_BACKOFF_MAX, settings.HTTP_BACKOFF_BASE * 2**attempt
+        )
+        return random.uniform(ceiling / 2, ceiling)
+
+    def throttle(self, source: str, delay: float):
+        self.retries[source] = self.retries.get(source, 0) + 1
+        self.bucket(source).throttle(delay)
+
+    def success(self, source: str):
+        self.bucket(source).success()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            source: {**bucket.stats(), "retries": self.retries.get(source, 0)}
+            for source, bucket in self._buckets.items()
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
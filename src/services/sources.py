@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from src.core.config import settings
+from src.core.exceptions import RateLimitedException
+from src.services.discovery_cache import DiscoveryCache
+from src.services.normalizer import normalize_names
+from src.services.rate_limiter import request_deadline
+
+logger = logging.getLogger(__name__)
+
+SourceFetch = Callable[..., Awaitable[Iterable[str]]]
+
+
+@dataclass
+class SourceResult:
+    """Outcome of a single discovery source for a domain"""
+
+    name: str
+    subdomains: Set[str] = field(default_factory=set)
+    latency: float = 0.0
+    error: Optional[str] = None
+    timed_out: bool = False
+    # Skipped because the source's rate limit would outlast its timeout
+    rate_limited: bool = False
+    cached: bool = False
+
+    @property
+    def count(self) -> int:
+        return len(self.subdomains)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class DiscoveryResult:
+    """Merged outcome of all discovery sources for a domain"""
+
+    domain: str
+    subdomains: Set[str] = field(default_factory=set)
+    sources: Dict[str, SourceResult] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> List[str]:
+        return [name for name, result in self.sources.items() if not result.ok]
+
+
+@dataclass
+class DiscoverySource:
+    """Registered discovery provider"""
+
+    name: str
+    fetch: SourceFetch
+    timeout: Optional[float] = None
+    enabled: bool = True
+
+
+class SourceRegistry:
+    """Registry of discovery providers queried concurrently per domain"""
+
+    def __init__(self, cache: Optional[DiscoveryCache] = None):
+        self._sources: Dict[str, DiscoverySource] = {}
+        self.cache = cache
+
+    def register(
+        self,
+        name: str,
+        fetch: SourceFetch,
+        timeout: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        """Register a provider; fetch(domain, **options) returns subdomain names"""
+        self._sources[name] = DiscoverySource(name, fetch, timeout, enabled)
+
+    def unregister(self, name: str):
+        """Remove a provider"""
+        self._sources.pop(name, None)
+
+    def get(self, name: str) -> Optional[DiscoverySource]:
+        return self._sources.get(name)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._sources)
+
+    def enabled(self) -> List[DiscoverySource]:
+        """Providers that are enabled both at registration and in settings"""
+        allowed = set(settings.DISCOVERY_SOURCES)
+        return [
+            source
+            for source in self._sources.values()
+            if source.enabled and source.name in allowed
+        ]
+
+    def timeout_for(self, source: DiscoverySource) -> float:
+        if source.timeout is not None:
+            return source.timeout
+        return settings.DISCOVERY_SOURCE_TIMEOUTS.get(
+            source.name, settings.DISCOVERY_TIMEOUT
+        )
+
+    async def discover(
+        self,
+        domain: str,
+        options: Optional[Dict[str, Dict[str, Any]]] = None,
+        use_cache: bool = True,
+        partial: Iterable[str] = (),
+    ) -> DiscoveryResult:
+        """
+        Run every enabled provider concurrently and merge their results
+
+        With use_cache disabled cached results are ignored, but fresh results
+        still refresh the cache. Sources named in partial return only part of
+        the domain's subdomains this run (such as an incremental crt.sh
+        fetch), so they are neither served from nor stored in the cache.
+        """
+        options = options or {}
+        partial = set(partial)
+        sources = self.enabled()
+        results = await asyncio.gather(
+            *(
+                self._run(
+                    source,
+                    domain,
+                    options.get(source.name, {}),
+                    use_cache,
+                    cacheable=source.name not in partial,
+                )
+                for source in sources
+            )
+        )
+
+        discovery = DiscoveryResult(domain=domain)
+        for result in results:
+            discovery.sources[result.name] = result
+            discovery.subdomains.update(result.subdomains)
+        return discovery
+
+    async def _run(
+        self,
+        source: DiscoverySource,
+        domain: str,
+        options: Dict[str, Any],
+        use_cache: bool = True,
+        cacheable: bool = True,
+    ) -> SourceResult:
+        result = SourceResult(name=source.name)
+        started = time.perf_counter()
+        cache = self.cache if cacheable else None
+
+        if cache is not None and use_cache:
+            cached = await cache.get(source.name, domain)
+            if cached is not None:
+                result.subdomains = set(cached)
+                result.cached = True
+                result.latency = time.perf_counter() - started
+                return result
+
+        timeout = self.timeout_for(source)
+        # Lets the rate limiter turn requests away instead of holding the domain
+        deadline = request_deadline.set(time.monotonic() + timeout)
+        try:
+            names = await asyncio.wait_for(
+                source.fetch(domain, **options), timeout=timeout
+            )
+            result.subdomains = normalize_names(names or [], domain)
+            if cache is not None:
+                await cache.set(source.name, domain, result.subdomains)
+        except asyncio.TimeoutError:
+            result.timed_out = True
+            result.error = "timeout"
+            logger.warning(f"Source {source.name} timed out for {domain}")
+        except RateLimitedException as e:
+            result.rate_limited = True
+            result.error = "rate_limited"
+            logger.info(f"Source {source.name} skipped for {domain}: {e}")
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+            logger.warning(f"Source {source.name} failed for {domain}: {e}")
+        finally:
+            request_deadline.reset(deadline)
+        result.latency = time.perf_counter() - started
+
+        logger.debug(
+            f"Source {source.name} returned {result.count} subdomains "
+            f"for {domain} in {result.latency:.2f}s"
+        )
+        return result
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.core.config import settings
+from src.services.dns_resolver import DnsResolver, dns_resolver
+from src.services.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+# Fingerprints shipped with the application
+DEFAULT_FINGERPRINTS = Path(__file__).with_name("takeover_fingerprints.json")
+
+# Trie key holding the fingerprint of the suffix ending at a node
+_MATCH = ""
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """Third-party service whose deprovisioned resources can be claimed"""
+
+    service: str
+    cname: Tuple[str, ...]
+    # Response body text served for an unclaimed resource
+    http: Optional[str] = None
+
+
+@dataclass
+class Takeover:
+    """Subdomain whose CNAME points at an unclaimed resource"""
+
+    subdomain: str
+    domain: str
+    cname: str
+    service: str
+    reason: str
+
+
+class FingerprintTable:
+    """
+    Fingerprints indexed by reversed CNAME suffix
+
+    Suffixes are stored in a trie of nested dicts keyed by label from the
+    TLD down, so matching a target walks its labels once whatever the size
+    of the table; the longest matching suffix wins.
+    """
+
+    def __init__(self, fingerprints: Iterable[Fingerprint] = ()):
+        self._root: Dict[str, Any] = {}
+        self.fingerprints: List[Fingerprint] = []
+        for fingerprint in fingerprints:
+            self.add(fingerprint)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "FingerprintTable":
+        """Load a JSON list of {service, cname: [suffixes], http} entries"""
+        with open(path or DEFAULT_FINGERPRINTS, encoding="utf-8") as f:
+            entries = json.load(f)
+        return cls(
+            Fingerprint(entry["service"], tuple(entry["cname"]), entry.get("http"))
+            for entry in entries
+        )
+
+    def add(self, fingerprint: Fingerprint):
+        self.fingerprints.append(fingerprint)
+        for suffix in fingerprint.cname:
+            node = self._root
+            for label in reversed(suffix.lower().strip(".").split(".")):
+                node = node.setdefault(label, {})
+            node[_MATCH] = fingerprint
+
+    def match(self, target: str) -> Optional[Fingerprint]:
+        """Fingerprint of the longest suffix strictly above target"""
+        labels = target.lower().rstrip(".").split(".")
+        node = self._root
+        found = None
+        # The last label is left out: a bare service domain is not a resource
+        for label in reversed(labels[1:]):
+            node = node.get(label)
+            if node is None:
+                break
+            found = node.get(_MATCH, found)
+        return found
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+
+class TakeoverDetector:
+    """
+    Dangling CNAME detection
+
+    CNAME targets are matched against the fingerprint table, which is cheap
+    enough to run on every resolved name. Only matching targets are
+    confirmed, with bounded concurrency: a target that does not exist is
+    dangling for any service, and services with an HTTP fingerprint are
+    also confirmed by the body served for the subdomain.
+    """
+
+    def __init__(
+        self,
+        table: Optional[FingerprintTable] = None,
+        resolver: Optional[DnsResolver] = None,
+    ):
+        self._table = table
+        self.resolver = resolver or dns_resolver
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.scanned = 0
+        self.candidates = 0
+        self.confirmed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.TAKEOVER_DETECTION
+
+    @property
+    def table(self) -> FingerprintTable:
+        if self._table is None:
+            self._table = FingerprintTable.load(settings.TAKEOVER_FINGERPRINTS_PATH)
+            logger.info(f"Loaded {len(self._table)} takeover fingerprints")
+        return self._table
+
+    def match(
+        self, subdomain: str, cnames: Optional[List[str]]
+    ) -> Optional[Tuple[str, Fingerprint]]:
+        """First CNAME target of a subdomain matching a fingerprint"""
+        self.scanned += 1
+        for target in cnames or ():
+            fingerprint = self.table.match(target)
+            if fingerprint is not None:
+                self.candidates += 1
+                return target.rstrip(".").lower(), fingerprint
+        return None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(settings.TAKEOVER_CONCURRENCY)
+            self._loop = loop
+        return self._semaphore
+
+    async def confirm(
+        self, subdomain: str, domain: str, target: str, fingerprint: Fingerprint
+    ) -> Optional[Takeover]:
+        """Check whether a matched target is actually unclaimed"""
+        async with self._get_semaphore():
+            if await self.resolver.nxdomain(target):
+                reason = f"{target} does not exist"
+            elif fingerprint.http and await self._http_matches(
+                subdomain, fingerprint.http
+            ):
+                reason = f"serves '{fingerprint.http}'"
+            else:
+                return None
+        self.confirmed += 1
+        logger.warning(
+            f"Possible subdomain takeover: {subdomain} -> {target} "
+            f"({fingerprint.service}, {reason})"
+        )
+        return Takeover(subdomain, domain, target, fingerprint.service, reason)
+
+    async def _http_matches(self, subdomain: str, marker: str) -> bool:
+        for scheme in ("https", "http"):
+            try:
+                response = await http_client.client.get(
+                    f"{scheme}://{subdomain}/", timeout=settings.TAKEOVER_HTTP_TIMEOUT
+                )
+            except Exception as e:
+                logger.debug(f"Takeover check of {scheme}://{subdomain} failed: {e}")
+                continue
+            return marker in response.text
+        return False
+
+    async def check(
+        self, domain: str, names: Iterable[Tuple[str, Optional[List[str]]]]
+    ) -> List[Takeover]:
+        """Match (subdomain, CNAME targets) pairs and confirm the candidates"""
+        tasks = []
+        for subdomain, cnames in names:
+            candidate = self.match(subdomain, cnames)
+            if candidate is not None:
+                tasks.append(self.confirm(subdomain, domain, *candidate))
+        if not tasks:
+            return []
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return [result for result in results if isinstance(result, Takeover)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fingerprints": len(self.table),
+            "scanned": self.scanned,
+            "candidates": self.candidates,
+            "confirmed": self.confirmed,
+        }
+
+
+# Global takeover detector instance
+takeover_detector = TakeoverDetector()
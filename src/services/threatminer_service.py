@@ -1,4 +1,5 @@
-from requests import get
+from src.core.config import settings
+from src.services.http_client import http_client
 
 
 class Threatminer:
@@ -7,11 +8,11 @@ class Threatminer:
 
     """
 
-    def get_subdomains(self, domain):
+    async def get_subdomains(self, domain):
         """get subdomains from Threatminer API"""
 
-        url = f"https://api.threatminer.org/v2/domain.php?q={domain}&rt=5"
-        res = get(url=url, timeout=30, verify=True)
+        url = f"{settings.THREATMINER_BASE_URL}/v2/domain.php?q={domain}&rt=5"
+        res = await http_client.send("threatminer", "GET", url, timeout=30)
         res.raise_for_status()
         resp = res.json()
         if resp.get("results") is not None:
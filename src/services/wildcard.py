@@ -0,0 +1,112 @@
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from src.core.config import settings
+from src.services.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from src.services.dns_resolver import DnsResolver
+
+logger = logging.getLogger(__name__)
+
+
+def parent_zone(name: str) -> Optional[str]:
+    """Zone a wildcard record for name would live in, None for TLDs"""
+    labels = name.lower().rstrip(".").split(".")
+    if len(labels) < 3:
+        return None
+    return ".".join(labels[1:])
+
+
+class WildcardDetector:
+    """
+    Wildcard DNS detection per parent zone
+
+    A zone is probed by resolving a few random labels under it; when they
+    all resolve, the union of their addresses is the zone's wildcard
+    fingerprint. Fingerprints (and negative results) are cached for
+    WILDCARD_TTL, and concurrent probes of a zone share one lookup.
+    """
+
+    def __init__(
+        self,
+        resolver: "DnsResolver",
+        probes: Optional[int] = None,
+        ttl: Optional[int] = None,
+        max_zones: int = 10000,
+    ):
+        self.resolver = resolver
+        self.probes = probes if probes is not None else settings.WILDCARD_PROBES
+        self.ttl = ttl if ttl is not None else settings.WILDCARD_TTL
+        self.max_zones = max_zones
+        self._zones: "OrderedDict[str, Tuple[float, Optional[FrozenSet[str]]]]" = (
+            OrderedDict()
+        )
+        self.flights = SingleFlight()
+        self.probed = 0
+        self.matched = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.WILDCARD_DETECTION and self.probes > 0
+
+    async def fingerprint(self, name: str) -> Optional[FrozenSet[str]]:
+        """Wildcard addresses of the zone above name, or None"""
+        zone = parent_zone(name)
+        if zone is None or not self.enabled:
+            return None
+        cached = self._zones.get(zone)
+        if cached is not None and time.monotonic() < cached[0]:
+            self._zones.move_to_end(zone)
+            return cached[1]
+        return await self.flights.do(zone, lambda: self._probe(zone))
+
+    async def _probe(self, zone: str) -> Optional[FrozenSet[str]]:
+        self.probed += 1
+        addresses = set()
+        try:
+            for _ in range(self.probes):
+                label = secrets.token_hex(8)
+                answers = await self.resolver.query(f"{label}.{zone}", "A")
+                if not answers:
+                    addresses = None
+                    break
+                addresses.update(answers)
+        except Exception as e:
+            # Not cached, so the zone is probed again on the next lookup
+            logger.debug(f"Wildcard probe failed for {zone}: {e}")
+            return None
+
+        fingerprint = frozenset(addresses) if addresses else None
+        if fingerprint:
+            logger.info(f"Wildcard DNS detected for *.{zone}: {sorted(fingerprint)}")
+
+        self._zones[zone] = (time.monotonic() + self.ttl, fingerprint)
+        self._zones.move_to_end(zone)
+        while len(self._zones) > self.max_zones:
+            self._zones.popitem(last=False)
+        return fingerprint
+
+    def matches(
+        self, fingerprint: Optional[FrozenSet[str]], addresses: Iterable[str]
+    ) -> bool:
+        """Whether a name's addresses are all served by the zone wildcard"""
+        addresses = set(addresses or ())
+        if not fingerprint or not addresses or not addresses <= fingerprint:
+            return False
+        self.matched += 1
+        return True
+
+    def clear(self):
+        self._zones.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "zones": len(self._zones),
+            "wildcard_zones": sum(1 for _, value in self._zones.values() if value),
+            "probed": self.probed,
+            "matched": self.matched,
+        }
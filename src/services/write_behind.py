@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional, Set
+
+from src.core.config import settings
+from src.db.fingerprint import SubdomainFingerprint
+from src.db.repository import repository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DomainDiff:
+    """Result of monitoring one domain, waiting to be stored"""
+
+    domain: str
+    # Subdomains discovered this run that may not be stored yet
+    subdomains: List[str]
+    notify_slack: bool = False
+    notify_telegram: bool = False
+    # crt.sh high-water mark to advance to once the subdomains are stored
+    crtsh_last_id: Optional[int] = None
+    crtsh_full_scan: bool = False
+    # Fingerprint including subdomains, stored once they are
+    fingerprint: Optional[SubdomainFingerprint] = None
+    # Stored subdomains discovered again whose last_seen is due to move
+    seen: List[str] = field(default_factory=list)
+    # Filled in by the flush
+    new_subdomains: List[str] = field(default_factory=list)
+    # Set for callers waiting on the diff: resolved with the number of new
+    # subdomains once stored and handled, or with the flush error
+    done: Optional["asyncio.Future[int]"] = None
+
+
+class WriteBehind:
+    """
+    Buffer of domain diffs flushed to the repository in bulk
+
+    A flush happens when max_domains diffs are buffered or max_delay
+    seconds after the first diff entered an empty buffer, whichever comes
+    first, and once more on close. Each flush is one save_domain_batch
+    call, one at a time, so a full buffer holds producers back only while
+    the previous batch is written. on_stored is then started for every
+    stored diff, whose new_subdomains are set, outside the flush and at
+    most concurrency (MAX_WORKERS) at once; close waits for them. A failed
+    flush is logged and its diffs are counted in failed. The done future of
+    a diff, if any, is resolved once it is handled or failed.
+    """
+
+    def __init__(
+        self,
+        on_stored: Optional[Callable[[DomainDiff], Awaitable]] = None,
+        max_domains: Optional[int] = None,
+        max_delay: Optional[float] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.on_stored = on_stored
+        self.max_domains = max(
+            max_domains
+            if max_domains is not None
+            else settings.WRITE_BEHIND_MAX_DOMAINS,
+            1,
+        )
+        self.max_delay = (
+            max_delay if max_delay is not None else settings.WRITE_BEHIND_MAX_DELAY
+        )
+        self._buffer: List[DomainDiff] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._handlers = asyncio.Semaphore(
+            max(concurrency if concurrency is not None else settings.MAX_WORKERS, 1)
+        )
+        self._pending: Set[asyncio.Task] = set()
+        self.flushes = 0
+        self.stored = 0
+        self.failed = 0
+
+    async def put(self, diff: DomainDiff):
+        self._buffer.append(diff)
+        if len(self._buffer) >= self.max_domains:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_delay)
+        # Past this point the flush is no longer cancelled
+        self._timer = None
+        await self.flush()
+
+    def _cancel_timer(self):
+        timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+
+    async def flush(self):
+        async with self._lock:
+            self._cancel_timer()
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            try:
+                new = await repository.save_domain_batch(
+                    [
+                        {
+                            "domain": diff.domain,
+                            "subdomains": diff.subdomains,
+                            "crtsh_last_id": diff.crtsh_last_id,
+                            "crtsh_full_scan": diff.crtsh_full_scan,
+                            "fingerprint": diff.fingerprint,
+                            "seen": diff.seen,
+                        }
+                        for diff in batch
+                    ]
+                )
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Failed to store {len(batch)} domains: {e}")
+                for diff in batch:
+                    if diff.done is not None and not diff.done.done():
+                        diff.done.set_exception(e)
+                return
+            self.flushes += 1
+            self.stored += len(batch)
+            for diff in batch:
+                diff.new_subdomains = new.get(diff.domain, [])
+                if self.on_stored is not None:
+                    task = asyncio.ensure_future(self._handle(diff))
+                    self._pending.add(task)
+                    task.add_done_callback(self._pending.discard)
+                else:
+                    self._resolve(diff)
+
+    async def _handle(self, diff: DomainDiff):
+        async with self._handlers:
+            try:
+                await self.on_stored(diff)
+            except Exception as e:
+                logger.error(f"Failed to handle stored domain {diff.domain}: {e}")
+            finally:
+                self._resolve(diff)
+
+    def _resolve(self, diff: DomainDiff):
+        if diff.done is not None and not diff.done.done():
+            diff.done.set_result(len(diff.new_subdomains))
+
+    async def close(self):
+        """Flush whatever is buffered and wait for every on_stored call"""
+        await self.flush()
+        while self._pending:
+            await asyncio.gather(*list(self._pending))
@@ -0,0 +1,173 @@
+"""
+Local stub DNS server for resolver tests and benchmarks
+
+Answers A queries with a fixed address (or per-name overrides), follows
+configured CNAMEs, returns NXDOMAIN for names starting with the NXDOMAIN
+prefix and an empty NOERROR answer otherwise. Responses are encoded by
+hand so the server is not the bottleneck of a benchmark.
+
+Usage:
+    python -m src.standin.dns_server --port 5353
+"""
+import argparse
+import random
+import socket
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+
+_HEADER = struct.Struct("!HHHHHH")
+_RR = struct.Struct("!HHIH")
+
+TYPE_A = 1
+TYPE_CNAME = 5
+CLASS_IN = 1
+
+
+def encode_name(name: str) -> bytes:
+    return (
+        b"".join(
+            bytes((len(label),)) + label.encode("ascii")
+            for label in name.rstrip(".").split(".")
+            if label
+        )
+        + b"\x00"
+    )
+
+
+class StubDnsServer:
+    """Single-threaded UDP DNS responder"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        address: str = "192.0.2.1",
+        records: Optional[Dict[str, str]] = None,
+        cnames: Optional[Dict[str, str]] = None,
+        nxdomain_prefix: str = "nx",
+        drop_rate: float = 0.0,
+        ttl: int = 300,
+        seed: Optional[int] = None,
+    ):
+        self.address = address
+        self.records = records or {}
+        self.cnames = cnames or {}
+        self.nxdomain_prefix = nxdomain_prefix
+        self.drop_rate = drop_rate
+        self.ttl = ttl
+        self.random = random.Random(seed)
+        self.queries = 0
+        self.dropped = 0
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.socket.bind((host, port))
+        self.socket.settimeout(0.2)
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def server_address(self) -> Tuple[str, int]:
+        return self.socket.getsockname()[:2]
+
+    def _a_record(self, owner: bytes, name: str) -> bytes:
+        address = socket.inet_aton(self.records.get(name, self.address))
+        return owner + _RR.pack(TYPE_A, CLASS_IN, self.ttl, 4) + address
+
+    def handle(self, data: bytes) -> Optional[bytes]:
+        """Build the response to a query, None for malformed ones"""
+        if len(data) < 17:
+            return None
+        qid = data[0] << 8 | data[1]
+
+        labels = []
+        offset = 12
+        while offset < len(data) and data[offset]:
+            length = data[offset]
+            labels.append(data[offset + 1 : offset + 1 + length].decode("ascii"))
+            offset += 1 + length
+        offset += 1
+        if offset + 4 > len(data):
+            return None
+        question = data[12 : offset + 4]
+        qtype = data[offset] << 8 | data[offset + 1]
+        name = ".".join(labels).lower()
+
+        rcode = 0
+        answers = []
+        target = self.cnames.get(name)
+        if name.startswith(self.nxdomain_prefix):
+            rcode = 3
+        elif target is not None and qtype in (TYPE_A, TYPE_CNAME):
+            rdata = encode_name(target)
+            answers.append(
+                b"\xc0\x0c"
+                + _RR.pack(TYPE_CNAME, CLASS_IN, self.ttl, len(rdata))
+                + rdata
+            )
+            if qtype == TYPE_A:
+                answers.append(self._a_record(encode_name(target), target))
+        elif qtype == TYPE_A:
+            answers.append(self._a_record(b"\xc0\x0c", name))
+
+        header = _HEADER.pack(qid, 0x8180 | rcode, 1, len(answers), 0, 0)
+        return header + question + b"".join(answers)
+
+    def serve_forever(self):
+        while not self._stopped.is_set():
+            try:
+                data, client = self.socket.recvfrom(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.queries += 1
+            if self.drop_rate and self.random.random() < self.drop_rate:
+                self.dropped += 1
+                continue
+            response = self.handle(data)
+            if response is not None:
+                self.socket.sendto(response, client)
+
+    def start(self) -> "StubDnsServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+        self.socket.close()
+
+    def __enter__(self) -> "StubDnsServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5353)
+    parser.add_argument("--address", default="192.0.2.1")
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubDnsServer(
+        args.host, args.port, address=args.address, drop_rate=args.drop_rate
+    )
+    print(f"Stub DNS server listening on {args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.socket.close()
+
+
+if __name__ == "__main__":
+    main()
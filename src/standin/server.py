@@ -0,0 +1,315 @@
+"""
+Local stand-in for crt.sh and Threatminer
+
+Serves recorded or synthetic responses with configurable size, latency and
+failure modes so discovery can be exercised and load-tested offline.
+
+Usage:
+    python -m src.standin.server --port 8080 --entries 50000 --latency 0.2
+    python -m src.standin.server --record-dir recordings --record example.com
+
+Point the application at it with:
+    CRTSH_BASE_URL=http://127.0.0.1:8080
+    THREATMINER_BASE_URL=http://127.0.0.1:8080
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StandinConfig:
+    """Response shape and failure injection for the stand-in server"""
+
+    # Synthetic crt.sh entries per domain and distinct names among them
+    entries: int = 1000
+    unique_names: int = 500
+    # Synthetic Threatminer results per domain
+    threatminer_results: int = 50
+    # Directory with recorded responses (crtsh/<domain>.json, threatminer/<domain>.json)
+    record_dir: Optional[str] = None
+    # Delay before responding, in seconds, plus random jitter
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Probabilities of failure modes per request
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    truncate_rate: float = 0.0
+    # Fail the first N requests deterministically with error_status
+    fail_first: int = 0
+    error_status: int = 429
+    retry_after: Optional[int] = 1
+    # How long a "timeout" request hangs before the connection is dropped
+    hang: float = 120.0
+    seed: Optional[int] = None
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server: "StandinHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+
+        if parsed.path in ("", "/") and query.get("output") == ["json"]:
+            domain = query.get("q", [""])[0].lstrip("%.")
+            self._respond("crtsh", domain, self._crtsh_body)
+        elif parsed.path == "/v2/domain.php":
+            domain = query.get("q", [""])[0]
+            self._respond("threatminer", domain, self._threatminer_body)
+        else:
+            self._send_error(404)
+
+    def _respond(self, source: str, domain: str, body):
+        config = self.server.config
+        fault = self.server.next_fault()
+
+        delay = config.latency + self.server.random.uniform(0, config.jitter)
+        if delay:
+            time.sleep(delay)
+
+        if fault == "error":
+            self._send_error(config.error_status)
+            return
+        if fault == "timeout":
+            time.sleep(config.hang)
+            self.close_connection = True
+            return
+
+        recorded = self.server.recorded(source, domain)
+        chunks = iter([recorded]) if recorded is not None else body(domain)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        sent = 0
+        for chunk in chunks:
+            if fault == "truncate" and sent > 0:
+                # Drop the connection mid-body without the terminating chunk
+                self.close_connection = True
+                return
+            self._write_chunk(chunk)
+            sent += 1
+        if fault == "truncate":
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes):
+        if data:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def _send_error(self, status: int):
+        body = json.dumps({"error": status}).encode()
+        self.send_response(status)
+        if status == 429 and self.server.config.retry_after is not None:
+            self.send_header("Retry-After", str(self.server.config.retry_after))
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _crtsh_body(self, domain: str) -> Iterator[bytes]:
+        config = self.server.config
+        buffer = [b"["]
+        size = 1
+        for index in range(config.entries):
+            name = f"host{index % max(config.unique_names, 1)}.{domain}"
+            entry = {
+                "issuer_ca_id": 183267,
+                "issuer_name": "C=US, O=Let's Encrypt, CN=R3",
+                "common_name": name,
+                "name_value": f"{name}\n*.{name}",
+                "id": 1_000_000 + index,
+                "entry_timestamp": "2024-01-01T00:00:00.000",
+                "not_before": "2024-01-01T00:00:00",
+                "not_after": "2024-04-01T00:00:00",
+                "serial_number": f"{index:040x}",
+            }
+            data = json.dumps(entry).encode()
+            if index:
+                data = b"," + data
+            buffer.append(data)
+            size += len(data)
+            if size >= 65536:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        buffer.append(b"]")
+        yield b"".join(buffer)
+
+    def _threatminer_body(self, domain: str) -> Iterator[bytes]:
+        results = [
+            f"tm{index}.{domain}"
+            for index in range(self.server.config.threatminer_results)
+        ]
+        yield json.dumps(
+            {
+                "status_code": "200",
+                "status_message": "Results found.",
+                "results": results,
+            }
+        ).encode()
+
+
+class StandinHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: StandinConfig):
+        super().__init__(address, StandinHandler)
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def next_fault(self) -> Optional[str]:
+        """Pick the failure mode for the next request"""
+        config = self.config
+        with self._lock:
+            self.requests += 1
+            if self.requests <= config.fail_first:
+                return "error"
+            roll = self.random.random()
+        if roll < config.error_rate:
+            return "error"
+        roll -= config.error_rate
+        if roll < config.timeout_rate:
+            return "timeout"
+        roll -= config.timeout_rate
+        if roll < config.truncate_rate:
+            return "truncate"
+        return None
+
+    def recorded(self, source: str, domain: str) -> Optional[bytes]:
+        if not self.config.record_dir:
+            return None
+        path = Path(self.config.record_dir) / source / f"{domain}.json"
+        if path.exists():
+            return path.read_bytes()
+        return None
+
+
+class StandinServer:
+    """Run the stand-in server in a background thread"""
+
+    def __init__(
+        self,
+        config: Optional[StandinConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.httpd = StandinHTTPServer((host, port), config or StandinConfig())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def config(self) -> StandinConfig:
+        return self.httpd.config
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record(domain: str, record_dir: str):
+    """Record real crt.sh and Threatminer responses for a domain"""
+    import httpx
+
+    urls = {
+        "crtsh": f"https://crt.sh/?q=%25.{domain}&output=json",
+        "threatminer": f"https://api.threatminer.org/v2/domain.php?q={domain}&rt=5",
+    }
+    for source, url in urls.items():
+        response = httpx.get(url, timeout=120, follow_redirects=True)
+        response.raise_for_status()
+        path = Path(record_dir) / source / f"{domain}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(response.content)
+        print(f"Recorded {source} response for {domain} to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--unique-names", type=int, default=500)
+    parser.add_argument("--threatminer-results", type=int, default=50)
+    parser.add_argument("--record-dir", help="Directory of recorded responses")
+    parser.add_argument("--record", metavar="DOMAIN", help="Record real responses")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.record_dir or "recordings")
+        return
+
+    config = StandinConfig(
+        entries=args.entries,
+        unique_names=args.unique_names,
+        threatminer_results=args.threatminer_results,
+        record_dir=args.record_dir,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        truncate_rate=args.truncate_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    server = StandinServer(config, args.host, args.port)
+    print(f"Stand-in server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
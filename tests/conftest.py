@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def disable_discovery_cache(monkeypatch):
+    """Keep tests independent of the on-disk discovery cache"""
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_CACHE_ENABLED", False)
@@ -0,0 +1,126 @@
+import pytest
+
+import dns.message
+import dns.rdatatype
+import dns.rrset
+
+from src.services.bulk_resolver import (
+    BulkResolver,
+    answer_from_wire,
+    build_query,
+    bulk_resolver,
+)
+from src.services.dns_cache import DnsCache
+from src.services.dns_resolver import dns_resolver
+from src.standin.dns_server import StubDnsServer
+
+
+@pytest.fixture
+def stub_dns(monkeypatch):
+    server = StubDnsServer(
+        records={"www.example.com": "198.51.100.7"},
+        cnames={"shop.example.com": "shops.cdn.net"},
+        seed=1,
+    )
+    server.start()
+    monkeypatch.setattr("src.core.config.settings.DNS_RESOLVERS", ["127.0.0.1"])
+    monkeypatch.setattr("src.core.config.settings.DNS_PORT", server.server_address[1])
+    monkeypatch.setattr("src.core.config.settings.WILDCARD_DETECTION", False)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def resolver():
+    resolver = BulkResolver(cache=DnsCache(max_entries=0), sockets=2)
+    yield resolver
+    resolver.close()
+
+
+def test_build_query():
+    query, question = build_query(0x1234, "www.example.com", 1)
+    assert query[:2] == b"\x12\x34"
+    assert question == b"\x03www\x07example\x03com\x00\x00\x01\x00\x01"
+    assert query.endswith(question)
+
+
+@pytest.mark.asyncio
+async def test_bulk_records_match_resolve_dns(stub_dns, resolver):
+    record = await resolver.resolve("www.example.com")
+    assert record.A == ["198.51.100.7"]
+    assert record.AAAA is None and record.CNAME is None
+
+    record = await resolver.resolve("shop.example.com")
+    assert record.CNAME == ["shops.cdn.net."]
+    assert record.A == ["192.0.2.1"]
+
+    assert await resolver.resolve("nx.example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_pipelines_many_names(stub_dns, resolver):
+    names = [f"host{index}.example.com" for index in range(2000)]
+    seen = {}
+    async for name, record in resolver.resolve_many(names):
+        seen[name] = record
+
+    assert len(seen) == 2000
+    assert all(record.A == ["192.0.2.1"] for record in seen.values())
+    # A, AAAA and CNAME per name over two shared sockets
+    assert resolver.sent - resolver.retransmits == 6000
+    assert resolver.max_in_flight > 100
+    assert not resolver._inflight
+
+
+@pytest.mark.asyncio
+async def test_bulk_retransmits_lost_queries(stub_dns, resolver, monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DNS_TIMEOUT", 0.6)
+    monkeypatch.setattr("src.core.config.settings.DNS_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr("src.core.config.settings.DNS_RECORD_TYPES", ["A"])
+    monkeypatch.setattr("src.core.config.settings.DNS_EJECT_FAILURES", 10**6)
+    stub_dns.drop_rate = 0.3
+
+    names = [f"host{index}.example.com" for index in range(200)]
+    resolved = [record async for _, record in resolver.resolve_many(names) if record]
+
+    assert resolver.retransmits > 0
+    # Three tries at 30% loss leave about 3% unresolved
+    assert len(resolved) > 170
+
+
+@pytest.mark.parametrize(
+    "rdtype, records",
+    [
+        (
+            "A",
+            [
+                ("www.example.com.", 300, "CNAME", "edge.cdn.net."),
+                ("edge.cdn.net.", 60, "A", "192.0.2.5"),
+            ],
+        ),
+        ("AAAA", [("www.example.com.", 300, "AAAA", "2001:db8::5")]),
+        ("MX", [("www.example.com.", 300, "MX", "10 mail.example.com.")]),
+        ("TXT", [("www.example.com.", 300, "TXT", '"v=spf1 -all"')]),
+    ],
+)
+def test_wire_parser_matches_dnspython(rdtype, records):
+    query = dns.message.make_query("www.example.com", rdtype)
+    response = dns.message.make_response(query)
+    for owner, ttl, record_type, rdata in records:
+        response.answer.append(
+            dns.rrset.from_text(owner, ttl, "IN", record_type, rdata)
+        )
+    value = dns.rdatatype.from_text(rdtype)
+
+    wire = response.to_wire()
+    fast = answer_from_wire(wire, value)
+    slow = BulkResolver._answer(dns.message.from_wire(wire), value)
+    assert list(fast) == list(slow)
+    assert fast.canonical == slow.canonical
+    assert fast.expiration == pytest.approx(slow.expiration, abs=1)
+
+
+def test_global_bulk_resolver_shares_resolver_state():
+    assert bulk_resolver.nameservers is dns_resolver.nameservers
+    assert bulk_resolver.wildcards is dns_resolver.wildcards
+    assert bulk_resolver.cache is dns_resolver.cache
@@ -0,0 +1,67 @@
+import json
+
+from src.services.cert_cache import CertificateCache
+from src.services.crtsh_service import CrtshStreamParser
+from src.services.normalizer import normalize_entries
+
+SHARED = [
+    {"id": 7, "name_value": "www.example.com\nwww.example.org\n*.example.org"},
+    {"id": 8, "name_value": "API.example.org"},
+]
+
+
+def parse(cache, domain):
+    parser = CrtshStreamParser(domain=domain, cache=cache)
+    parser.feed(json.dumps(SHARED).encode())
+    return parser.close()
+
+
+def test_shared_certificates_are_parsed_once():
+    cache = CertificateCache(max_entries=10, ttl=60)
+
+    assert parse(cache, "example.com") == {"www.example.com"}
+    assert parse(cache, "example.org") == {
+        "www.example.org",
+        "example.org",
+        "api.example.org",
+    }
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["hits"] == 2
+
+
+def test_cache_evicts_by_size_and_age(monkeypatch):
+    cache = CertificateCache(max_entries=2, ttl=60)
+    cache.set(1, ("a.example.com",))
+    cache.set(2, ("b.example.com",))
+    cache.get(1)
+    cache.set(3, ("c.example.com",))
+
+    assert cache.get(2) is None
+    assert cache.get(1) == ("a.example.com",)
+
+    monkeypatch.setattr("time.monotonic", lambda: 10**9)
+    assert cache.get(1) is None
+    assert len(cache) == 1
+
+
+def test_cache_is_bounded_by_names():
+    cache = CertificateCache(max_entries=10, ttl=60, max_names=5)
+    cache.set(1, ("a.example.com", "b.example.com"))
+    cache.set(2, ("c.example.com", "d.example.com"))
+    cache.set(3, ("e.example.com", "f.example.com"))
+
+    assert cache.get(1) is None
+    assert len(cache) == 2
+    assert cache.stats()["names"] == 4
+
+    # A certificate with more names than the whole cache holds is not cached
+    cache.set(4, tuple(f"h{index}.example.com" for index in range(6)))
+    assert cache.get(4) is None
+    assert cache.stats()["names"] == 4
+
+
+def test_normalize_entries_groups_names():
+    parsed = normalize_entries({1: "A.example.com\n*.b.example.com", 2: "bücher.de."})
+
+    assert set(parsed[1]) == {"a.example.com", "b.example.com"}
+    assert parsed[2] == ("xn--bcher-kva.de",)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.services.crtsh_service import Crtsh, CrtshCursor, CrtshStreamParser
+from src.services.http_client import http_client
+
+ENTRIES = [
+    {"id": 1, "name_value": "www.example.com\n*.example.com"},
+    {"id": 2, "name_value": "192.168.1.1"},
+    {"id": 3, "name_value": "api.example.com"},
+    {"id": 4, "name_value": "www.example.com"},
+]
+
+
+def chunked(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096])
+def test_stream_parser_matches_buffered(chunk_size):
+    payload = json.dumps(ENTRIES).encode()
+    crtsh = Crtsh()
+
+    streamed = crtsh.parse_stream(chunked(payload, chunk_size))
+    buffered = crtsh.parse_response(
+        {e["name_value"] for e in ENTRIES if e["name_value"] != "192.168.1.1"}
+    )
+
+    assert streamed == set(buffered)
+    assert streamed == {"www.example.com", "example.com", "api.example.com"}
+
+
+def test_stream_parser_handles_split_utf8():
+    payload = json.dumps([{"name_value": "café.example.com"}], ensure_ascii=False)
+    parser = CrtshStreamParser()
+    for chunk in chunked(payload.encode(), 1):
+        parser.feed(chunk)
+
+    assert parser.close() == {"xn--caf-dma.example.com"}
+    assert parser.entries == 1
+
+
+def test_stream_parser_empty_array():
+    assert Crtsh().parse_stream([b" [ ", b"]"]) == set()
+
+
+def test_stream_parser_truncated_body():
+    payload = json.dumps(ENTRIES).encode()
+    with pytest.raises(ValueError):
+        Crtsh().parse_stream([payload[:-10]])
+
+
+def test_stream_parser_filters_out_of_scope_names():
+    entries = ENTRIES + [{"id": 5, "name_value": "www.other.org\nexample.com.evil.io"}]
+    parser = CrtshStreamParser(domain="example.com", batch_size=2)
+    parser.feed(json.dumps(entries).encode())
+
+    assert parser.close() == {"www.example.com", "example.com", "api.example.com"}
+
+
+@pytest.mark.asyncio
+async def test_get_subdomains_uses_shared_client():
+    def handler(request):
+        assert request.url.host == "crt.sh"
+        return httpx.Response(200, content=json.dumps(ENTRIES).encode())
+
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    http_client._loop = asyncio.get_running_loop()
+    try:
+        streamed = await Crtsh().get_subdomains("example.com", stream=True)
+        buffered = await Crtsh().get_subdomains("example.com", stream=False)
+    finally:
+        await http_client.close()
+
+    expected = {"www.example.com", "example.com", "api.example.com"}
+    assert set(streamed) == set(buffered) == expected
+
+
+def test_stream_parser_skips_entries_below_cursor():
+    payload = json.dumps(ENTRIES).encode()
+    cursor = CrtshCursor(after_id=2)
+
+    subdomains = Crtsh().parse_stream(chunked(payload, 16), cursor=cursor)
+
+    assert subdomains == {"api.example.com", "www.example.com"}
+    assert cursor.max_id == 4
+    assert not cursor.full_scan
+
+
+def test_cursor_never_moves_backwards():
+    cursor = CrtshCursor(after_id=10)
+    Crtsh().parse_stream([json.dumps(ENTRIES).encode()], cursor=cursor)
+
+    assert cursor.max_id == 10
@@ -0,0 +1,99 @@
+import pytest
+
+from src.services.discovery_cache import DiscoveryCache
+from src.services.sources import SourceRegistry
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_CACHE_ENABLED", True)
+    cache = DiscoveryCache(path=str(tmp_path / "cache.sqlite3"), ttl=60)
+    yield cache
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_and_miss(cache):
+    assert await cache.get("crtsh", "example.com") is None
+    await cache.set("crtsh", "example.com", ["a.example.com"])
+
+    assert await cache.get("crtsh", "example.com") == ["a.example.com"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_restart(cache, tmp_path):
+    await cache.set("crtsh", "example.com", ["a.example.com"])
+    cache.close()
+
+    reopened = DiscoveryCache(path=cache.path, ttl=60)
+    assert await reopened.get("crtsh", "example.com") == ["a.example.com"]
+    assert reopened.disk_hits == 1
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_expires(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_CACHE_ENABLED", True)
+    cache = DiscoveryCache(path=str(tmp_path / "cache.sqlite3"), ttl=60)
+    await cache.set("crtsh", "example.com", ["a.example.com"])
+
+    monkeypatch.setattr("time.time", lambda: 10**12)
+    assert await cache.get("crtsh", "example.com") is None
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_lru_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_CACHE_ENABLED", True)
+    cache = DiscoveryCache(path="", ttl=60, max_entries=2)
+    await cache.set("crtsh", "a.com", [])
+    await cache.set("crtsh", "b.com", [])
+    await cache.get("crtsh", "a.com")
+    await cache.set("crtsh", "c.com", [])
+
+    assert await cache.get("crtsh", "b.com") is None
+    assert await cache.get("crtsh", "a.com") == []
+    assert cache.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_registry_serves_cached_results(cache, monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_SOURCES", ["counting"])
+    calls = []
+
+    async def counting(domain):
+        calls.append(domain)
+        return [f"a.{domain}"]
+
+    registry = SourceRegistry(cache=cache)
+    registry.register("counting", counting)
+
+    first = await registry.discover("example.com")
+    second = await registry.discover("example.com")
+    fresh = await registry.discover("example.com", use_cache=False)
+
+    assert first.subdomains == second.subdomains == fresh.subdomains
+    assert second.sources["counting"].cached
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_registry_never_caches_partial_results(cache, monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_SOURCES", ["delta"])
+    calls = []
+
+    async def delta(domain):
+        calls.append(domain)
+        return [f"new{len(calls)}.{domain}"]
+
+    registry = SourceRegistry(cache=cache)
+    registry.register("delta", delta)
+
+    await registry.discover("example.com", partial=["delta"])
+    second = await registry.discover("example.com", partial=["delta"])
+
+    assert not second.sources["delta"].cached
+    assert second.subdomains == {"new2.example.com"}
+    assert await cache.get("delta", "example.com") is None
@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.models.domain import DNSRecord
+from src.services import dns_history as module
+from src.services.dns_history import DnsHistory, answers
+
+
+class FakeRepository:
+    """In-memory stand-in for the DNS history collection"""
+
+    def __init__(self):
+        self.docs = {}
+        self.writes = 0
+        self.refreshed = 0
+
+    async def find_dns_records(self, subdomains):
+        return {name: self.docs[name] for name in subdomains if name in self.docs}
+
+    async def save_dns_records(self, records):
+        now = datetime.utcnow()
+        for record in records:
+            if "records" not in record:
+                self.refreshed += 1
+                self.docs[record["subdomain"]]["expires_at"] = record["expires_at"]
+                continue
+            self.writes += 1
+            doc = self.docs.setdefault(
+                record["subdomain"],
+                {"subdomain": record["subdomain"], "domain": record["domain"]},
+            )
+            doc.setdefault("first_seen", now)
+            if "previous" in record:
+                doc.setdefault("history", []).append(record["previous"])
+            doc.update(
+                records=record["records"],
+                wildcard=record["wildcard"],
+                expires_at=record["expires_at"],
+                last_changed=now,
+            )
+        return len(records)
+
+    async def due_dns_records(self, now):
+        docs = sorted(self.docs.values(), key=lambda doc: doc["expires_at"])
+        for doc in docs:
+            if doc["expires_at"] <= now:
+                yield doc
+
+
+@pytest.fixture
+def repo(monkeypatch):
+    repo = FakeRepository()
+    monkeypatch.setattr(module, "repository", repo)
+    return repo
+
+
+def test_answers_are_sorted_by_type():
+    record = DNSRecord(subdomain="a.example.com", A=["192.0.2.2", "192.0.2.1"])
+    assert answers(record) == {"A": ["192.0.2.1", "192.0.2.2"]}
+    assert answers(None) == {}
+
+
+@pytest.mark.asyncio
+async def test_only_changed_answers_are_written(repo):
+    history = DnsHistory()
+    first = DNSRecord(subdomain="a.example.com", A=["192.0.2.1"], ttl=300)
+    changes = await history.record("example.com", [("a.example.com", first)])
+    assert changes[0].previous is None
+    assert repo.writes == 1
+
+    same = DNSRecord(subdomain="a.example.com", A=["192.0.2.1"], ttl=300)
+    assert await history.record("example.com", [("a.example.com", same)]) == []
+    assert repo.writes == 1
+    assert repo.refreshed == 1
+
+    moved = DNSRecord(subdomain="a.example.com", CNAME=["gone.cdn.net."])
+    changes = await history.record("example.com", [("a.example.com", moved)])
+    assert changes[0].previous == {"A": ["192.0.2.1"]}
+    assert changes[0].current == {"CNAME": ["gone.cdn.net."]}
+    doc = repo.docs["a.example.com"]
+    assert doc["history"] == [{"records": {"A": ["192.0.2.1"]}, "wildcard": False}]
+    assert doc["first_seen"] <= doc["last_changed"]
+
+
+@pytest.mark.asyncio
+async def test_failed_lookups_are_not_changes(repo):
+    history = DnsHistory()
+    stored = DNSRecord(subdomain="www.example.com", A=["192.0.2.1"], ttl=300)
+    await history.record("example.com", [("www.example.com", stored)])
+    expires_at = repo.docs["www.example.com"]["expires_at"]
+
+    failed = DNSRecord(subdomain="www.example.com", failed=True)
+    assert await history.record(None, [("www.example.com", failed)]) == []
+    doc = repo.docs["www.example.com"]
+    assert doc["records"] == {"A": ["192.0.2.1"]}
+    assert doc["expires_at"] == expires_at
+    assert "history" not in doc
+
+    # A new name whose lookup failed is kept without records until it resolves
+    new = DNSRecord(subdomain="new.example.com", failed=True)
+    assert await history.record("example.com", [("new.example.com", new)]) == []
+    assert repo.docs["new.example.com"]["records"] is None
+    resolved = DNSRecord(subdomain="new.example.com", A=["192.0.2.2"], ttl=300)
+    changes = await history.record(None, [("new.example.com", resolved)])
+    assert changes[0].previous is None
+    assert "history" not in repo.docs["new.example.com"]
+
+
+@pytest.mark.asyncio
+async def test_recheck_takes_expired_names_first(repo, monkeypatch):
+    monkeypatch.setattr(module.settings, "DNS_BULK_THRESHOLD", 0)
+    history = DnsHistory()
+    now = datetime.utcnow()
+    for index in range(5):
+        repo.docs[f"h{index}.example.com"] = {
+            "subdomain": f"h{index}.example.com",
+            "domain": "example.com",
+            "records": {"A": ["192.0.2.1"]},
+            "wildcard": False,
+            "expires_at": now - timedelta(minutes=index),
+        }
+    repo.docs["fresh.example.com"] = dict(
+        repo.docs["h0.example.com"],
+        subdomain="fresh.example.com",
+        expires_at=now + timedelta(hours=1),
+    )
+    resolved = []
+
+    async def resolve(name):
+        resolved.append(name)
+        address = "192.0.2.9" if name == "h4.example.com" else "192.0.2.1"
+        return DNSRecord(subdomain=name, A=[address], ttl=600)
+
+    with patch.object(module.dns_resolver, "resolve", side_effect=resolve):
+        summary = await history.recheck(limit=3)
+        assert sorted(resolved) == [
+            "h2.example.com",
+            "h3.example.com",
+            "h4.example.com",
+        ]
+        assert summary == {"checked": 3, "changed": 1}
+        assert repo.writes == 1
+        assert repo.docs["h4.example.com"]["records"] == {"A": ["192.0.2.9"]}
+
+        # Unchanged names only had their expiry moved to their new TTL
+        assert repo.refreshed == 2
+        assert repo.docs["h2.example.com"]["expires_at"] > now
+        resolved.clear()
+        summary = await history.recheck(limit=3)
+        assert sorted(resolved) == ["h0.example.com", "h1.example.com"]
+        assert summary == {"checked": 2, "changed": 0}
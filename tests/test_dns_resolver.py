@@ -0,0 +1,314 @@
+import asyncio
+import time
+
+import dns.exception
+import dns.message
+import dns.name
+import dns.resolver
+import dns.rrset
+import pytest
+
+from src.services.dns_cache import DnsCache
+from src.services.dns_resolver import DnsResolver
+
+
+class FakeAnswer(list):
+    def __init__(self, values, ttl=300, canonical=None, qname=None):
+        super().__init__(values)
+        self.expiration = time.time() + ttl
+        self.canonical_name = dns.name.from_text(canonical or qname)
+
+
+def fake_resolve(monkeypatch, records, delay=0.0):
+    """Answer lookups from records; values may be a list or (list, ttl, cname)"""
+    calls = []
+
+    async def resolve(resolver, name, rdtype):
+        calls.append((name, rdtype))
+        await asyncio.sleep(delay)
+        values = records.get((name, rdtype))
+        if values is None:
+            if any(key[0] == name for key in records):
+                raise dns.resolver.NoAnswer()
+            raise dns.resolver.NXDOMAIN()
+        if isinstance(values, tuple):
+            values, ttl, canonical = values
+            return FakeAnswer(values, ttl, canonical, name)
+        return FakeAnswer(values, qname=name)
+
+    monkeypatch.setattr("dns.asyncresolver.Resolver.resolve", resolve)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_resolve_collects_records(monkeypatch):
+    resolver = DnsResolver(cache=DnsCache())
+    fake_resolve(
+        monkeypatch,
+        {
+            ("www.example.com", "A"): ["192.0.2.1"],
+            ("www.example.com", "CNAME"): ["example.cdn.net."],
+        },
+    )
+
+    record = await resolver.resolve("www.example.com")
+    assert record.A == ["192.0.2.1"]
+    assert record.CNAME == ["example.cdn.net."]
+    assert await resolver.resolve("missing.example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_record_keeps_shortest_ttl(monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.WILDCARD_DETECTION", False)
+    resolver = DnsResolver(cache=DnsCache())
+    fake_resolve(
+        monkeypatch,
+        {
+            ("www.example.com", "A"): (["192.0.2.1"], 60, "edge.cdn.net"),
+            ("www.example.com", "CNAME"): (["edge.cdn.net."], 3600, None),
+        },
+    )
+
+    record = await resolver.resolve("www.example.com")
+    assert 58 <= record.ttl <= 60
+    # Served from the cache with the time left on the answer
+    record = await resolver.resolve("www.example.com")
+    assert 58 <= record.ttl <= 60
+    assert resolver.queries == 3
+
+
+@pytest.mark.asyncio
+async def test_resolve_failure_is_flagged(monkeypatch):
+    resolver = DnsResolver(cache=DnsCache())
+
+    async def timeout(resolver, name, rdtype):
+        raise dns.exception.Timeout()
+
+    monkeypatch.setattr("dns.asyncresolver.Resolver.resolve", timeout)
+    record = await resolver.resolve("slow.example.com")
+    assert record.failed
+    assert not record.has_answers()
+
+
+@pytest.mark.asyncio
+async def test_lookups_run_concurrently_within_limit(monkeypatch):
+    resolver = DnsResolver(concurrency=50, cache=DnsCache(max_entries=0))
+    names = [f"host{index}.example.com" for index in range(200)]
+    fake_resolve(monkeypatch, {(name, "A"): ["192.0.2.1"] for name in names}, 0.05)
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(resolver.query(name, "A") for name in names))
+    elapsed = time.monotonic() - started
+
+    assert all(result == ["192.0.2.1"] for result in results)
+    assert resolver.max_in_flight == 50
+    # 4 waves of 50 instead of 200 sequential lookups
+    assert elapsed < 1.0
+
+
+@pytest.mark.asyncio
+async def test_lookups_do_not_block_event_loop(monkeypatch):
+    resolver = DnsResolver(cache=DnsCache())
+    fake_resolve(monkeypatch, {}, 0.2)
+
+    lookup = asyncio.ensure_future(resolver.resolve("www.example.com"))
+    started = time.monotonic()
+    await asyncio.sleep(0.01)
+    assert time.monotonic() - started < 0.1
+    assert await lookup is None
+
+
+def test_pool_reuses_resolvers_across_nameservers(monkeypatch):
+    monkeypatch.setattr(
+        "src.core.config.settings.DNS_RESOLVERS", ["192.0.2.53", "198.51.100.53"]
+    )
+    resolver = DnsResolver(cache=DnsCache())
+
+    pool = resolver.pool
+    assert resolver.pool is pool
+    assert {address: r.nameservers for address, r in pool.items()} == {
+        "192.0.2.53": ["192.0.2.53"],
+        "198.51.100.53": ["198.51.100.53"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_answers_are_cached(monkeypatch):
+    resolver = DnsResolver(cache=DnsCache())
+    calls = fake_resolve(
+        monkeypatch,
+        {
+            ("www.example.com", "A"): (["192.0.2.1"], 300, "edge.cdn.net"),
+            ("api.example.com", "CNAME"): ["edge.cdn.net."],
+        },
+    )
+
+    for _ in range(3):
+        assert await resolver.query("www.example.com", "A") == ["192.0.2.1"]
+        assert await resolver.query("WWW.example.com.", "A") == ["192.0.2.1"]
+    # The CNAME target was cached from the first answer
+    assert await resolver.query("edge.cdn.net", "A") == ["192.0.2.1"]
+    # NXDOMAIN covers every record type of the name
+    assert await resolver.query("gone.example.com", "A") == []
+    assert await resolver.query("gone.example.com", "CNAME") == []
+    # NoAnswer is cached per record type
+    assert await resolver.query("api.example.com", "A") == []
+    assert await resolver.query("api.example.com", "A") == []
+
+    assert calls == [
+        ("www.example.com", "A"),
+        ("gone.example.com", "A"),
+        ("api.example.com", "A"),
+    ]
+    stats = resolver.stats()
+    assert stats["queries"] == 3
+    assert stats["cache"]["hits"] == 8
+    assert stats["cache"]["negative_hits"] == 2
+
+
+def test_cache_honors_ttl_and_size(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    cache = DnsCache(max_entries=2, negative_ttl=30, max_ttl=3600)
+
+    cache.set("a.example.com", "A", ["192.0.2.1"], 60)
+    cache.set("b.example.com", "A", ["192.0.2.2"], 86400)
+    cache.set_nxdomain("c.example.com")
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache.get("a.example.com", "A") == (False, None)
+
+    now[0] += 31
+    assert cache.get("c.example.com", "AAAA") == (False, None)
+    assert cache.get("b.example.com", "A") == (True, ["192.0.2.2"])
+    # Long TTLs are capped at max_ttl
+    now[0] += 3600
+    assert cache.get("b.example.com", "A") == (False, None)
+
+
+def test_cache_disabled(monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DNS_CACHE_ENABLED", False)
+    cache = DnsCache()
+    cache.set("a.example.com", "A", ["192.0.2.1"], 60)
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_streams_with_bounded_workers(monkeypatch):
+    resolver = DnsResolver(cache=DnsCache())
+    names = [f"host{index}.example.com" for index in range(1000)]
+    fake_resolve(monkeypatch, {(name, "A"): ["192.0.2.1"] for name in names}, 0.01)
+
+    started = time.monotonic()
+    seen = set()
+    async for name, record in resolver.resolve_many(names, workers=100):
+        assert record.A == ["192.0.2.1"]
+        seen.add(name)
+    assert seen == set(names)
+    assert time.monotonic() - started < 2.0
+    # One lookup per record type of each name being resolved
+    assert resolver.max_in_flight <= 100 * 3
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_cancels_on_early_exit(monkeypatch):
+    resolver = DnsResolver(cache=DnsCache())
+    names = [f"host{index}.example.com" for index in range(100)]
+    records = {(name, "A"): ["192.0.2.1"] for name in names}
+    calls = fake_resolve(monkeypatch, records, 0.01)
+
+    stream = resolver.resolve_many(names, workers=5)
+    await stream.__anext__()
+    await stream.aclose()
+    await asyncio.sleep(0.05)
+    assert len(calls) < 60
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_waits_for_a_slow_consumer(monkeypatch):
+    resolver = DnsResolver(cache=DnsCache())
+    names = [f"host{index}.example.com" for index in range(100)]
+    calls = fake_resolve(monkeypatch, {(name, "A"): ["192.0.2.1"] for name in names})
+
+    consumed = 0
+    async for _ in resolver.resolve_many(names, workers=5):
+        consumed += 1
+        await asyncio.sleep(0.01)
+        # A queued result per worker plus the lookups under way
+        assert len({name for name, _ in calls} & set(names)) <= consumed + 2 * 5
+    assert consumed == len(names)
+
+
+@pytest.mark.asyncio
+async def test_record_types_are_queried_concurrently(monkeypatch):
+    monkeypatch.setattr(
+        "src.core.config.settings.DNS_RECORD_TYPES", ["A", "AAAA", "CNAME", "MX"]
+    )
+    resolver = DnsResolver(cache=DnsCache())
+    fake_resolve(
+        monkeypatch,
+        {
+            ("www.example.com", "A"): ["192.0.2.1"],
+            ("www.example.com", "AAAA"): ["2001:db8::1"],
+            ("www.example.com", "MX"): ["10 mail.example.com."],
+        },
+        0.1,
+    )
+
+    started = time.monotonic()
+    record = await resolver.resolve("www.example.com")
+    # The zone probe and the lookups each take one round trip
+    assert time.monotonic() - started < 0.35
+    assert record.A == ["192.0.2.1"]
+    assert record.AAAA == ["2001:db8::1"]
+    assert record.MX == ["10 mail.example.com."]
+    assert record.CNAME is None
+
+
+@pytest.mark.asyncio
+async def test_name_deadline_keeps_finished_types(monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DNS_NAME_TIMEOUT", 0.1)
+    monkeypatch.setattr("src.core.config.settings.WILDCARD_DETECTION", False)
+    resolver = DnsResolver(cache=DnsCache())
+
+    async def resolve(resolver_, name, rdtype):
+        if rdtype != "A":
+            await asyncio.sleep(5)
+        return FakeAnswer(["192.0.2.1"], qname=name)
+
+    monkeypatch.setattr("dns.asyncresolver.Resolver.resolve", resolve)
+
+    started = time.monotonic()
+    record = await resolver.resolve("slow.example.com")
+    assert time.monotonic() - started < 0.5
+    assert record.A == ["192.0.2.1"]
+    assert record.AAAA is None and record.CNAME is None
+    assert resolver.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_dangling_cname_keeps_its_cname(monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.WILDCARD_DETECTION", False)
+    resolver = DnsResolver(cache=DnsCache())
+    qname = dns.name.from_text("old.example.com")
+    response = dns.message.make_response(dns.message.make_query(qname, "A"))
+    response.answer.append(
+        dns.rrset.from_text(qname, 300, "IN", "CNAME", "gone.azurewebsites.net.")
+    )
+    response = dns.message.from_wire(response.to_wire())
+
+    async def resolve(resolver, name, rdtype):
+        if name == "old.example.com" and rdtype == "CNAME":
+            return FakeAnswer(["gone.azurewebsites.net."], qname=name)
+        if name == "old.example.com":
+            raise dns.resolver.NXDOMAIN(qnames=[qname], responses={qname: response})
+        raise dns.resolver.NXDOMAIN()
+
+    monkeypatch.setattr("dns.asyncresolver.Resolver.resolve", resolve)
+
+    for _ in range(2):
+        record = await resolver.resolve("old.example.com")
+        assert record.CNAME == ["gone.azurewebsites.net."]
+        assert record.A is None
+    assert await resolver.nxdomain("gone.azurewebsites.net")
+    assert await resolver.nxdomain("old.example.com")
@@ -0,0 +1,27 @@
+from src.db.fingerprint import SubdomainFingerprint
+
+
+def test_fingerprint_membership_and_growth():
+    names = [f"host{index}.example.com" for index in range(1000)]
+    fingerprint = SubdomainFingerprint.from_names(names[:500])
+
+    assert len(fingerprint) == 500
+    assert "host1.example.com" in fingerprint
+    assert "host999.example.com" not in fingerprint
+    assert fingerprint.missing(names) == names[500:]
+
+    grown = fingerprint.add(names[400:])
+    assert len(grown) == 1000
+    assert grown.missing(names) == []
+    # Adding only stored names keeps the fingerprint as it is
+    assert grown.add(names[:10]) is grown
+    assert len(fingerprint) == 500
+
+
+def test_fingerprint_survives_storage():
+    fingerprint = SubdomainFingerprint.from_names(["a.example.com", "b.example.com"])
+    data = fingerprint.to_bytes()
+
+    assert len(data) == 16
+    restored = SubdomainFingerprint.from_bytes(data)
+    assert restored.missing(["a.example.com", "c.example.com"]) == ["c.example.com"]
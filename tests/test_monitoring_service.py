@@ -1,5 +1,8 @@
+import asyncio
+from datetime import datetime
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
+from src.db.fingerprint import SubdomainFingerprint
 from src.services.monitoring_service import MonitoringService
 
 
@@ -29,4 +32,191 @@ async def test_resolve_dns(monitoring_service):
 	# May be None if DNS fails
 	if record:
 		assert record.subdomain == 'google.com'
-		assert record.A is not None or record.CNAME is not None
\ No newline at end of file
+		assert record.A is not None or record.CNAME is not None
+
+class FakeRepository:
+	def __init__(self, doc):
+		self.doc = doc
+		self.marks = []
+		self.fingerprint = SubdomainFingerprint()
+
+	async def find_one(self, domain):
+		return self.doc
+
+	async def find_fingerprint(self, domain):
+		return self.fingerprint
+
+	async def add_subdomains(self, domain, subdomains, fingerprint=None, seen=None):
+		if seen:
+			self.doc["last_seen_touched"] = datetime.utcnow()
+		new = [name for name in subdomains if name not in self.doc["subdomains"]]
+		self.doc["subdomains"].extend(new)
+		if fingerprint is not None:
+			self.fingerprint = fingerprint
+		return new
+
+	async def update_crtsh_mark(self, domain, last_id, full_scan=False):
+		self.marks.append((last_id, full_scan))
+		return True
+
+
+@pytest.mark.asyncio
+async def test_monitor_domain_uses_crtsh_mark():
+	service = MonitoringService()
+	repo = FakeRepository({
+		"domain": "example.com",
+		"subdomains": ["old.example.com"],
+		"crtsh_last_id": 41,
+		"crtsh_last_full_scan": datetime.utcnow(),
+	})
+
+	async def crtsh(domain, cursor=None):
+		assert cursor.after_id == 41
+		cursor.max_id = 42
+		return ["new.example.com"]
+
+	with patch("src.services.monitoring_service.repository", repo), \
+			patch.object(service.crtsh, "get_subdomains", side_effect=crtsh), \
+			patch.object(service.threatminer, "get_subdomains", return_value=[]), \
+			patch.object(service, "notify_new_subdomains", AsyncMock()):
+		new_count = await service.monitor_domain("example.com")
+
+	assert new_count == 1
+	assert repo.marks == [(42, False)]
+
+
+@pytest.mark.asyncio
+async def test_monitor_domain_keeps_mark_when_crtsh_fails():
+	service = MonitoringService()
+	repo = FakeRepository({"domain": "example.com", "subdomains": []})
+
+	with patch("src.services.monitoring_service.repository", repo), \
+			patch.object(service.crtsh, "get_subdomains", side_effect=RuntimeError("503")), \
+			patch.object(service.threatminer, "get_subdomains", return_value=["a.example.com"]), \
+			patch.object(service, "notify_new_subdomains", AsyncMock()):
+		new_count = await service.monitor_domain("example.com", full_scan=True)
+
+	assert new_count == 1
+	assert repo.marks == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_monitor_domain_runs_once():
+	service = MonitoringService()
+	repo = FakeRepository({"domain": "example.com", "subdomains": []})
+	notify = AsyncMock()
+
+	async def crtsh(domain, cursor=None):
+		await asyncio.sleep(0.05)
+		return ["a.example.com"]
+
+	with patch("src.services.monitoring_service.repository", repo), \
+			patch.object(service.crtsh, "get_subdomains", side_effect=crtsh) as fetch, \
+			patch.object(service.threatminer, "get_subdomains", return_value=[]), \
+			patch.object(service, "notify_new_subdomains", notify):
+		results = await asyncio.gather(
+			service.monitor_domain("example.com"),
+			service.monitor_domain("example.com"),
+		)
+
+	assert results == [1, 1]
+	assert fetch.call_count == 1
+	assert notify.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_full_scan_does_not_join_incremental_run():
+	service = MonitoringService()
+	repo = FakeRepository({
+		"domain": "example.com",
+		"subdomains": [],
+		"crtsh_last_id": 41,
+		"crtsh_last_full_scan": datetime.utcnow(),
+	})
+	scans = []
+
+	async def crtsh(domain, cursor=None):
+		scans.append(cursor.full_scan)
+		await asyncio.sleep(0.05)
+		return ["a.example.com"]
+
+	with patch("src.services.monitoring_service.repository", repo), \
+			patch.object(service.crtsh, "get_subdomains", side_effect=crtsh), \
+			patch.object(service.threatminer, "get_subdomains", return_value=[]), \
+			patch.object(service, "notify_new_subdomains", AsyncMock()):
+		await asyncio.gather(
+			service.monitor_domain("example.com"),
+			service.monitor_domain("example.com", full_scan=True),
+			service.monitor_domain("example.com"),
+		)
+
+	# The incremental calls share one run, the full scan gets its own
+	assert sorted(scans) == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_notify_resolves_every_new_subdomain(monkeypatch):
+	from src.models.domain import DNSRecord
+	from src.services import monitoring_service as module
+
+	monkeypatch.setattr(module.settings, "SLACK_WEBHOOK", "https://hooks.example.com")
+	monkeypatch.setattr(module.settings, "DNS_RESOLVE_BUDGET", 250)
+	monkeypatch.setattr(module.settings, "NOTIFY_BATCH_SIZE", 100)
+	service = MonitoringService()
+	sent = []
+	service.notifications.slack = sent.append
+
+	async def resolve(name):
+		if name.startswith("dead"):
+			return None
+		return DNSRecord(subdomain=name, A=["192.0.2.1"])
+
+	names = [f"host{i}.example.com" for i in range(240)]
+	names += [f"dead{i}.example.com" for i in range(60)]
+	with patch.object(module.dns_resolver, "resolve", side_effect=resolve):
+		summary = await service.notify_new_subdomains("example.com", names, True, False)
+
+	assert summary == {"resolved": 240, "unresolved": 10, "wildcard": 0, "overflow": 50, "unlisted": 0}
+	assert len(sent) == 3
+	assert sum(message.count("•") for message in sent) == 240
+	assert "50 more" in sent[-1]
+
+	# Names beyond the message limit are only counted
+	monkeypatch.setattr(module.settings, "NOTIFY_MAX_MESSAGES", 2)
+	sent.clear()
+	with patch.object(module.dns_resolver, "resolve", side_effect=resolve):
+		summary = await service.notify_new_subdomains("example.com", names, True, False)
+
+	assert summary["unlisted"] == 40
+	assert len(sent) == 2
+	assert sum(message.count("•") for message in sent) == 200
+	assert "40 more resolved" in sent[-1]
+
+
+@pytest.mark.asyncio
+async def test_monitor_domain_only_stores_names_missing_from_fingerprint():
+	service = MonitoringService()
+	repo = FakeRepository({"domain": "example.com", "subdomains": []})
+	stored, touched = [], []
+	add_subdomains = repo.add_subdomains
+
+	async def record(domain, subdomains, fingerprint=None, seen=None):
+		stored.append(sorted(subdomains))
+		touched.append(sorted(seen))
+		return await add_subdomains(domain, subdomains, fingerprint, seen)
+
+	repo.add_subdomains = record
+	found = [["a.example.com", "b.example.com"], ["a.example.com", "b.example.com", "c.example.com"]] * 2
+
+	with patch("src.services.monitoring_service.repository", repo), \
+			patch.object(service.crtsh, "get_subdomains", side_effect=RuntimeError("503")), \
+			patch.object(service.threatminer, "get_subdomains", side_effect=found), \
+			patch.object(service, "notify_new_subdomains", AsyncMock()):
+		assert await service.monitor_domain("example.com") == 2
+		assert await service.monitor_domain("example.com") == 1
+		assert await service.monitor_domain("example.com") == 0
+
+	assert stored == [["a.example.com", "b.example.com"], ["c.example.com"], []]
+	assert len(repo.fingerprint) == 3
+	# Skipped names have last_seen moved once per LAST_SEEN_INTERVAL_HOURS
+	assert touched == [[], ["a.example.com", "b.example.com"], []]
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import dns.exception
+import dns.name
+import pytest
+
+from src.services.dns_cache import DnsCache
+from src.services.dns_resolver import DnsResolver
+from src.services.nameservers import NameserverManager
+
+FAST, SLOW, DEAD = "192.0.2.1", "192.0.2.2", "192.0.2.3"
+
+
+def test_prefers_faster_servers():
+    manager = NameserverManager([FAST, SLOW, DEAD], alpha=0.5)
+    manager.success(FAST, 0.01)
+    manager.success(SLOW, 0.2)
+    manager.success(DEAD, 0.5)
+
+    picks = [manager.choose() for _ in range(1000)]
+    assert picks.count(FAST) > picks.count(SLOW) > picks.count(DEAD)
+    # The slowest only ever loses a two-way comparison
+    assert picks.count(DEAD) == 0
+    assert manager.ranked() == [FAST, SLOW, DEAD]
+
+
+def test_latency_is_smoothed():
+    manager = NameserverManager([FAST], alpha=0.5)
+    manager.success(FAST, 0.1)
+    manager.success(FAST, 0.3)
+    assert manager.servers[FAST].latency == pytest.approx(0.2)
+
+
+def test_failing_server_is_ejected_and_returns(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    manager = NameserverManager([FAST, DEAD], eject_failures=3, eject_seconds=30)
+
+    for _ in range(3):
+        manager.failure(DEAD, 2.0, timeout=True)
+    assert not manager.servers[DEAD].healthy
+    assert {manager.choose() for _ in range(50)} == {FAST}
+
+    now[0] += 31
+    assert manager.servers[DEAD].healthy
+    # Still failing after the ejection: one failure ejects it again
+    manager.failure(DEAD, 2.0, timeout=True)
+    assert not manager.servers[DEAD].healthy
+
+    stats = manager.stats()[DEAD]
+    assert stats["timeouts"] == 4
+    assert stats["ejections"] == 2
+    assert stats["error_rate"] == 1.0
+
+
+def test_all_ejected_falls_back_to_first_returning(monkeypatch):
+    manager = NameserverManager([FAST, SLOW], eject_failures=1, eject_seconds=30)
+    manager.failure(FAST, 1.0)
+    time.sleep(0.01)
+    manager.failure(SLOW, 1.0)
+    assert manager.choose() == FAST
+    assert manager.choose(exclude=[FAST]) == SLOW
+
+
+@pytest.mark.asyncio
+async def test_lookup_fails_over_to_another_nameserver(monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DNS_RESOLVERS", [DEAD, FAST])
+    monkeypatch.setattr("src.core.config.settings.WILDCARD_DETECTION", False)
+    monkeypatch.setattr("src.core.config.settings.DNS_RECORD_TYPES", ["A"])
+    monkeypatch.setattr("src.core.config.settings.DNS_EJECT_FAILURES", 1)
+    resolver = DnsResolver(cache=DnsCache(max_entries=0))
+
+    class Answer(list):
+        pass
+
+    async def resolve(self, name, rdtype):
+        await asyncio.sleep(0)
+        if self.nameservers == [DEAD]:
+            raise dns.exception.Timeout()
+        answer = Answer(["198.51.100.1"])
+        answer.expiration = time.time() + 60
+        answer.canonical_name = dns.name.from_text(name)
+        return answer
+
+    monkeypatch.setattr("dns.asyncresolver.Resolver.resolve", resolve)
+
+    for index in range(10):
+        record = await resolver.resolve(f"host{index}.example.com")
+        assert record.A == ["198.51.100.1"]
+
+    stats = resolver.nameservers.stats()
+    assert stats[FAST]["queries"] == 10
+    assert stats[DEAD]["healthy"] is False
+    # Unmeasured, so tried once, then ejected for the rest of the run
+    assert stats[DEAD]["timeouts"] == 1
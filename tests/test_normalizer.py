@@ -0,0 +1,38 @@
+from src.services.normalizer import normalize_domain, normalize_names
+
+
+def test_normalize_names_cleans_batch():
+    names = normalize_names(
+        [
+            "WWW.Example.com\n*.example.com",
+            "mail@example.com",
+            "api.example.com.",
+            "10.0.0.1",
+            "bad_-label-.example.com",
+            "-dash.example.com",
+            "",
+        ]
+    )
+
+    assert names == {
+        "www.example.com",
+        "example.com",
+        "mail.example.com",
+        "api.example.com",
+    }
+
+
+def test_normalize_names_scope():
+    names = normalize_names(
+        ["a.example.com", "example.com", "notexample.com", "example.com.evil.io"],
+        "Example.com",
+    )
+
+    assert names == {"a.example.com", "example.com"}
+
+
+def test_normalize_names_idn():
+    assert normalize_names(["bücher.example.com"], "example.com") == {
+        "xn--bcher-kva.example.com"
+    }
+    assert normalize_domain("Bücher.de.") == "xn--bcher-kva.de"
@@ -0,0 +1,171 @@
+import asyncio
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Thread
+
+import httpx
+import pytest
+
+from src.core.exceptions import RateLimitedException
+from src.services.crtsh_service import Crtsh
+from src.services.http_client import HttpClient, http_client
+from src.services.rate_limiter import TokenBucket, parse_retry_after, rate_limiter
+from src.services.sources import SourceRegistry
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    closed = Event()
+
+    def finish(self):
+        super().finish()
+        self.closed.set()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_http(monkeypatch):
+    monkeypatch.setattr("random.uniform", lambda low, high: 0.0)
+    monkeypatch.setattr("src.core.config.settings.HTTP_BACKOFF_BASE", 0.01)
+
+    def install(handler):
+        http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        http_client._loop = asyncio.get_running_loop()
+
+    yield install
+    rate_limiter._buckets.clear()
+    rate_limiter.retries.clear()
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20, burst=3)
+
+    started = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+    elapsed = time.monotonic() - started
+
+    assert 0.08 <= elapsed < 0.5
+    assert bucket.stats()["requests"] == 5
+    assert bucket.waited > 0
+
+
+@pytest.mark.asyncio
+async def test_bucket_throttle_pauses_and_slows_down():
+    bucket = TokenBucket(rate=100, burst=1)
+    bucket.throttle(0.1)
+
+    assert bucket.rate == 50
+    assert await bucket.acquire() >= 0.09
+
+    for _ in range(5):
+        bucket.success()
+    assert bucket.rate == 100
+
+
+@pytest.mark.asyncio
+async def test_bucket_turns_away_waits_past_deadline():
+    bucket = TokenBucket(rate=0.5, burst=1)
+    await bucket.acquire(deadline=time.monotonic() + 1)
+
+    started = time.monotonic()
+    with pytest.raises(RateLimitedException):
+        await bucket.acquire(deadline=started + 1)
+    assert time.monotonic() - started < 0.1
+    assert bucket.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_discovery_skips_rate_limited_source(mock_http, monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_SOURCES", ["limited"])
+    monkeypatch.setattr("src.core.config.settings.SOURCE_RATE_LIMITS", {"limited": 0.1})
+    monkeypatch.setattr("src.core.config.settings.SOURCE_BURSTS", {"limited": 1})
+    monkeypatch.setattr("src.core.config.settings.RATE_LIMIT_MAX_WAIT", 1.0)
+    mock_http(lambda request: httpx.Response(200, json=["a.example.com"]))
+
+    async def fetch(domain):
+        response = await http_client.send("limited", "GET", "https://x.test/")
+        return response.json()
+
+    registry = SourceRegistry()
+    registry.register("limited", fetch, timeout=60)
+    first = await registry.discover("example.com")
+    started = time.monotonic()
+    second = await registry.discover("example.org")
+
+    assert first.sources["limited"].ok
+    assert second.sources["limited"].rate_limited
+    assert second.sources["limited"].error == "rate_limited"
+    assert time.monotonic() - started < 0.5
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_send_retries_throttled_requests(mock_http):
+    statuses = [429, 503, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), headers={"Retry-After": "0"})
+
+    mock_http(handler)
+    try:
+        response = await http_client.send("test", "GET", "https://example.com")
+    finally:
+        await http_client.close()
+
+    assert response.status_code == 200
+    assert rate_limiter.stats()["test"]["retries"] == 2
+    assert rate_limiter.stats()["test"]["throttled"] == 2
+
+
+@pytest.mark.asyncio
+async def test_crtsh_raises_when_retries_exhausted(mock_http, monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.HTTP_MAX_RETRIES", 1)
+    mock_http(lambda request: httpx.Response(502))
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await Crtsh().get_subdomains("example.com")
+    finally:
+        await http_client.close()
+
+
+def test_client_of_a_closed_loop_is_released():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QuietHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    client = HttpClient()
+
+    async def get():
+        await client.client.get(url)
+
+    async def reopen():
+        client.client
+        await client.close()
+
+    try:
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(get())
+        loop.close()
+        assert not QuietHandler.closed.is_set()
+
+        asyncio.run(reopen())
+        # The server sees the pooled connection go away
+        assert QuietHandler.closed.wait(5)
+    finally:
+        server.shutdown()
+        server.server_close()
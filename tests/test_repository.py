@@ -0,0 +1,268 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from pymongo import UpdateMany
+from pymongo.errors import BulkWriteError
+
+from src.core.exceptions import InvalidCursorException
+from src.db.repository import (
+    SCHEMA_VERSION,
+    MongoRepository,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+class FakeSubdomains:
+    """Subdomains collection answering bulk upserts from a set"""
+
+    def __init__(self, stored=(), raced=()):
+        self.stored = set(stored)
+        # Names a concurrent writer inserts just before our write
+        self.raced = set(raced)
+        self.batches = []
+        self.touched = []
+
+    async def bulk_write(self, operations, ordered=True):
+        assert not ordered
+        self.batches.append(len(operations))
+        upserted, errors = [], []
+        for index, operation in enumerate(operations):
+            if isinstance(operation, UpdateMany):
+                self.touched.extend(
+                    (operation._filter["domain"], name)
+                    for name in operation._filter["subdomain"]["$in"]
+                )
+                continue
+            key = (operation._filter["domain"], operation._filter["subdomain"])
+            if key[1] in self.raced:
+                self.stored.add(key)
+                errors.append({"index": index, "code": 11000})
+            elif key not in self.stored:
+                self.stored.add(key)
+                upserted.append({"index": index, "_id": key})
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "upserted": upserted})
+        return SimpleNamespace(upserted_ids={u["index"]: u["_id"] for u in upserted})
+
+
+class FakeDomains:
+    def __init__(self):
+        self.updates = []
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+
+    async def bulk_write(self, operations, ordered=True):
+        self.updates.extend((op._filter, op._doc) for op in operations)
+
+
+class FakeCounters:
+    """Counter documents updated by bulk upserts, keyed by their filter"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            key = tuple(sorted(operation._filter.items()))
+            doc = self.docs.setdefault(key, dict(operation._filter))
+            for field, value in operation._doc.get("$inc", {}).items():
+                doc[field] = doc.get(field, 0) + value
+            doc.update(operation._doc.get("$set", {}))
+            for field, value in operation._doc.get("$max", {}).items():
+                doc[field] = max(doc.get(field, value), value)
+
+    def find(self, query):
+        async def cursor():
+            for doc in self.docs.values():
+                if doc.get("_id") in query["_id"]["$in"]:
+                    yield doc
+
+        return cursor()
+
+    def get(self, **query):
+        return self.docs.get(tuple(sorted(query.items())), {})
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda doc: doc[field])
+        return self
+
+    def limit(self, limit):
+        self.docs = self.docs[:limit]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeDomainList:
+    """Domains collection answering keyset range queries"""
+
+    def __init__(self, names):
+        self.docs = [{"domain": name} for name in names]
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+        after = query.get("domain", {}).get("$gt", "")
+        return FakeCursor([doc for doc in self.docs if doc["domain"] > after])
+
+
+class FakeMeta:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {}).update(update["$set"])
+
+
+@pytest.fixture
+def repo(monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.SUBDOMAIN_WRITE_BATCH", 2)
+    repo = MongoRepository()
+    repo.collection = FakeDomains()
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_add_subdomains_returns_only_new_names(repo):
+    repo.subdomain_collection = FakeSubdomains(
+        stored={("example.com", "a.example.com")}
+    )
+
+    new = await repo.add_subdomains(
+        "example.com", ["a.example.com", "b.example.com", "c.example.com"]
+    )
+
+    assert new == ["b.example.com", "c.example.com"]
+    assert repo.subdomain_collection.batches == [2, 1]
+    assert len(repo.collection.updates) == 1
+    query, update = repo.collection.updates[0]
+    assert query == {"domain": "example.com"}
+    assert update["$inc"] == {"subdomain_count": 2}
+    assert update["$set"]["last_new_found"] == update["$set"]["updated_at"]
+
+    assert await repo.add_subdomains("example.com", ["a.example.com"]) == []
+    assert len(repo.collection.updates) == 1
+
+
+@pytest.mark.asyncio
+async def test_add_subdomains_tolerates_concurrent_inserts(repo):
+    repo.subdomain_collection = FakeSubdomains(raced={"b.example.com"})
+
+    new = await repo.add_subdomains("example.com", ["a.example.com", "b.example.com"])
+
+    assert new == ["a.example.com"]
+    # The name inserted by the other writer is counted by that writer
+    assert repo.collection.updates[0][1]["$inc"] == {"subdomain_count": 1}
+
+
+@pytest.mark.asyncio
+async def test_new_subdomains_update_counters(repo):
+    repo.subdomain_collection = FakeSubdomains(
+        stored={("example.com", "a.example.com")}
+    )
+    repo.stats_collection = FakeCounters()
+    repo.daily_collection = FakeCounters()
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+
+    await repo.add_subdomains("example.com", ["a.example.com", "b.example.com"])
+    await repo.add_subdomains("example.com", ["b.example.com"])
+    await repo.save_domain_batch(
+        [
+            {"domain": "example.com", "subdomains": ["c.example.com"]},
+            {"domain": "example.org", "subdomains": ["a.example.org"]},
+        ]
+    )
+
+    totals = repo.stats_collection.get(_id="global")
+    assert totals["total_subdomains"] == 3
+    assert totals["total_domains"] == 0
+    assert repo.stats_collection.get(_id=f"day:{today}")["new_subdomains"] == 3
+    daily = repo.daily_collection
+    assert daily.get(domain="example.com", day=today)["new_subdomains"] == 2
+    assert daily.get(domain="example.org", day=today)["new_subdomains"] == 1
+
+    stats = await repo.get_stats()
+    assert stats["total_subdomains"] == 3
+    assert stats["new_today"] == 3
+    assert stats["last_updated"] == totals["last_updated"]
+
+
+@pytest.mark.asyncio
+async def test_seen_subdomains_only_move_last_seen(repo):
+    repo.subdomain_collection = FakeSubdomains(
+        stored={("example.com", "a.example.com"), ("example.com", "b.example.com")}
+    )
+
+    new = await repo.save_domain_batch(
+        [
+            {
+                "domain": "example.com",
+                "subdomains": ["c.example.com"],
+                "seen": ["a.example.com", "b.example.com"],
+            },
+            {"domain": "example.org", "subdomains": []},
+        ]
+    )
+
+    assert new == {"example.com": ["c.example.com"], "example.org": []}
+    assert repo.subdomain_collection.touched == [
+        ("example.com", "a.example.com"),
+        ("example.com", "b.example.com"),
+    ]
+    ((query, update),) = repo.collection.updates
+    assert query == {"domain": "example.com"}
+    assert update["$set"]["last_seen_touched"] == update["$set"]["updated_at"]
+
+
+@pytest.mark.asyncio
+async def test_pages_follow_continuation_tokens(repo):
+    names = [f"site{index:02}.com" for index in range(25)]
+    repo.collection = FakeDomainList(reversed(names))
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        docs, cursor = await repo.find_page(limit=10, cursor=cursor)
+        seen.extend(doc["domain"] for doc in docs)
+        pages += 1
+        if cursor is None:
+            break
+    assert seen == names
+    assert pages == 3
+    # Every page after the first starts from the last domain of the previous
+    assert repo.collection.queries[1] == {"domain": {"$gt": "site09.com"}}
+
+    batches = [len(docs) async for docs in repo.iter_domain_batches(10)]
+    assert batches == [10, 10, 5]
+
+
+def test_cursor_tokens_are_opaque_and_validated():
+    token = encode_cursor("example.com")
+    assert "example.com" not in token
+    assert decode_cursor(token) == "example.com"
+    for bad in ("not a cursor", encode_cursor("x")[:-3] + "!!"):
+        with pytest.raises(InvalidCursorException):
+            decode_cursor(bad)
+
+
+@pytest.mark.asyncio
+async def test_migrations_run_once(repo):
+    repo.meta_collection = FakeMeta()
+    repo.migrate_embedded_subdomains = AsyncMock(return_value=2)
+
+    assert await repo.migrate() == 2
+    assert await repo.migrate() == 0
+    repo.migrate_embedded_subdomains.assert_awaited_once()
+    assert repo.meta_collection.docs["schema"]["version"] == SCHEMA_VERSION
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from src.services.sources import SourceRegistry
+
+
+async def fast(domain):
+    return [f"a.{domain}", f"b.{domain}"]
+
+
+async def slow(domain):
+    await asyncio.sleep(0.2)
+    return [f"c.{domain}"]
+
+
+async def hanging(domain):
+    await asyncio.sleep(10)
+    return [f"never.{domain}"]
+
+
+async def broken(domain):
+    raise RuntimeError("upstream error")
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(
+        "src.core.config.settings.DISCOVERY_SOURCES",
+        ["fast", "slow", "hanging", "broken"],
+    )
+    registry = SourceRegistry()
+    registry.register("fast", fast)
+    registry.register("slow", slow)
+    registry.register("hanging", hanging, timeout=0.3)
+    registry.register("broken", broken)
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_discover_keeps_partial_results(registry):
+    result = await registry.discover("example.com")
+
+    assert result.subdomains == {"a.example.com", "b.example.com", "c.example.com"}
+    assert result.sources["fast"].count == 2
+    assert result.sources["hanging"].timed_out
+    assert result.sources["broken"].error == "upstream error"
+    assert sorted(result.failed) == ["broken", "hanging"]
+
+
+@pytest.mark.asyncio
+async def test_discover_runs_sources_concurrently(registry, monkeypatch):
+    monkeypatch.setattr(
+        "src.core.config.settings.DISCOVERY_SOURCES", ["fast", "slow", "slow2"]
+    )
+    registry.register("slow2", slow)
+
+    started = time.perf_counter()
+    result = await registry.discover("example.com")
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.35
+    assert result.sources["slow"].latency >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_discover_skips_disabled_sources(registry, monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_SOURCES", ["fast"])
+    result = await registry.discover("example.com")
+
+    assert list(result.sources) == ["fast"]
@@ -0,0 +1,78 @@
+import httpx
+import pytest
+
+from src.services.http_client import http_client
+from src.services.monitoring_service import MonitoringService
+from src.services.rate_limiter import rate_limiter
+from src.standin.server import StandinConfig, StandinServer
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    server = StandinServer(StandinConfig(entries=200, unique_names=20, seed=1))
+    server.start()
+    monkeypatch.setattr("src.core.config.settings.CRTSH_BASE_URL", server.url)
+    monkeypatch.setattr("src.core.config.settings.THREATMINER_BASE_URL", server.url)
+    monkeypatch.setattr("src.core.config.settings.CERT_CACHE_ENABLED", False)
+    monkeypatch.setattr("src.core.config.settings.HTTP_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr("random.uniform", lambda low, high: 0.0)
+    yield server
+    server.stop()
+    rate_limiter._buckets.clear()
+    rate_limiter.retries.clear()
+
+
+@pytest.mark.asyncio
+async def test_discovery_against_standin(standin):
+    service = MonitoringService()
+    try:
+        result = await service.discover("example.com")
+    finally:
+        await http_client.close()
+
+    assert result.sources["crtsh"].count == 20
+    assert result.sources["threatminer"].count == 50
+    assert len(result.subdomains) == 70
+
+
+@pytest.mark.asyncio
+async def test_standin_throttling_is_retried(standin, monkeypatch):
+    standin.config.fail_first = 2
+    standin.config.retry_after = 0
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_SOURCES", ["crtsh"])
+
+    service = MonitoringService()
+    try:
+        result = await service.discover("example.com")
+    finally:
+        await http_client.close()
+
+    assert result.sources["crtsh"].ok
+    assert standin.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_standin_truncated_body_fails_source(standin, monkeypatch):
+    standin.config.truncate_rate = 1.0
+    monkeypatch.setattr("src.core.config.settings.DISCOVERY_SOURCES", ["crtsh"])
+    monkeypatch.setattr("src.core.config.settings.HTTP_MAX_RETRIES", 0)
+
+    service = MonitoringService()
+    try:
+        result = await service.discover("example.com")
+    finally:
+        await http_client.close()
+
+    assert not result.sources["crtsh"].ok
+    assert result.subdomains == set()
+
+
+def test_standin_serves_recorded_responses(tmp_path):
+    (tmp_path / "crtsh").mkdir()
+    (tmp_path / "crtsh" / "example.com.json").write_text(
+        '[{"id": 1, "name_value": "recorded.example.com"}]'
+    )
+    with StandinServer(StandinConfig(record_dir=str(tmp_path))) as server:
+        response = httpx.get(f"{server.url}/?q=%25.example.com&output=json")
+
+    assert response.json() == [{"id": 1, "name_value": "recorded.example.com"}]
@@ -0,0 +1,112 @@
+from unittest.mock import patch
+
+import pytest
+
+from src.models.domain import DNSRecord
+from src.services import monitoring_service as module
+from src.services.monitoring_service import MonitoringService
+from src.services.takeover import (
+    Fingerprint,
+    FingerprintTable,
+    TakeoverDetector,
+    takeover_detector,
+)
+
+AZURE = Fingerprint("Microsoft Azure", ("azurewebsites.net", "cloudapp.net"))
+S3 = Fingerprint("AWS S3", ("s3.amazonaws.com",), http="NoSuchBucket")
+S3_WEBSITE = Fingerprint("AWS S3 website", ("s3-website.eu-central-1.amazonaws.com",))
+
+
+class FakeResolver:
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.checked = []
+
+    async def nxdomain(self, name):
+        self.checked.append(name)
+        return name in self.missing
+
+
+def test_table_matches_longest_suffix():
+    table = FingerprintTable([AZURE, S3, S3_WEBSITE])
+    assert table.match("shop.azurewebsites.net.") is AZURE
+    assert table.match("Shop.CloudApp.Net") is AZURE
+    assert table.match("bucket.s3.amazonaws.com") is S3
+    assert table.match("b.s3-website.eu-central-1.amazonaws.com") is S3_WEBSITE
+    # The service's own domain and unrelated names are not resources
+    assert table.match("azurewebsites.net") is None
+    assert table.match("www.amazonaws.com") is None
+    assert table.match("example.cdn.net") is None
+
+
+def test_bundled_table_loads():
+    table = FingerprintTable.load()
+    assert len(table) > 10
+    assert table.match("victim.github.io").service == "GitHub Pages"
+
+
+@pytest.mark.asyncio
+async def test_only_unclaimed_targets_are_confirmed():
+    resolver = FakeResolver(missing={"gone.azurewebsites.net"})
+    detector = TakeoverDetector(FingerprintTable([AZURE, S3]), resolver)
+
+    takeovers = await detector.check(
+        "example.com",
+        [
+            ("old.example.com", ["gone.azurewebsites.net."]),
+            ("app.example.com", ["live.azurewebsites.net."]),
+            ("www.example.com", ["example.cdn.net."]),
+        ],
+    )
+
+    assert [t.subdomain for t in takeovers] == ["old.example.com"]
+    assert takeovers[0].service == "Microsoft Azure"
+    # Targets outside the table are never looked up
+    assert resolver.checked == ["gone.azurewebsites.net", "live.azurewebsites.net"]
+
+
+@pytest.mark.asyncio
+async def test_http_fingerprint_confirms_existing_target():
+    detector = TakeoverDetector(FingerprintTable([S3]), FakeResolver())
+
+    async def body_matches(subdomain, marker):
+        return subdomain == "files.example.com"
+
+    with patch.object(detector, "_http_matches", side_effect=body_matches):
+        takeovers = await detector.check(
+            "example.com",
+            [
+                ("files.example.com", ["files.s3.amazonaws.com."]),
+                ("assets.example.com", ["assets.s3.amazonaws.com."]),
+            ],
+        )
+
+    assert [t.subdomain for t in takeovers] == ["files.example.com"]
+    assert "NoSuchBucket" in takeovers[0].reason
+
+
+@pytest.mark.asyncio
+async def test_new_dangling_cname_sends_alert(monkeypatch):
+    monkeypatch.setattr(module.settings, "SLACK_WEBHOOK", "https://hooks.example.com")
+    monkeypatch.setattr(module.settings, "DNS_HISTORY_ENABLED", False)
+    service = MonitoringService()
+    sent = []
+    service.notifications.slack = lambda message, alert=False: sent.append(
+        (alert, message)
+    )
+
+    async def resolve(name):
+        return DNSRecord(subdomain=name, CNAME=["gone.azurewebsites.net."])
+
+    monkeypatch.setattr(takeover_detector, "_table", FingerprintTable([AZURE]))
+    monkeypatch.setattr(
+        takeover_detector, "resolver", FakeResolver({"gone.azurewebsites.net"})
+    )
+    with patch.object(module.dns_resolver, "resolve", side_effect=resolve):
+        await service.notify_new_subdomains(
+            "example.com", ["old.example.com"], True, False
+        )
+
+    alerts = [message for alert, message in sent if alert]
+    assert len(alerts) == 1
+    assert "old.example.com -> gone.azurewebsites.net" in alerts[0]
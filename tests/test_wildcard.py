@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import dns.name
+import dns.resolver
+import pytest
+
+from src.services.dns_cache import DnsCache
+from src.services.dns_resolver import DnsResolver
+from src.services.wildcard import parent_zone
+
+
+def wildcard_zone(monkeypatch, zone, addresses, hosts):
+    """Serve *.zone with addresses, explicit hosts from a dict"""
+    calls = []
+
+    async def resolve(resolver, name, rdtype):
+        calls.append((name, rdtype))
+        await asyncio.sleep(0)
+        if rdtype == "A" and name in hosts:
+            return _answer(hosts[name], name)
+        if rdtype == "A" and name.endswith("." + zone):
+            return _answer(addresses, name)
+        raise dns.resolver.NoAnswer()
+
+    monkeypatch.setattr("dns.asyncresolver.Resolver.resolve", resolve)
+    return calls
+
+
+def _answer(values, name):
+    answer = FakeAnswer(values)
+    answer.expiration = time.time() + 300
+    answer.canonical_name = dns.name.from_text(name)
+    return answer
+
+
+class FakeAnswer(list):
+    pass
+
+
+def test_parent_zone():
+    assert parent_zone("a.b.example.com") == "b.example.com"
+    assert parent_zone("www.example.com.") == "example.com"
+    assert parent_zone("example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_wildcard_names_are_classified(monkeypatch):
+    resolver = DnsResolver(cache=DnsCache())
+    calls = wildcard_zone(
+        monkeypatch,
+        "example.com",
+        ["192.0.2.10", "192.0.2.11"],
+        {"real.example.com": ["198.51.100.7"]},
+    )
+
+    names = [f"noise{index}.example.com" for index in range(20)]
+    records = await asyncio.gather(*(resolver.resolve(name) for name in names))
+    assert all(record.wildcard for record in records)
+    # One probe of the zone, one A lookup per name and no CNAME lookups
+    assert len(calls) == 2 + 20
+    assert resolver.wildcards.stats() == {
+        "zones": 1,
+        "wildcard_zones": 1,
+        "probed": 1,
+        "matched": 20,
+    }
+
+    record = await resolver.resolve("real.example.com")
+    assert not record.wildcard
+    assert record.A == ["198.51.100.7"]
+    assert calls[-1] == ("real.example.com", "CNAME")
+
+
+@pytest.mark.asyncio
+async def test_zone_without_wildcard(monkeypatch):
+    resolver = DnsResolver(cache=DnsCache())
+    wildcard_zone(
+        monkeypatch, "other.net", ["192.0.2.10"], {"www.example.com": ["192.0.2.10"]}
+    )
+
+    record = await resolver.resolve("www.example.com")
+    assert not record.wildcard
+    assert resolver.wildcards.stats()["wildcard_zones"] == 0
+
+
+@pytest.mark.asyncio
+async def test_detection_disabled(monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.WILDCARD_DETECTION", False)
+    resolver = DnsResolver(cache=DnsCache())
+    wildcard_zone(monkeypatch, "example.com", ["192.0.2.10"], {})
+
+    record = await resolver.resolve("noise.example.com")
+    assert not record.wildcard
+    assert resolver.wildcards.probed == 0
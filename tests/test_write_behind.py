@@ -0,0 +1,180 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.db.fingerprint import SubdomainFingerprint
+from src.services import write_behind as module
+from src.services.monitoring_service import MonitoringService
+from src.services.write_behind import DomainDiff, WriteBehind
+
+
+class FakeRepository:
+    """Domains and subdomains in memory, counting round trips"""
+
+    def __init__(self, domains):
+        self.domains = {domain: {"domain": domain} for domain in domains}
+        self.subdomains = set()
+        self.fingerprints = {}
+        self.reads = 0
+        self.batches = []
+        self.written = 0
+
+    async def iter_domain_batches(self, batch_size, projection=None):
+        names = sorted(self.domains)
+        for start in range(0, len(names), batch_size):
+            self.reads += 1
+            yield [self.domains[name] for name in names[start : start + batch_size]]
+
+    async def find_fingerprints(self, domains):
+        return {
+            domain: self.fingerprints.get(domain, SubdomainFingerprint())
+            for domain in domains
+        }
+
+    async def save_domain_batch(self, diffs):
+        self.batches.append(len(diffs))
+        self.written += sum(len(diff["subdomains"]) for diff in diffs)
+        new = {}
+        for diff in diffs:
+            names = [
+                name
+                for name in diff["subdomains"]
+                if (diff["domain"], name) not in self.subdomains
+            ]
+            self.subdomains.update((diff["domain"], name) for name in names)
+            new[diff["domain"]] = names
+            if diff["fingerprint"] is not None:
+                self.fingerprints[diff["domain"]] = diff["fingerprint"]
+            if diff["crtsh_last_id"] is not None:
+                self.domains[diff["domain"]]["crtsh_last_id"] = diff["crtsh_last_id"]
+        return new
+
+
+@pytest.mark.asyncio
+async def test_flushes_by_size_time_and_close(monkeypatch):
+    repo = FakeRepository([])
+    monkeypatch.setattr(module, "repository", repo)
+    stored = []
+
+    async def on_stored(diff):
+        stored.append((diff.domain, diff.new_subdomains))
+
+    writer = WriteBehind(on_stored, max_domains=2, max_delay=0.05)
+    await writer.put(DomainDiff("a.com", ["x.a.com"]))
+    await writer.put(DomainDiff("b.com", ["x.b.com"]))
+    assert repo.batches == [2]
+
+    await writer.put(DomainDiff("a.com", ["x.a.com", "y.a.com"]))
+    await asyncio.sleep(0.1)
+    assert repo.batches == [2, 1]
+    assert stored[-1] == ("a.com", ["y.a.com"])
+
+    await writer.put(DomainDiff("c.com", []))
+    await writer.close()
+    assert repo.batches == [2, 1, 1]
+    assert writer.stored == 4
+    assert sorted(stored) == [
+        ("a.com", ["x.a.com"]),
+        ("a.com", ["y.a.com"]),
+        ("b.com", ["x.b.com"]),
+        ("c.com", []),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stored_domains_are_handled_concurrently(monkeypatch):
+    repo = FakeRepository([])
+    monkeypatch.setattr(module, "repository", repo)
+    running, peak = 0, 0
+
+    async def on_stored(diff):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.2)
+        running -= 1
+
+    writer = WriteBehind(on_stored, max_domains=5, max_delay=0.05, concurrency=10)
+    started = asyncio.get_running_loop().time()
+    for index in range(20):
+        await writer.put(DomainDiff(f"site{index}.com", [f"www.site{index}.com"]))
+    await writer.close()
+
+    assert peak == 10
+    assert asyncio.get_running_loop().time() - started < 1.0
+
+
+@pytest.mark.asyncio
+async def test_monitor_all_domains_batches_round_trips(monkeypatch):
+    monkeypatch.setattr("src.core.config.settings.MONITOR_BATCH_SIZE", 100)
+    monkeypatch.setattr("src.core.config.settings.WRITE_BEHIND_MAX_DOMAINS", 100)
+    domains = [f"site{index}.com" for index in range(250)]
+    repo = FakeRepository(domains)
+    monkeypatch.setattr(module, "repository", repo)
+    service = MonitoringService()
+    notify = AsyncMock()
+
+    async def crtsh(domain, cursor=None):
+        cursor.max_id = 7
+        return [f"www.{domain}"]
+
+    with patch("src.services.monitoring_service.repository", repo), patch.object(
+        service.crtsh, "get_subdomains", side_effect=crtsh
+    ), patch.object(
+        service.threatminer, "get_subdomains", return_value=[]
+    ), patch.object(
+        service, "notify_new_subdomains", notify
+    ):
+        result = await service.monitor_all_domains()
+
+    assert result["domains_monitored"] == 250
+    assert result["new_subdomains_found"] == 250
+    assert result["errors"] == 0
+    assert repo.reads == 3
+    assert sum(repo.batches) == 250 and len(repo.batches) <= 4
+    assert notify.call_count == 250
+    assert repo.domains["site0.com"]["crtsh_last_id"] == 7
+
+    # The next cycle finds the same names in the fingerprints and writes none
+    with patch("src.services.monitoring_service.repository", repo), patch.object(
+        service.crtsh, "get_subdomains", side_effect=crtsh
+    ), patch.object(
+        service.threatminer, "get_subdomains", return_value=[]
+    ), patch.object(
+        service, "notify_new_subdomains", notify
+    ):
+        result = await service.monitor_all_domains()
+
+    assert result["new_subdomains_found"] == 0
+    assert repo.written == 250
+
+
+@pytest.mark.asyncio
+async def test_manual_check_joins_the_cycle(monkeypatch):
+    repo = FakeRepository(["example.com"])
+    monkeypatch.setattr(module, "repository", repo)
+    service = MonitoringService()
+    calls = []
+
+    async def crtsh(domain, cursor=None):
+        calls.append(domain)
+        await asyncio.sleep(0.1)
+        return [f"www.{domain}"]
+
+    async def manual():
+        await asyncio.sleep(0.02)
+        return await service.monitor_domain("example.com")
+
+    with patch("src.services.monitoring_service.repository", repo), patch.object(
+        service.crtsh, "get_subdomains", side_effect=crtsh
+    ), patch.object(
+        service.threatminer, "get_subdomains", return_value=[]
+    ), patch.object(
+        service, "notify_new_subdomains", AsyncMock()
+    ):
+        result, new = await asyncio.gather(service.monitor_all_domains(), manual())
+
+    assert calls == ["example.com"]
+    assert result["new_subdomains_found"] == 1
+    assert new == 1